@@ -0,0 +1,203 @@
+'''
+    File name: bench.py
+    Author: Lukas Müller
+    Python Version: 3.6
+'''
+
+import os
+import io
+import sys
+import json
+import time
+import runpy
+import argparse
+import platform
+import tracemalloc
+import contextlib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pyfsr import LFSR, NLFSR, FSRFunction  # noqa: E402
+
+'''
+Benchmarks for the core engines. Every case is timed (best of --repeat runs)
+and measured once more with tracemalloc for the peak memory. The results are
+written as json, and compared against an earlier result file with --compare:
+
+    $ python benchmarks/bench.py --output new.json --compare old.json
+
+Cases that got slower than --threshold (relative) are flagged and the script
+exits with status 1.
+'''
+
+GX = [
+    16, 19, 27, 34, 42, 46, 51, 58, 64, 70, 79, "+", "+", "+", "+", "+", "+", "+", "+", "+", "+",
+    16, 19, "*", "+", 42, 46, "*", "+", 64, 70, "*", "+", 19, 27, 34, "*", "*", "+", 46, 51, 58,
+    "*", "*", "+", 16, 34, 51, 70, "*", "*", "*", "+", 19, 27, 42, 46, "*", "*", "*", "+", 16, 19,
+    58, 64, "*", "*", "*", "+", 16, 19, 27, 34, 42, "*", "*", "*", "*", "+", 46, 51, 58, 64, 70,
+    "*", "*", "*", "*", "+", 27, 34, 42, 46, 51, 58, "*", "*", "*", "*", "*", "+"
+]
+HX = [
+    1, 4, "+", 0, 3, "*", "+", 2, 3, "*", "+", 3, 4, "*", "+", 0, 1, 2,
+    "*", "*", "+", 0, 2, 3, "*", "*", "+", 0, 2, 4, "*", "*", "+", 1, 2,
+    4, "*", "*", "+", 2, 3, 4, "*", "*", "+"
+]
+
+# feedback polynoms of several degrees
+POLYS = {
+    19: [19, 18, 17, 14],
+    80: [80, 67, 57, 42, 29, 18],
+    521: [521, 32],
+}
+
+
+def solve_case(expression, size, calls):
+    func = FSRFunction(expression)
+    state = np.random.randint(0, 2, size).astype(np.uint8)
+
+    def run():
+        for _ in range(calls):
+            func.solve(state)
+    return run, calls
+
+
+def lfsr_case(degree, feedback, bits, engine):
+    lfsr = LFSR(poly=list(POLYS[degree]), initstate="random", feedback=feedback)
+
+    def run():
+        lfsr.sequence(bits, show_progress=False, engine=engine)
+    return run, bits
+
+
+def nlfsr_case(bits, engine):
+    nlfsr = NLFSR(initstate="random", infunc=FSRFunction(GX), size=80)
+
+    def run():
+        nlfsr.sequence(bits, show_progress=False, engine=engine)
+    return run, bits
+
+
+def reset_case(count):
+    lfsr = LFSR(poly=list(POLYS[80]), initstate="random")
+    nlfsr = NLFSR(initstate="random", infunc=FSRFunction(GX), size=80)
+
+    def run():
+        for _ in range(count):
+            lfsr.reset()
+            nlfsr.reset()
+    return run, None
+
+
+def example_case(name, bits):
+    path = os.path.join(ROOT, 'examples', name)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(path, run_name='__main__')
+    return run, bits
+
+
+def cases(quick):
+    scale = 10 if quick else 1
+    result = {
+        'solve_gx': solve_case(GX, 80, 100000 // scale),
+        'solve_hx': solve_case(HX, 5, 100000 // scale),
+        'reset': reset_case(1000 // scale),
+    }
+    for degree in POLYS:
+        for feedback in ['external', 'internal']:
+            for bits in [10**4, 10**6 // scale, 10**7 // scale]:
+                name = f'lfsr_{degree}_{feedback}_packed_{bits}'
+                result[name] = lfsr_case(degree, feedback, bits, 'packed')
+            result[f'lfsr_{degree}_{feedback}_table_{10**6 // scale}'] = \
+                lfsr_case(degree, feedback, 10**6 // scale, 'table')
+            result[f'lfsr_{degree}_{feedback}_shift_{10**4}'] = \
+                lfsr_case(degree, feedback, 10**4, 'shift')
+    for bits in [10**4, 10**6 // scale]:
+        result[f'nlfsr_grain_parallel_{bits}'] = nlfsr_case(bits, 'parallel')
+    result['nlfsr_grain_shift_10000'] = nlfsr_case(10**4, 'shift')
+    result['example_a51'] = example_case('a51.py', 2**7)
+    result['example_e0'] = example_case('e0.py', 2000)
+    result['example_grain'] = example_case('grain.py', 2000)
+    return result
+
+
+def measure(run, bits, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {'seconds': min(times), 'peak_bytes': peak}
+    if bits is not None:
+        result['bits_per_sec'] = bits / min(times)
+    return result
+
+
+def compare(results, previous, threshold):
+    """returns the names of the cases that got slower than the threshold
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in previous:
+            continue
+        ratio = result['seconds'] / previous[name]['seconds']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- SLOWER'
+            regressions.append(name)
+        print(f'{name:45s} {previous[name]["seconds"]:10.5f}s -> {result["seconds"]:10.5f}s  x{ratio:5.2f}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pyfsr benchmarks')
+    parser.add_argument('--output', default='bench_results.json', help='result file')
+    parser.add_argument('--compare', help='earlier result file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown that is flagged (default 0.2)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes')
+    parser.add_argument('--filter', default='', help='only run cases containing this string')
+    args = parser.parse_args()
+
+    results = {}
+    for name, (run, bits) in cases(args.quick).items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(run, bits, args.repeat)
+        rate = results[name].get('bits_per_sec')
+        rate = f'{rate:14,.0f} bits/s' if rate else ' ' * 21
+        print(f'{name:45s} {results[name]["seconds"]:10.5f}s {rate} '
+              f'{results[name]["peak_bytes"] / 2**20:9.2f} MiB peak')
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'quick': args.quick,
+            },
+            'results': results,
+        }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)['results']
+        print()
+        regressions = compare(results, previous, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} case(s) slower than {args.threshold:.0%}')
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
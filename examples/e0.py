@@ -4,37 +4,26 @@
     Python Version: 3.6
 '''
 
-import numpy as np
-from pyfsr import LFSR
+from pyfsr import LFSR, FSRFunction, CompositeGenerator, FSM
 
 '''
 Test Implementation of the E0 cipher:
 https://www.esat.kuleuven.be/cosic/publications/article-22.pdf
 '''
 
+# T2 of the previous carry (bit 0 and bit 1), indexed by its value
+T2 = [0b00, 0b10, 0b10, 0b01]
 
-class FSM():
-    def __init__(self):
-        self.ct_1 = [1, 0]
-        self.ct = [1, 0]
-        self.ct1 = [1, 0]
 
-    def __T2(self):
-        as_bin = [int(b) for b in bin(self.ct_1)[2:]]
-        if len(as_bin) == 1:
-            as_bin.append(0)
-        return [as_bin[1], np.logical_xor(as_bin[0], as_bin[1])]
-
-    def blend(self, x1, x2, x3, x4):
-        # calc int from bit arr
-        self.ct = self.ct[0]+2*self.ct[1]
-        yt = x1 + x2 + x3 + x4
-        st1 = int((yt + self.ct) / 2)
-        self.ct_1 = self.ct
-        self.ct = self.ct1
-        self.ct1 = np.logical_xor(st1, self.ct)
-        self.ct1 = np.logical_xor(self.ct1, self.__T2())
-        return self.ct
+def blend(state, value):
+    '''the summation combiner. the state holds the carry c_t (bits 0-1) and
+    c_t+1 (bits 2-3), the input holds the outbits of the four lfsrs'''
+    ct, ct1 = state & 3, state >> 2
+    yt = bin(value).count('1')
+    st1 = (yt + ct) // 2
+    # st1 is xored into both bits of c_t+2 if it is not 0
+    ct2 = (3 if st1 else 0) ^ ct1 ^ T2[ct]
+    return ct1 | (ct2 << 2), ct1 & 1
 
 
 if __name__ == "__main__":
@@ -49,21 +38,15 @@ if __name__ == "__main__":
     l3 = LFSR([33, 28, 24, 4], key_bin[25+31:25+31+33])
     l4 = LFSR([39, 36, 28, 4], key_bin[25+31+33:])
 
+    # the outbits of the lfsrs are xored and blended with the fsm
+    e0 = CompositeGenerator(
+        registers=[l1, l2, l3, l4],
+        taps=[(0, 24), (1, 30), (2, 32), (3, 38)],
+        filter=FSRFunction([0, 1, "+", 2, "+", 3, "+"]),
+        fsm=FSM(blend, inputs=[0, 1, 2, 3], state=0b0101))
+
     # generate the actual sequence
     length = 2000
-    sequence = np.ones(length) * -1
-
-    fsm = FSM()
-
-    for i in range(length):
-        l1.shift()
-        l2.shift()
-        l3.shift()
-        l4.shift()
-
-        ct_blend = fsm.blend(l1.outbit, l2.outbit, l3.outbit, l4.outbit)
-        cipherbit = np.logical_xor(l1.outbit, np.logical_xor(
-            l2.outbit, np.logical_xor(l3.outbit, np.logical_xor(l4.outbit, ct_blend))))
-        sequence[i] = cipherbit[0]
+    sequence = e0.sequence(length)
 
-    print("".join(str(s) for s in sequence.astype(int)))
+    print("".join(str(s) for s in sequence))
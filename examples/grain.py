@@ -4,8 +4,7 @@
     Python Version: 3.6
 '''
 
-import numpy as np
-from pyfsr import LFSR, NLFSR, FSRFunction
+from pyfsr import LFSR, NLFSR, FSRFunction, CompositeGenerator
 
 '''
 Test Implementation of the Grain v0 cipher:
@@ -43,39 +42,26 @@ fx = [80, 67, 57, 42, 29, 18]
 # init lfsr with the padded iv and the specified feedback polynom
 lfsr = LFSR(poly=fx, initstate=iv_bin)
 
-# the filter function
+# the filter function, masked with bi (tap 5)
 hx = FSRFunction([
     1, 4, "+", 0, 3, "*", "+", 2, 3, "*", "+", 3, 4, "*", "+", 0, 1, 2,
     "*", "*", "+", 0, 2, 3, "*", "*", "+", 0, 2, 4, "*", "*", "+", 1, 2,
-    4, "*", "*", "+", 2, 3, 4, "*", "*", "+"
+    4, "*", "*", "+", 2, 3, 4, "*", "*", "+", 5, "+"
 ])
 
-# key initialization phase
-for i in range(0, 160):
-    lfsr.shift()
-    nfsr.shift()
-    # for bi we'll choose 63, so bi+63 would result in (63+63) % 80 = 46
-    outtaps = [lfsr.state[3], lfsr.state[25],
-               lfsr.state[46], lfsr.state[64], nfsr.state[46]]
-    filter_out = hx.solve(outtaps)
-    # mask the output of the filter function with bi
-    outbit = np.logical_xor(filter_out, nfsr.state[63])
-    # feed it back to the fsrs
-    lfsr.state[0] = np.logical_xor(outbit, lfsr.feedback_bit)
-    nfsr.state[0] = np.logical_xor(
-        outbit, np.logical_xor(lfsr.outbit, nfsr.feedback_bit))
+# the taps are read before the shift, so they are one less than in the paper.
+# for bi we'll choose 63, so bi+63 would result in (63+63) % 80 = 46
+taps = [(0, 2), (0, 24), (0, 45), (0, 63), (1, 45), (1, 62),
+        (0, 79)]  # the outbit of the lfsr
+
+# the outbit of the lfsr is fed to the nfsr. in the key initialization phase
+# the output is fed back to both registers
+grain = CompositeGenerator(registers=[lfsr, nfsr], taps=taps, filter=hx,
+                           feedback={1: FSRFunction([6])},
+                           init_cycles=160, init_feedback=[0, 1])
 
 # generate the actual sequence
 length = 2000
-sequence = np.ones(length) * -1
-for i in range(0, length):
-    lfsr.shift()
-    nfsr.shift()
-    nfsr.state[0] = np.logical_xor(lfsr.outbit, nfsr.state[0])
-    # for bi we'll choose 63, so bi+63 would result in (63+63) % 80 = 46
-    outtaps = [lfsr.state[3], lfsr.state[25],
-               lfsr.state[46], lfsr.state[64], nfsr.state[46]]
-    # mask the output of the filter function with bi
-    sequence[i] = np.logical_xor(nfsr.state[63], hx.solve(outtaps))
+sequence = grain.sequence(length)
 
-print("".join(str(s) for s in sequence.astype(int)))
+print("".join(str(s) for s in sequence))
@@ -33,11 +33,9 @@ print()
 l = LFSR(poly=[9, 5, 2, 1], initstate="random")
 l.print_info()
 
-sequence = np.append([], l.shift())
-while not np.array_equal(l.state, l.initstate):
-    sequence = np.append(sequence, l.shift())
-print("Actual period:", l.cycles)
-print("\nS4:", sequence.astype(int))
+period = l.period()
+print("Actual period:", period)
+print("\nS4:", l.sequence(period))
 
 
 initstate = [0, 1, 0, 1, 1]
@@ -64,3 +62,6 @@ nl = NLFSR(initstate="ones", infunc=infunc,
 print(nl.sequence(10))
 print("\nS6:", nl.sequence(10))
 nl.print_info()
+
+tail, cycle = nl.period()
+print("Tail length:", tail, "Cycle length:", cycle)
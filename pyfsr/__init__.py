@@ -7,7 +7,11 @@
 from .lfsr import LFSR
 from .fsr_function import FSRFunction
 from .nlfsr import NLFSR
+from .bank import FSRBank
+from .clocked import ClockControlled
+from .composite import CompositeGenerator, FSM
 from .tools import logical_and, logical_xor
+from .parallel import parallel_sequence, parallel_sequences
 
 name = "pyfsr"
 version = "1.0"
@@ -0,0 +1,117 @@
+"""
+    File name: aio.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from . import stream
+
+'''
+Asyncio interface to the chunked sequence generation. The chunks are computed
+in an executor, so the event loop is never blocked by a register, and put
+into a bounded queue: the producer waits while the queue is full, so a slow
+consumer holds back the generation instead of filling the memory.
+
+    async for chunk in lfsr.aiter_chunks(2**20):
+        await writer.write(chunk.tobytes())
+
+By default the chunks are computed in the thread pool of the event loop,
+which many registers can share. A ProcessPoolExecutor avoids the GIL; the
+register is then sent to a worker process for every chunk and its state is
+copied back afterwards.
+'''
+
+if hasattr(asyncio, 'get_running_loop'):
+    _running_loop = asyncio.get_running_loop
+else:
+    # python 3.6, inside a coroutine it returns the running loop as well
+    _running_loop = asyncio.get_event_loop
+
+
+def _chunk(fsr, length, format):
+    """computes the next chunk, returns the register so that its new state
+        gets back from a worker process
+    """
+    return fsr.sequence(length, show_progress=False, format=format), fsr
+
+
+def _take_over(fsr, state):
+    if state is not fsr:
+        # the register was advanced in another process
+        for key in ('state', 'cycles', 'outbit', 'feedback_bit'):
+            setattr(fsr, key, getattr(state, key))
+
+
+async def _produce(fsr, chunk_bits, nbits, bitorder, queue, executor):
+    loop = _running_loop()
+    format = stream.PACKED_BY_BITORDER[bitorder]
+    remaining = nbits
+    try:
+        while remaining is None or remaining > 0:
+            length = chunk_bits if remaining is None else min(chunk_bits, remaining)
+            job = loop.run_in_executor(executor, _chunk, fsr, length, format)
+            try:
+                chunk, state = await asyncio.shield(job)
+            except asyncio.CancelledError:
+                # a running job can't be stopped, wait for it so that the
+                # register doesn't change after the generator was closed
+                try:
+                    _take_over(fsr, (await job)[1])
+                except Exception:
+                    # nobody consumes the error anymore
+                    pass
+                raise
+            _take_over(fsr, state)
+            await queue.put(chunk)
+            if remaining is not None:
+                remaining -= length
+        await queue.put(None)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # raised again in the consumer
+        await queue.put(e)
+
+
+async def aiter_chunks(fsr, chunk_bits, nbits=None, bitorder='big', queue_size=4, executor=None):
+    """generates the sequence of a register chunk by chunk without blocking
+        the event loop. the register is advanced by every generated chunk, up
+        to queue_size + 1 chunks ahead of the consumer. once the generator is
+        closed the register doesn't change anymore
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+        `chunk_bits` (int): bits per chunk, has to be a multiple of 8
+        `nbits` (int, optional): total number of bits. endless if not set
+        `bitorder` ('big' or 'little', optional): bit order within each byte
+        `queue_size` (int, optional): maximum number of chunks waiting for the consumer
+        `executor` (concurrent.futures.Executor, optional): computes the chunks.
+            defaults to the thread pool of the event loop
+    Yields:
+        `np.array[uint8]`: packed chunk of the sequence
+    """
+    if chunk_bits < 8 or chunk_bits % 8 != 0:
+        raise Exception("chunk_bits has to be a positive multiple of 8")
+    if queue_size < 1:
+        raise Exception("queue_size has to be >= 1")
+    if bitorder not in stream.PACKED_BY_BITORDER:
+        raise Exception("unknown bitorder:", bitorder)
+    if isinstance(executor, ProcessPoolExecutor) and fsr.instrument is not None:
+        raise Exception("instruments can't be used with a process executor")
+    queue = asyncio.Queue(maxsize=queue_size)
+    producer = asyncio.ensure_future(_produce(fsr, chunk_bits, nbits, bitorder, queue, executor))
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,118 @@
+"""
+    File name: bank.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import numpy as np
+from .fsr_function import FSRFunction
+
+
+class FSRBank():
+    """Bit-sliced bank of registers that share the feedback and output function
+        of a template register but have individual states. Every state cell is
+        stored as a row of uint64 words where bit j belongs to register j, so
+        one cycle advances all registers with a few word-wide xor / and operations.
+    Args:
+        `template` (LFSR or NLFSR): register that provides the poly, feedback
+            type, infunc and outfunc
+        `initstates` (2-D array[int]): shape (n_registers, size), one initstate per register
+        `buffer_cycles` (int, optional): number of cycles between two compactions
+            of the internal state buffer
+    """
+
+    def __init__(self, template, initstates, buffer_cycles=1024):
+        initstates = np.asarray(initstates, dtype=np.uint8)
+        if initstates.ndim != 2:
+            raise Exception("initstates have to be a 2-D array")
+        self.count, self.size = initstates.shape
+        if self.size != len(template.state):
+            raise Exception(
+                "initstates have to match the size of the template register")
+
+        self.outfunc = template.outfunc
+        self.__galois_taps = None
+        if hasattr(template, 'poly'):
+            if template.feedback == "internal":
+                self.__galois_taps = template.poly[1:]
+                self.infunc = None
+            else:
+                # an external feedback lfsr is a nlfsr with a linear infunc
+                expression = [template.poly[0] - 1]
+                for p in template.poly[1:]:
+                    expression += [p - 1, "+"]
+                self.infunc = FSRFunction(expression)
+        else:
+            self.infunc = template.infunc
+        for func in [self.infunc, self.outfunc]:
+            if func is not None and func.taps()[-1] > self.size - 1:
+                raise Exception("expression index out of bounds")
+
+        # the rows buf[head:head+size] hold the state in reversed order,
+        # new cells are appended behind them until the buffer is full
+        self.words = (self.count + 63) // 64
+        self.__buf = np.zeros((self.size + buffer_cycles, self.words), dtype=np.uint64)
+        self.__head = 0
+        padded = np.zeros((self.words * 64, self.size), dtype=np.uint8)
+        padded[:self.count] = initstates
+        packed = np.packbits(padded, axis=0, bitorder='little')
+        self.__buf[:self.size] = packed.T.copy().view('<u8')[::-1]
+        self.cycles = 0
+
+    def __view(self):
+        return self.__buf[self.__head:self.__head + self.size][::-1]
+
+    def __clock(self):
+        """computes the outbits of the current states and advances all registers
+        """
+        if self.__head + self.size == len(self.__buf):
+            self.__buf[:self.size] = self.__buf[self.__head:]
+            self.__head = 0
+        state = self.__view()
+        # copy, a single index outfunc returns a row of the buffer
+        outbits = np.array(self.outfunc.compile()(state))
+        if self.outfunc.is_constant():
+            outbits = np.full(self.words, outbits, dtype=np.uint64)
+        if self.__galois_taps is None:
+            self.__buf[self.__head + self.size] = self.infunc.compile()(state)
+            self.__head += 1
+        else:
+            self.__buf[self.__head + self.size] = state[-1]
+            self.__head += 1
+            state = self.__view()
+            for p in self.__galois_taps:
+                np.bitwise_xor(state[p], state[0], out=state[p])
+        self.cycles += 1
+        return outbits
+
+    def __unpack(self, rows):
+        """unpacks word rows of shape (k, words) to bits of shape (n_registers, k)
+        """
+        raw = np.ascontiguousarray(rows, dtype='<u8').view(np.uint8)
+        bits = np.unpackbits(raw.reshape(len(rows), -1), axis=1, bitorder='little')
+        return bits[:, :self.count].T
+
+    def shift(self):
+        """performs one cycle on every register
+        Returns:
+            `np.array[uint8]`: output bit of every register
+        """
+        return self.__unpack(np.array([self.__clock()]))[:, 0]
+
+    def sequence(self, n):
+        """generates a sequence of length n for every register
+        Args:
+            `n` (int): sequence length
+        Returns:
+            `np.array[uint8]`: shape (n_registers, n), row i is the sequence of register i
+        """
+        out = np.empty((n, self.words), dtype=np.uint64)
+        for i in range(n):
+            out[i] = self.__clock()
+        return self.__unpack(out)
+
+    @property
+    def state(self):
+        """current states as np.array[uint8] of shape (n_registers, size)
+        """
+        return self.__unpack(self.__view())
@@ -0,0 +1,123 @@
+"""
+    File name: boolean.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import numpy as np
+
+'''
+Cryptographic properties of boolean functions given by their truth table of
+length 2^n (bit j of the index is input j, see FSRFunction.truth_table).
+The Walsh spectrum and the algebraic normal form are computed with in place
+butterflies over all n inputs, O(n * 2^n) each.
+'''
+
+
+def _inputs(table):
+    n = len(table).bit_length() - 1
+    if len(table) != 1 << n:
+        raise Exception("the length of a truth table has to be a power of 2")
+    return n
+
+
+def walsh_spectrum(table):
+    """fast Walsh-Hadamard transform of (-1)^f
+    Args:
+        `table` (np.array[int]): truth table
+    Returns:
+        `np.array[int64]`: W(u) = sum((-1)^(f(x) ^ u.x)) for every u
+    """
+    n = _inputs(table)
+    spectrum = 1 - 2 * np.asarray(table, dtype=np.int64)
+    for i in range(n):
+        # x_i = 0 and x_i = 1 halves of every block of 2^(i+1) entries
+        blocks = spectrum.reshape(-1, 2, 1 << i)
+        low = blocks[:, 0, :].copy()
+        blocks[:, 0, :] += blocks[:, 1, :]
+        blocks[:, 1, :] = low - blocks[:, 1, :]
+    return spectrum
+
+
+def anf(table):
+    """Moebius transform of the truth table
+    Args:
+        `table` (np.array[int]): truth table
+    Returns:
+        `np.array[uint8]`: coefficient of every monomial, bit j of the index
+            means input j is a factor of the monomial (index 0 is the constant)
+    """
+    _inputs(table)
+    coefficients = np.array(table, dtype=np.uint8)
+    for i in range(len(coefficients).bit_length() - 1):
+        blocks = coefficients.reshape(-1, 2, 1 << i)
+        blocks[:, 1, :] ^= blocks[:, 0, :]
+    return coefficients
+
+
+def _weights(n):
+    """hamming weight of every index in range(2^n)
+    """
+    index = np.arange(1 << n, dtype=np.int64)
+    weights = np.zeros(1 << n, dtype=np.int64)
+    for i in range(n):
+        weights += (index >> i) & 1
+    return weights
+
+
+def degree(table):
+    """algebraic degree, the largest monomial of the anf. 0 for constants
+    """
+    coefficients = anf(table)
+    weights = _weights(_inputs(table))[coefficients == 1]
+    return int(weights.max()) if len(weights) > 0 else 0
+
+
+def nonlinearity(table, spectrum=None):
+    """hamming distance to the nearest affine function
+    """
+    if spectrum is None:
+        spectrum = walsh_spectrum(table)
+    return (len(table) - int(np.abs(spectrum).max())) // 2
+
+
+def is_balanced(table):
+    """True if the function is 1 for exactly half of the inputs
+    """
+    return 2 * int(np.count_nonzero(table)) == len(table)
+
+
+def correlation_immunity(table, spectrum=None):
+    """largest m such that the output is statistically independent of every
+        m inputs, i.e. W(u) = 0 for 1 <= weight(u) <= m
+    """
+    n = _inputs(table)
+    if spectrum is None:
+        spectrum = walsh_spectrum(table)
+    weights = _weights(n)[1:][spectrum[1:] != 0]
+    return int(weights.min()) - 1 if len(weights) > 0 else n
+
+
+def resiliency(table, spectrum=None):
+    """correlation immunity of a balanced function, -1 if it isn't balanced
+    """
+    if not is_balanced(table):
+        return -1
+    return correlation_immunity(table, spectrum)
+
+
+def analyze(table):
+    """all properties at once, the spectrum is only computed once
+    Returns:
+        `dict`: inputs, degree, nonlinearity, balanced,
+            correlation_immunity, resiliency
+    """
+    spectrum = walsh_spectrum(table)
+    return {
+        "inputs": _inputs(table),
+        "degree": degree(table),
+        "nonlinearity": nonlinearity(table, spectrum),
+        "balanced": is_balanced(table),
+        "correlation_immunity": correlation_immunity(table, spectrum),
+        "resiliency": resiliency(table, spectrum),
+    }
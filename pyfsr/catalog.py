@@ -0,0 +1,137 @@
+"""
+    File name: catalog.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import os
+import json
+from . import gf2
+
+'''
+Catalog of primitive trinomials x^d + x^k + 1 and pentanomials
+x^d + x^a + x^b + x^c + 1. Degrees are searched on first use and the
+results are cached in $PYFSR_CACHE_DIR/primitive_polys.json
+(defaults to ~/.cache/pyfsr), so every degree is only searched once.
+Searching a degree requires the prime factors of 2^d - 1, they are taken
+from the table in pyfsr.mersenne up to d = 256. larger degrees only work if
+the new factors are small or prime (e.g. d = 521), otherwise the search
+raises an exception.
+'''
+
+CACHE_VERSION = 1
+_catalog = None
+
+
+def cache_path():
+    """path of the catalog cache file
+    """
+    directory = os.environ.get('PYFSR_CACHE_DIR',
+                               os.path.join(os.path.expanduser('~'), '.cache', 'pyfsr'))
+    return os.path.join(directory, 'primitive_polys.json')
+
+
+def _load():
+    global _catalog
+    if _catalog is None:
+        _catalog = {}
+        try:
+            with open(cache_path(), 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                _catalog = data['degrees']
+        except (OSError, ValueError, KeyError):
+            pass
+    return _catalog
+
+
+def _save():
+    path = cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'degrees': _catalog}, f)
+        os.replace(tmp, path)
+    except OSError:
+        # the cache is an optimization only
+        pass
+
+
+def _entry(degree):
+    if degree < 2:
+        raise Exception("degree has to be >= 2")
+    return _load().setdefault(str(degree), {})
+
+
+def primitive_trinomials(degree):
+    """all primitive trinomials of a degree
+    Args:
+        `degree` (int): degree of the polynomials
+    Returns:
+        `list[int]`: all k for which x^degree + x^k + 1 is primitive
+    """
+    entry = _entry(degree)
+    if 'trinomials' not in entry:
+        entry['trinomials'] = [k for k in range(1, degree)
+                               if gf2.is_primitive((1 << degree) | (1 << k) | 1)]
+        _save()
+    return list(entry['trinomials'])
+
+
+def primitive_pentanomials(degree, count=4):
+    """the first primitive pentanomials of a degree, ordered by their
+        middle exponents (a, b, c)
+    Args:
+        `degree` (int): degree of the polynomials
+        `count` (int, optional): maximum number of pentanomials
+    Returns:
+        `list[list[int]]`: [a, b, c] for which x^degree + x^a + x^b + x^c + 1 is primitive
+    """
+    entry = _entry(degree)
+    found = entry.get('pentanomials', [])
+    if len(found) < count and not entry.get('pentanomials_complete', False):
+        found = []
+        complete = True
+        candidates = ((a, b, c) for a in range(3, degree)
+                      for b in range(2, a) for c in range(1, b))
+        for a, b, c in candidates:
+            if len(found) == count:
+                complete = False
+                break
+            if gf2.is_primitive((1 << degree) | (1 << a) | (1 << b) | (1 << c) | 1):
+                found.append([a, b, c])
+        entry['pentanomials'] = found
+        entry['pentanomials_complete'] = complete
+        _save()
+    return [list(p) for p in found[:count]]
+
+
+def maximum_length_poly(degree):
+    """feedback polynom with the fewest taps for an LFSR of maximum period
+    Args:
+        `degree` (int): size of the register
+    Returns:
+        `list[int]`: feedback polynom that can be passed to LFSR(poly=...)
+    """
+    trinomials = primitive_trinomials(degree)
+    if len(trinomials) > 0:
+        return [degree, trinomials[0]]
+    pentanomials = primitive_pentanomials(degree, 1)
+    if len(pentanomials) > 0:
+        return [degree] + pentanomials[0]
+    raise Exception("no primitive trinomial or pentanomial of degree", degree)
+
+
+def build_catalog(max_degree, min_degree=2, pentanomials=4):
+    """searches (or loads) the trinomials and pentanomials of a range of degrees
+    Args:
+        `max_degree` (int): highest degree
+        `min_degree` (int, optional): lowest degree
+        `pentanomials` (int, optional): pentanomials per degree
+    Returns:
+        `dict[int, dict]`: trinomials and pentanomials per degree
+    """
+    return {d: {'trinomials': primitive_trinomials(d),
+                'pentanomials': primitive_pentanomials(d, pentanomials)}
+            for d in range(min_degree, max_degree + 1)}
@@ -0,0 +1,187 @@
+"""
+    File name: checkpoint.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import os
+import struct
+import time
+import zlib
+from .fsr_function import FSRFunction
+from .packed import pack, unpack
+
+'''
+Compact binary snapshots of LFSRs and NLFSRs to resume long runs. All
+numbers are little endian:
+
+    magic "PYFSR", version (u8), kind (u8, 0 = LFSR, 1 = NLFSR), flags (u8,
+    bit 0 = internal feedback), size (u32), cycles (u64), outbit (i8),
+    feedback_bit (i8)
+    LFSR: number of poly terms (u16) and the terms (u32 each)
+    functions (LFSR: outfunc, NLFSR: infunc and outfunc): number of tokens
+        (u32), table_taps (u16) and the tokens (i32, -1 = "+", -2 = "*")
+    state and initstate, packed (bit i is element i) in (size + 7) // 8 bytes
+    crc32 of everything before (u32)
+
+Files are replaced atomically, so a worker that dies while saving leaves the
+previous checkpoint intact.
+'''
+
+MAGIC = b'PYFSR'
+VERSION = 1
+KIND_LFSR = 0
+KIND_NLFSR = 1
+HEADER = struct.Struct('<5sBBBIQbb')
+OPERATORS = {'+': -1, '*': -2}
+TOKENS = {-1: '+', -2: '*'}
+
+
+def _function_bytes(func):
+    tokens = [OPERATORS.get(t, t) for t in func.expression]
+    return struct.pack(f'<IH{len(tokens)}i', len(tokens), func.table_taps, *tokens)
+
+
+def _read_function(data, offset):
+    count, table_taps = struct.unpack_from('<IH', data, offset)
+    offset += 6
+    tokens = struct.unpack_from(f'<{count}i', data, offset)
+    offset += 4 * count
+    expression = [TOKENS.get(t, t) for t in tokens]
+    return FSRFunction(expression, table_taps=table_taps), offset
+
+
+def to_bytes(fsr):
+    """serializes a register with its configuration and current state
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+    Returns:
+        `bytes`: the snapshot
+    """
+    size = len(fsr.state)
+    lfsr = hasattr(fsr, 'poly')
+    flags = 1 if lfsr and fsr.feedback == "internal" else 0
+    parts = [HEADER.pack(MAGIC, VERSION, KIND_LFSR if lfsr else KIND_NLFSR, flags, size,
+                         fsr.cycles, int(fsr.outbit), int(fsr.feedback_bit))]
+    if lfsr:
+        parts.append(struct.pack(f'<H{len(fsr.poly)}I', len(fsr.poly), *fsr.poly))
+    else:
+        parts.append(_function_bytes(fsr.infunc))
+    parts.append(_function_bytes(fsr.outfunc))
+    nbytes = (size + 7) // 8
+    parts.append(pack(fsr.state).to_bytes(nbytes, 'little'))
+    parts.append(pack(fsr.initstate).to_bytes(nbytes, 'little'))
+    data = b''.join(parts)
+    return data + struct.pack('<I', zlib.crc32(data))
+
+
+def from_bytes(data):
+    """restores a register from to_bytes(), it continues at the exact cycle
+        it was saved at
+    Args:
+        `data` (bytes): the snapshot
+    Returns:
+        `LFSR or NLFSR`: the register
+    """
+    from .lfsr import LFSR
+    from .nlfsr import NLFSR
+
+    data = bytes(data)
+    if len(data) < HEADER.size + 4 or data[:len(MAGIC)] != MAGIC:
+        raise Exception("not a pyfsr checkpoint")
+    crc, = struct.unpack_from('<I', data, len(data) - 4)
+    if zlib.crc32(data[:-4]) != crc:
+        raise Exception("checkpoint corrupted: crc mismatch")
+    _, version, kind, flags, size, cycles, outbit, feedback_bit = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise Exception("unsupported checkpoint version:", version)
+    offset = HEADER.size
+    if kind == KIND_LFSR:
+        count, = struct.unpack_from('<H', data, offset)
+        poly = list(struct.unpack_from(f'<{count}I', data, offset + 2))
+        offset += 2 + 4 * count
+    elif kind == KIND_NLFSR:
+        infunc, offset = _read_function(data, offset)
+    else:
+        raise Exception("unknown register kind:", kind)
+    outfunc, offset = _read_function(data, offset)
+    nbytes = (size + 7) // 8
+    state = unpack(int.from_bytes(data[offset:offset + nbytes], 'little'), size)
+    initstate = unpack(int.from_bytes(data[offset + nbytes:offset + 2 * nbytes], 'little'), size)
+
+    if kind == KIND_LFSR:
+        feedback = "internal" if flags & 1 else "external"
+        fsr = LFSR(poly, initstate.tolist(), feedback=feedback, outfunc=outfunc)
+    else:
+        fsr = NLFSR(initstate.tolist(), infunc, outfunc=outfunc)
+    fsr.state = state.copy()
+    fsr.cycles = cycles
+    fsr.outbit = outbit
+    fsr.feedback_bit = feedback_bit
+    return fsr
+
+
+def save(fsr, path):
+    """writes a snapshot of the register to path, atomically
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+        `path` (str or path): output file
+    """
+    tmp = f'{os.fspath(path)}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(to_bytes(fsr))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load(path):
+    """reads a register saved with save()
+    Args:
+        `path` (str or path): the checkpoint file
+    Returns:
+        `LFSR or NLFSR`: the register
+    """
+    with open(path, 'rb') as f:
+        return from_bytes(f.read())
+
+
+class AutoCheckpoint():
+    """Saves a register periodically while it is streamed (see
+        LFSR.iter_chunks and LFSR.write_to). a chunk counts as done once the
+        consumer asks for the next one, so a loaded checkpoint continues at
+        the first bit that wasn't consumed yet
+    Args:
+        `path` (str or path): checkpoint file
+        `every_bits` (int, optional): save after at least this many cycles
+        `interval` (float, optional): save after at least this many seconds
+    """
+
+    def __init__(self, path, every_bits=None, interval=60.0):
+        self.path = path
+        self.every_bits = every_bits
+        self.interval = interval
+        self.saves = 0
+        self.__cycles = None
+        self.__time = None
+
+    def start(self, fsr):
+        """called when the stream starts
+        """
+        self.__cycles = fsr.cycles
+        self.__time = time.monotonic()
+
+    def update(self, fsr, force=False):
+        """called after every consumed chunk, saves if one of the limits is reached
+        """
+        if self.__cycles is None:
+            self.start(fsr)
+        due = force
+        if self.every_bits is not None and fsr.cycles - self.__cycles >= self.every_bits:
+            due = True
+        if self.interval is not None and time.monotonic() - self.__time >= self.interval:
+            due = True
+        if due:
+            save(fsr, self.path)
+            self.saves += 1
+            self.start(fsr)
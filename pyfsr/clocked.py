@@ -0,0 +1,267 @@
+"""
+    File name: clocked.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import copy
+import numpy as np
+from . import stream
+from .fsr_function import FSRFunction
+from .tools import format_sequence
+
+'''
+Clock controlled generators. A register that is clocked irregularly still
+outputs its own regular sequence, only at a different pace, so the sequences
+of all registers are generated in bulk by their word-wise engines and the
+generator only has to work out how often every register was clocked at every
+step. Except for the majority rule that is a cumulative sum.
+
+The value of a register is its outbit, i.e. the output of its last shift().
+Registers that were never shifted have the value 0.
+'''
+
+RULES = ("majority", "stop_and_go", "alternating", "shrinking", "self_shrinking")
+
+# number of registers of every rule, None for any odd number >= 3
+REGISTER_COUNT = {
+    "majority": None,
+    "stop_and_go": 2,
+    "alternating": 3,
+    "shrinking": 2,
+    "self_shrinking": 1,
+}
+
+
+def _clone(register, outfunc):
+    """copy of a register with a different output function, used to look ahead
+        without advancing the register itself
+    """
+    clone = copy.copy(register)
+    clone.state = register.state.copy()
+    clone.outfunc = outfunc
+    return clone
+
+
+def _advance(register, n):
+    """advances a register by n cycles, lfsrs jump, nlfsrs are run
+    """
+    if n <= 0:
+        return
+    if hasattr(register, 'jump'):
+        register.jump(n)
+    else:
+        stream.skip(register, n)
+
+
+class ClockControlled():
+    """Generator that combines LFSRs and NLFSRs which are clocked irregularly
+    Args:
+        `registers` (list[LFSR or NLFSR]): the registers, they are advanced
+            by the generator
+        `rule` (str): clocking rule
+            'majority': every register is clocked if its clock bit agrees with
+                the majority of all clock bits (A5/1), any odd number of registers
+            'stop_and_go': [control, data], the control register is clocked
+                every step, the data register if the control value is 1
+            'alternating': [control, r1, r2], the control register is clocked
+                every step, then r1 if the control value is 1 and r2 otherwise
+            'shrinking': [a, s], both are clocked until the value of s is 1,
+                then the value of a is output
+            'self_shrinking': [r], r is clocked twice until the first of the
+                two values is 1, then the second is output
+        `clock_taps` (list[int], optional): state index of the clock bit of
+            every register, only for the majority rule
+        `outfunc` (FSRFunction, optional): combines the register values (index
+            i is the value of register i) to the output bit. defaults to the xor
+            of all registers (majority), the data register (stop_and_go) or the
+            xor of r1 and r2 (alternating). not used by the shrinking rules
+    """
+
+    def __init__(self, registers, rule, clock_taps=None, outfunc="default"):
+        if rule not in RULES:
+            raise Exception("unknown clocking rule:", rule)
+        count = REGISTER_COUNT[rule]
+        if count is None:
+            if len(registers) < 3 or len(registers) % 2 == 0:
+                raise Exception("majority clocking needs an odd number of at least 3 registers")
+        elif len(registers) != count:
+            raise Exception(f"{rule} clocking needs {count} register(s)")
+
+        if rule == "majority":
+            if clock_taps is None or len(clock_taps) != len(registers):
+                raise Exception("majority clocking needs one clock tap per register")
+            for register, tap in zip(registers, clock_taps):
+                if tap < 0 or tap > len(register.state) - 1:
+                    raise Exception("clock tap out of bounds:", tap)
+        elif clock_taps is not None:
+            raise Exception("clock_taps are only used by majority clocking")
+
+        if outfunc == "default":
+            if rule == "majority":
+                expression = [0]
+                for i in range(1, len(registers)):
+                    expression += [i, "+"]
+                outfunc = FSRFunction(expression)
+            elif rule == "stop_and_go":
+                outfunc = FSRFunction([1])
+            elif rule == "alternating":
+                outfunc = FSRFunction([1, 2, "+"])
+            else:
+                outfunc = None
+        elif rule in ("shrinking", "self_shrinking"):
+            raise Exception("the shrinking rules don't use an outfunc")
+        elif not isinstance(outfunc, FSRFunction):
+            raise Exception("outfunc has to be an instance of FSRFunction")
+        elif outfunc.taps()[-1] > len(registers) - 1:
+            raise Exception("expression index out of bounds")
+
+        self.registers = registers
+        self.rule = rule
+        self.clock_taps = clock_taps
+        self.outfunc = outfunc
+        self.cycles = 0
+
+    def shift(self):
+        """generates one output bit
+        Returns:
+            `int`: output bit
+        """
+        return int(self.sequence(1)[0])
+
+    def sequence(self, n, format="int"):
+        """generates a pseudo random sequence of length n
+        Args:
+            `n` (int): sequence length
+            `format` (str, optional): see LFSR.sequence
+        Returns:
+            `np.array[int]`: binary sequence (or the requested format)
+        """
+        if n < 0:
+            raise Exception("sequence length has to be >= 0")
+        if self.rule == "majority":
+            seq = self.__combine(self.__majority_clocks(n))
+        elif self.rule == "stop_and_go":
+            control = self.__control_values(n)
+            seq = self.__combine([np.arange(1, n + 1), np.cumsum(control[1:])],
+                                 [control])
+        elif self.rule == "alternating":
+            control = self.__control_values(n)
+            first = np.cumsum(control[1:])
+            seq = self.__combine([np.arange(1, n + 1), first, np.arange(1, n + 1) - first],
+                                 [control])
+        else:
+            seq = self.__shrink(n)
+        self.cycles += n
+        return format_sequence(seq, format)
+
+    def __control_values(self, n):
+        """values of the control register after 0..n clocks, advances it by n
+        """
+        control = self.registers[0]
+        first = max(int(control.outbit), 0)
+        return np.concatenate(([first], control.sequence(n, show_progress=False, format="uint8")))
+
+    def __majority_clocks(self, n):
+        """clock counts of every register after every step
+        """
+        # clock bit of every register after 0..n-1 of its own clocks
+        clock_bits = [_clone(r, FSRFunction([t])).sequence(n, show_progress=False).tolist()
+                      for r, t in zip(self.registers, self.clock_taps)]
+        half = len(self.registers) // 2
+        history = []
+        if len(self.registers) == 3:
+            c1, c2, c3 = clock_bits
+            k1 = k2 = k3 = 0
+            for _ in range(n):
+                b1 = c1[k1]
+                b2 = c2[k2]
+                b3 = c3[k3]
+                vote = (b1 & b2) | (b1 & b3) | (b2 & b3)
+                k1 += b1 == vote
+                k2 += b2 == vote
+                k3 += b3 == vote
+                history.append((k1, k2, k3))
+        else:
+            ks = [0] * len(self.registers)
+            for _ in range(n):
+                bits = [c[k] for c, k in zip(clock_bits, ks)]
+                vote = int(sum(bits) > half)
+                ks = [k + (b == vote) for k, b in zip(ks, bits)]
+                history.append(tuple(ks))
+        history = np.array(history, dtype=np.intp).reshape(n, len(self.registers))
+        return list(history.T)
+
+    def __combine(self, clocks, values=None):
+        """evaluates the outfunc on the register values after `clocks[i][t]`
+            clocks of register i at step t, registers without precomputed
+            `values` are advanced to their final clock count
+        """
+        columns = []
+        for i, (register, k) in enumerate(zip(self.registers, clocks)):
+            if values is not None and i < len(values):
+                v = values[i]
+            else:
+                total = int(k[-1]) if len(k) > 0 else 0
+                first = max(int(register.outbit), 0)
+                v = np.concatenate(([first], register.sequence(
+                    total, show_progress=False, format="uint8")))
+            columns.append(v[k])
+        if len(clocks[0]) == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.asarray(self.outfunc.solve_batch(np.stack(columns, axis=1)), dtype=np.uint8)
+
+    def __shrink(self, n):
+        """shrinking and self shrinking generator, the registers are run ahead
+            on clones until enough bits are selected and advanced afterwards
+        """
+        if self.rule == "shrinking":
+            clones = [_clone(r, r.outfunc) for r in self.registers]
+        else:
+            clones = [_clone(self.registers[0], self.registers[0].outfunc)]
+        # the selecting values follow from the state of clones[-1], after more
+        # than 2^size values without a 1 its states repeat and no 1 follows
+        selector = clones[-1]
+        idle_limit = 1 << len(selector.state)
+        idle = 0
+        out = []
+        have = 0
+        clocks = 0
+        while have < n:
+            # about every second clock (pair) selects a bit
+            length = max(2 * (n - have) + 64, 1024)
+            if self.rule == "shrinking":
+                a = clones[0].sequence(length, show_progress=False, format="uint8")
+                s = clones[1].sequence(length, show_progress=False, format="uint8")
+                step = 1
+            else:
+                bits = clones[0].sequence(2 * length, show_progress=False, format="uint8")
+                a = bits[1::2]
+                s = bits[0::2]
+                step = 2
+            ones = np.flatnonzero(s)
+            idle = idle + len(s) if len(ones) == 0 else len(s) - 1 - int(ones[-1])
+            if len(ones) == 0 and (not selector.state.any() or idle > idle_limit):
+                raise Exception("the selecting sequence doesn't contain a 1 anymore")
+            selected = ones[:n - have]
+            out.append(a[selected])
+            have += len(selected)
+            if have == n and len(selected) > 0:
+                clocks += (int(selected[-1]) + 1) * step
+            else:
+                clocks += length * step
+        for register in self.registers:
+            _advance(register, clocks)
+        if len(out) == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.concatenate(out)
+
+    def __str__(self):
+        return f"ClockControlled({self.rule}, {len(self.registers)} registers)"
+
+    def print_info(self):
+        """prints the rule and the registers
+        """
+        print(f"rule: {self.rule}")
+        for register in self.registers:
+            print(str(register))
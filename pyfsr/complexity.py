@@ -0,0 +1,202 @@
+"""
+    File name: complexity.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import numpy as np
+from .lfsr import LFSR
+from .tools import parse_sequence
+
+'''
+Linear complexity with the Berlekamp-Massey algorithm. The connection
+polynomial C(x) = 1 + c1*x + ... + cL*x^L is an int (bit i is the coefficient
+of x^i, see pyfsr.gf2) and the last bits of the sequence are kept in an int
+window (bit i is s[n-i]), so the discrepancy of a step is the parity of
+C & window. The window only holds about twice the current complexity, so a
+step costs O(L) bit operations: sequences of low complexity (like the ones
+of registers) are fast, a random sequence of n bits is O(n^2 / 64).
+
+C(x) describes the recursion s[n] = c1*s[n-1] ^ ... ^ cL*s[n-L], i.e. the
+external feedback LFSR with poly [i for ci = 1].
+'''
+
+if hasattr(int, 'bit_count'):
+    def _parity(value):
+        return value.bit_count() & 1
+else:
+    def _parity(value):
+        return bin(value).count('1') & 1
+
+
+def _regenerate(head, length, c, n):
+    """int of the first n bits (bit i is s[n-1-i]) of the sequence generated
+        by the connection polynomial c of length `length` from its first bits
+        `head` (same bit order)
+    """
+    if n <= length:
+        return head >> (length - n)
+    taps = c >> 1
+    lmask = (1 << length) - 1
+    state = head
+    bits = np.empty(n - length, dtype=np.uint8)
+    for k in range(n - length):
+        bit = _parity(taps & state)
+        state = ((state << 1) | bit) & lmask
+        bits[k] = bit
+    padded = np.concatenate((np.zeros(-len(bits) % 8, dtype=np.uint8), bits))
+    return (head << (n - length)) | int.from_bytes(np.packbits(padded).tobytes(), 'big')
+
+
+class BerlekampMassey():
+    """Incremental Berlekamp-Massey, the sequence is added chunk by chunk.
+        only the window of the last bits and the first L bits (the initstate
+        of the shortest LFSR) are kept, packed into ints. older bits that a
+        larger window needs are generated again from the first L bits
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.linear_complexity = 0
+        self.connection_polynomial = 1
+        self.__previous = 1
+        self.__m = -1
+        self.__width = 64
+        self.__window = 0
+        # the first linear_complexity bits, bit i is s[L-1-i]
+        self.__head = 0
+        # bit counts at which the complexity changed and the new complexity
+        self.__jumps = [(0, 0)]
+
+    def update(self, chunk, format="int", nbits=None):
+        """adds the next part of the sequence
+        Args:
+            `chunk`: part of the sequence
+            `format` (str, optional): format of the chunk, see LFSR.sequence
+            `nbits` (int, optional): number of bits of a packed chunk
+        """
+        bits = parse_sequence(chunk, format, nbits)
+        c = self.connection_polynomial
+        b = self.__previous
+        length = self.linear_complexity
+        m = self.__m
+        n = self.n
+        width = self.__width
+        wmask = (1 << width) - 1
+        window = self.__window
+        head = self.__head
+        for bit in bits.tolist():
+            window = ((window << 1) | bit) & wmask
+            if _parity(c & window):
+                t = c
+                c ^= b << (n - m)
+                if 2 * length <= n:
+                    grown = n + 1 - length
+                    if grown < width:
+                        # s[length:grown] are in the window
+                        extension = (window >> (n + 1 - grown)) & ((1 << (grown - length)) - 1)
+                        head = (head << (grown - length)) | extension
+                    else:
+                        # the window has to cover s[n-grown] in the next steps,
+                        # the bits before it follow from the old polynomial
+                        while width <= 2 * grown:
+                            width *= 2
+                        wmask = (1 << width) - 1
+                        full = (_regenerate(head, length, t, n) << 1) | bit
+                        window = full & wmask
+                        head = full >> (n + 1 - grown)
+                    length = grown
+                    m = n
+                    b = t
+                    self.__jumps.append((n, length))
+            n += 1
+        self.connection_polynomial = c
+        self.__previous = b
+        self.linear_complexity = length
+        self.__m = m
+        self.n = n
+        self.__width = width
+        self.__window = window
+        self.__head = head
+
+    @property
+    def poly(self):
+        """exponents of the connection polynomial (without the constant 1),
+            the poly of the equivalent external feedback LFSR
+        """
+        c = self.connection_polynomial
+        return [i for i in range(c.bit_length() - 1, 0, -1) if (c >> i) & 1]
+
+    def profile(self):
+        """linear complexity profile
+        Returns:
+            `np.array[int64]`: complexity of the first k+1 bits at index k
+        """
+        positions = np.array([p for p, _ in self.__jumps], dtype=np.int64)
+        values = np.array([v for _, v in self.__jumps], dtype=np.int64)
+        index = np.searchsorted(positions, np.arange(self.n), side='right') - 1
+        return values[index]
+
+    def lfsr(self, outfunc="default"):
+        """shortest LFSR that generates the sequence
+        Args:
+            `outfunc` (FSRFunction, optional): see LFSR
+        Returns:
+            `LFSR`: external feedback register in the initial state
+        """
+        length = self.linear_complexity
+        poly = self.poly
+        if length == 0:
+            raise Exception("the sequence is all zero")
+        if len(poly) < 2 or poly[0] != length:
+            # pyfsr.LFSR needs a polynomial of degree L with at least two terms
+            raise Exception("the sequence has no LFSR of the form of pyfsr.LFSR, "
+                            "connection polynomial:", bin(self.connection_polynomial))
+        # the output is the last cell, so it starts with the reversed state
+        initstate = [(self.__head >> i) & 1 for i in range(length)]
+        return LFSR(poly, initstate, outfunc=outfunc)
+
+
+def linear_complexity(seq, format="int", nbits=None):
+    """linear complexity of a sequence
+    Args:
+        `seq`: the sequence, e.g. the result of NLFSR.sequence
+        `format` (str, optional): format of the sequence
+        `nbits` (int, optional): number of bits of a packed sequence
+    Returns:
+        `int`: length of the shortest LFSR that generates the sequence
+    """
+    engine = BerlekampMassey()
+    engine.update(seq, format, nbits)
+    return engine.linear_complexity
+
+
+def complexity_profile(seq, format="int", nbits=None):
+    """linear complexity of every prefix of a sequence
+    Returns:
+        `np.array[int64]`: complexity of the first k+1 bits at index k
+    """
+    engine = BerlekampMassey()
+    engine.update(seq, format, nbits)
+    return engine.profile()
+
+
+def shortest_lfsr(seq, format="int", nbits=None):
+    """shortest LFSR that generates the sequence
+    Returns:
+        `LFSR`: register with poly and initstate that reproduce the sequence
+    """
+    engine = BerlekampMassey()
+    engine.update(seq, format, nbits)
+    return engine.lfsr()
+
+
+def linear_complexity_stream(chunks, format="packed"):
+    """Berlekamp-Massey over a chunked stream, e.g. LFSR.iter_chunks
+    Returns:
+        `BerlekampMassey`: the engine with complexity, profile and lfsr
+    """
+    engine = BerlekampMassey()
+    for chunk in chunks:
+        engine.update(chunk, format)
+    return engine
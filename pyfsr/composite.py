@@ -0,0 +1,344 @@
+"""
+    File name: composite.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import copy
+import numpy as np
+from .fsr_function import FSRFunction
+from .packed import pack, unpack
+from .tools import format_sequence
+
+'''
+Combination and filter generators (E0, Grain, ...) built from several
+registers, a filter function over taps of all registers, an optional small
+finite state machine and cross register feedback.
+
+Every cycle reads the states before the shift:
+    z   = filter(taps) ^ fsm output
+    fb  = infunc(own state) ^ feedback(taps) [^ z during the initialization]
+and then shifts fb into every register. The registers run on packed states
+and advance as many cycles at once as their taps allow (see
+FSRFunction.compile_packed), the output is then computed from the state
+histories with numpy.
+'''
+
+
+def _block_words(bits, width):
+    """splits bits into words of width bits (the last one can be shorter),
+        bit w-1-j of a word is the j-th bit of its block
+    """
+    full = len(bits) // width
+    padded = np.zeros((full, 64), dtype=np.uint8)
+    padded[:, 64 - width:] = bits[:full * width].reshape(full, width)
+    words = np.packbits(padded, axis=1).view('>u8').reshape(-1).tolist()
+    rest = bits[full * width:].tolist()
+    if len(rest) > 0:
+        words.append(int(''.join(str(b) for b in rest), 2))
+    return words
+
+
+def _unpack_words(words, width, n):
+    """inverse of _block_words
+    """
+    full = n // width
+    block = np.array(words[:full], dtype='>u8')
+    bits = np.unpackbits(block.view(np.uint8)).reshape(full, 64)[:, 64 - width:]
+    rest = n - full * width
+    last = words[full] if rest > 0 else 0
+    tail = np.array([(last >> (rest - 1 - j)) & 1 for j in range(rest)], dtype=np.uint8)
+    return np.concatenate((bits.reshape(-1), tail))
+
+
+class FSM():
+    """Small finite state machine (e.g. the summation combiner of E0), the
+        transitions are tabulated on demand
+    Args:
+        `transition` (function(int, int) -> (int, int)): maps the fsm state and
+            the input (bit j is the value of input tap j) to the next state and
+            the output bit
+        `inputs` (list[int]): indices into the taps of the generator
+        `state` (int, optional): initial state
+    """
+
+    def __init__(self, transition, inputs, state=0):
+        self.transition = transition
+        self.inputs = list(inputs)
+        self.state = state
+        self.initstate = state
+        self.__table = {}
+
+    def step(self, value):
+        """performs one transition
+        Args:
+            `value` (int): input, bit j is the value of input tap j
+        Returns:
+            `int`: output bit
+        """
+        key = (self.state, value)
+        if key not in self.__table:
+            self.__table[key] = self.transition(self.state, value)
+        self.state, out = self.__table[key]
+        return out
+
+    def run(self, values):
+        """performs a transition for every input
+        Args:
+            `values` (np.array[int]): inputs
+        Returns:
+            `np.array[uint8]`: output bits
+        """
+        table = self.__table
+        state = self.state
+        out = []
+        for value in values.tolist():
+            key = (state, value)
+            if key not in table:
+                table[key] = self.transition(state, value)
+            state, bit = table[key]
+            out.append(bit)
+        self.state = state
+        return np.array(out, dtype=np.uint8)
+
+    def reset(self):
+        """resets the state
+        """
+        self.state = self.initstate
+
+
+class CompositeGenerator():
+    """Generator that runs several registers together
+    Args:
+        `registers` (list[LFSR or NLFSR]): the registers, lfsrs need external
+            feedback. they are advanced by the generator
+        `taps` (list[(int, int)]): (register, state index) pairs that are read
+            by the filter, the fsm and the feedback functions
+        `filter` (FSRFunction): output function, index j is the value of taps[j]
+        `feedback` (dict[int, FSRFunction], optional): functions over the taps
+            that are xored into the feedback bit of a register
+        `fsm` (FSM, optional): its output is xored into the output bit
+        `init_cycles` (int, optional): cycles of the initialization phase that
+            is run at construction, the output is not returned but xored into
+            the feedback of the `init_feedback` registers
+        `init_feedback` (list[int], optional): registers the output is fed back
+            to during the initialization phase
+    """
+
+    def __init__(self, registers, taps, filter, feedback=None, fsm=None,
+                 init_cycles=0, init_feedback=()):
+        self.registers = registers
+        self.taps = [tuple(t) for t in taps]
+        self.filter = filter
+        self.feedback = dict(feedback) if feedback is not None else {}
+        self.fsm = fsm
+        self.init_feedback = list(init_feedback)
+        self.cycles = 0
+
+        self.__infuncs = []
+        for register in registers:
+            if hasattr(register, 'poly'):
+                if register.feedback != "external":
+                    raise Exception("composite generators need external feedback lfsrs")
+                # an external feedback lfsr is a nlfsr with a linear infunc
+                expression = [register.poly[0] - 1]
+                for p in register.poly[1:]:
+                    expression += [p - 1, "+"]
+                self.__infuncs.append(FSRFunction(expression))
+            else:
+                self.__infuncs.append(register.infunc)
+        self.__check()
+
+        if init_cycles > 0:
+            if len(self.init_feedback) > 0:
+                self.__run(init_cycles, True)
+            else:
+                # the output is only needed to advance the fsm
+                self.sequence(init_cycles)
+            self.cycles = 0
+
+    def __check(self):
+        for i, index in self.taps:
+            if i < 0 or i > len(self.registers) - 1:
+                raise Exception("tap of an unknown register:", i)
+            if index < 0 or index > len(self.registers[i].state) - 1:
+                raise Exception("tap index out of bounds:", index)
+        if not isinstance(self.filter, FSRFunction):
+            raise Exception("filter has to be an instance of FSRFunction")
+        functions = [self.filter] + list(self.feedback.values())
+        for func in functions:
+            if func.taps()[-1] > len(self.taps) - 1:
+                raise Exception("expression index out of bounds")
+        for i in list(self.feedback) + self.init_feedback:
+            if i < 0 or i > len(self.registers) - 1:
+                raise Exception("feedback into an unknown register:", i)
+        if self.fsm is not None and max(self.fsm.inputs, default=0) > len(self.taps) - 1:
+            raise Exception("fsm input out of bounds")
+
+    def __coupled(self, init):
+        """registers whose feedback depends on other registers or the output
+        """
+        coupled = set(self.feedback)
+        if init:
+            coupled.update(self.init_feedback)
+        return sorted(coupled)
+
+    def __width(self, coupled, init):
+        """largest number of cycles whose feedback bits only depend on the
+            states before them
+        Returns:
+            `(int, set[int])`: number of cycles and the taps the feedback reads
+        """
+        width = 64
+        for i in coupled:
+            width = min(width, self.__infuncs[i].taps()[0] + 1)
+        used = set()
+        for func in self.feedback.values():
+            used.update(func.taps())
+        if init and len(self.init_feedback) > 0:
+            used.update(self.filter.taps())
+            if self.fsm is not None:
+                used.update(self.fsm.inputs)
+        for j in used:
+            i, index = self.taps[j]
+            if i in coupled:
+                width = min(width, index + 1)
+        return width, used
+
+    def __run(self, n, init):
+        """runs n cycles. registers without feedback from other registers use
+            their own sequence engines, the others are run together
+        Returns:
+            `list[np.array[uint8]]`: history x of every register with
+                x[k] = state[L-1-k] for k < L and x[L+t] = feedback bit of cycle t
+        """
+        coupled = self.__coupled(init)
+        histories = [None] * len(self.registers)
+        for i, register in enumerate(self.registers):
+            if i not in coupled:
+                histories[i] = self.__run_single(register, n)
+        if len(coupled) > 0:
+            self.__run_coupled(n, init, coupled, histories)
+        self.cycles += n
+        return histories
+
+    def __run_single(self, register, n):
+        """runs a copy of the register whose outfunc reads the last cell, that
+            sequence is the history
+        """
+        size = len(register.state)
+        runner = copy.copy(register)
+        runner.state = register.state.copy()
+        runner.outfunc = FSRFunction([size - 1])
+        seq = runner.sequence(n, show_progress=False, format="uint8")
+        history = np.concatenate((seq, runner.state[::-1])).astype(np.uint8)
+        self.__finish(register, history, n)
+        return history
+
+    def __run_coupled(self, n, init, coupled, histories):
+        """runs the coupled registers on packed states, as many cycles at
+            once as their taps allow
+        """
+        width, used = self.__width(coupled, init)
+        masks = {i: (1 << len(self.registers[i].state)) - 1 for i in coupled}
+        states = {i: pack(self.registers[i].state) for i in coupled}
+        # the taps of the other registers are known in advance
+        known = {}
+        for j in used:
+            i, index = self.taps[j]
+            if i not in coupled:
+                start = len(self.registers[i].state) - 1 - index
+                known[j] = _block_words(histories[i][start:start + n], width)
+        feedback = [(i, f.compile()) for i, f in self.feedback.items()]
+        init_feedback = self.init_feedback if init else []
+        filter_func = self.filter.compile()
+        words = {i: [] for i in coupled}
+        done = 0
+        block = 0
+        while done < n:
+            w = min(width, n - done)
+            wmask = (1 << w) - 1
+            # tap words, bit w-1-j is the tap value in cycle j
+            tapwords = [0] * len(self.taps)
+            for j in used:
+                i, index = self.taps[j]
+                if j in known:
+                    tapwords[j] = known[j][block]
+                else:
+                    tapwords[j] = (states[i] >> (index - w + 1)) & wmask
+            fbs = {i: self.__infuncs[i].compile_packed(w)(states[i]) for i in coupled}
+            for i, func in feedback:
+                fbs[i] ^= func(tapwords) & wmask
+            if len(init_feedback) > 0:
+                z = filter_func(tapwords) & wmask
+                if self.fsm is not None:
+                    for j in range(w):
+                        value = 0
+                        for b, k in enumerate(self.fsm.inputs):
+                            value |= ((tapwords[k] >> (w - 1 - j)) & 1) << b
+                        z ^= self.fsm.step(value) << (w - 1 - j)
+                for i in init_feedback:
+                    fbs[i] ^= z
+            for i in coupled:
+                states[i] = ((states[i] << w) | fbs[i]) & masks[i]
+                words[i].append(fbs[i])
+            done += w
+            block += 1
+
+        for i in coupled:
+            register = self.registers[i]
+            histories[i] = np.concatenate((register.state[::-1],
+                                           _unpack_words(words[i], width, n))).astype(np.uint8)
+            self.__finish(register, histories[i], n)
+
+    def __finish(self, register, history, n):
+        """sets state, outbit, feedback_bit and cycles of a register that was
+            advanced by n cycles
+        """
+        if n <= 0:
+            return
+        size = len(register.state)
+        register.state = history[n:n + size][::-1].copy()
+        register.outbit = register.outfunc.solve(history[n - 1:n - 1 + size][::-1].copy())
+        register.feedback_bit = history[-1]
+        register.cycles += n
+
+    def shift(self):
+        """performs one cycle
+        Returns:
+            `int`: output bit
+        """
+        return int(self.sequence(1)[0])
+
+    def sequence(self, n, format="int"):
+        """generates a pseudo random sequence of length n
+        Args:
+            `n` (int): sequence length
+            `format` (str, optional): see LFSR.sequence
+        Returns:
+            `np.array[int]`: binary sequence (or the requested format)
+        """
+        sizes = [len(r.state) for r in self.registers]
+        histories = self.__run(n, False)
+        columns = np.empty((n, len(self.taps)), dtype=np.uint8)
+        for j, (i, index) in enumerate(self.taps):
+            start = sizes[i] - 1 - index
+            columns[:, j] = histories[i][start:start + n]
+        seq = np.asarray(self.filter.solve_batch(columns), dtype=np.uint8)
+        if self.fsm is not None:
+            values = np.zeros(n, dtype=np.int64)
+            for b, k in enumerate(self.fsm.inputs):
+                values |= columns[:, k].astype(np.int64) << b
+            seq = seq ^ self.fsm.run(values)
+        return format_sequence(seq, format)
+
+    def __str__(self):
+        return f"CompositeGenerator({len(self.registers)} registers, {len(self.taps)} taps)"
+
+    def print_info(self):
+        """prints the registers and the taps
+        """
+        for register in self.registers:
+            print(str(register))
+        print("taps:", self.taps)
+        print("filter:", str(self.filter))
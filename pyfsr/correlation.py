@@ -0,0 +1,186 @@
+"""
+    File name: correlation.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import numpy as np
+from .tools import parse_sequence
+
+'''
+Auto- and cross-correlation of binary sequences with the fft. The bits are
+mapped to +1 (bit 0) and -1 (bit 1), so the correlation at lag t is
+
+    C(t) = sum(x[i] * y[i + t])
+
+the number of agreements minus the number of disagreements. Sequences can
+be batched (one sequence per row, e.g. FSRBank.sequence), long sequences
+are correlated block by block and correlate_chunks works on iterables of
+chunks like LFSR.iter_chunks.
+'''
+
+# sequences longer than this are correlated block by block
+BLOCK_BITS = 2**20
+
+
+def to_signs(seq, format="int", nbits=None):
+    """maps a binary sequence (or a 2-D array with one sequence per row) to +1 / -1
+    Args:
+        `seq`: the sequence
+        `format` (str, optional): format of the sequence, see LFSR.sequence
+        `nbits` (int, optional): number of bits of a packed sequence
+    Returns:
+        `np.array[float]`: 1 - 2 * bits
+    """
+    if format in ("int", "uint8", "bool"):
+        bits = np.asarray(seq)
+    else:
+        bits = parse_sequence(seq, format, nbits)
+    return 1.0 - 2.0 * bits.astype(np.float64)
+
+
+def _fft_size(n):
+    return 1 << max(n - 1, 1).bit_length()
+
+
+def _lagged(x, y, max_lag):
+    """sum(x[i] * y[i + t]) for t in 0..max_lag, y may be longer than x.
+        lags without overlap are 0
+    """
+    # the circular correlation only wraps into lags 0..max_lag if the fft
+    # is shorter than this
+    size = _fft_size(max(x.shape[-1] + max_lag, y.shape[-1]))
+    spectrum = np.conj(np.fft.rfft(x, size)) * np.fft.rfft(y, size)
+    return np.fft.irfft(spectrum, size)[..., :max_lag + 1]
+
+
+def _blocked(x, y, max_lag, block):
+    """like _lagged for equally long x and y, block by block
+    """
+    n = x.shape[-1]
+    # block plus overlap fits into an fft of the block size
+    step = block - max_lag if 2 * max_lag < block else block
+    result = 0
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        result = result + _lagged(x[..., start:stop], y[..., start:stop + max_lag], max_lag)
+    return result
+
+
+def _round(values):
+    return np.rint(values).astype(np.int64)
+
+
+def cross_correlation(a, b, max_lag=None, cyclic=False, block=BLOCK_BITS):
+    """cross-correlation C(t) = sum(a[i] * b[i + t]) of two sequences
+    Args:
+        `a`, `b` (np.array[int]): binary sequences of the same length, or 2-D
+            arrays with one sequence per row (a row of a can be correlated
+            with all rows of b and the other way around)
+        `max_lag` (int, optional): largest lag. defaults to the sequence length - 1
+        `cyclic` (bool, optional): periodic correlation, i.e. b[(i + t) % n]
+        `block` (int, optional): block size for long sequences
+    Returns:
+        `np.array[int]`: C(t) for t = -max_lag..max_lag at index max_lag + t
+            (t = 0..max_lag if cyclic)
+    """
+    x = to_signs(a)
+    y = to_signs(b)
+    n = x.shape[-1]
+    if y.shape[-1] != n:
+        raise Exception("the sequences have to be of the same length")
+    if max_lag is None:
+        max_lag = n - 1
+    if max_lag < 0 or max_lag > n - 1:
+        raise Exception("max_lag has to be in range [0, n-1]")
+    if cyclic:
+        spectrum = np.conj(np.fft.rfft(x)) * np.fft.rfft(y)
+        return _round(np.fft.irfft(spectrum, n)[..., :max_lag + 1])
+    if n > block and max_lag < block:
+        positive = _blocked(x, y, max_lag, block)
+        negative = _blocked(y, x, max_lag, block)
+    else:
+        positive = _lagged(x, y, max_lag)
+        negative = _lagged(y, x, max_lag)
+    return _round(np.concatenate((negative[..., :0:-1], positive), axis=-1))
+
+
+def autocorrelation(seq, max_lag=None, cyclic=False, block=BLOCK_BITS):
+    """autocorrelation C(t) = sum(x[i] * x[i + t]) of a sequence
+    Args:
+        `seq` (np.array[int]): binary sequence or 2-D array with one sequence per row
+        `max_lag` (int, optional): largest lag. defaults to the sequence length - 1
+        `cyclic` (bool, optional): periodic autocorrelation, i.e. x[(i + t) % n],
+            which is -1 for all lags t != 0 of an m-sequence over its period
+        `block` (int, optional): block size for long sequences
+    Returns:
+        `np.array[int]`: C(t) for t = 0..max_lag
+    """
+    x = to_signs(seq)
+    n = x.shape[-1]
+    if max_lag is None:
+        max_lag = n - 1
+    if max_lag < 0 or max_lag > n - 1:
+        raise Exception("max_lag has to be in range [0, n-1]")
+    if cyclic:
+        spectrum = np.abs(np.fft.rfft(x)) ** 2
+        return _round(np.fft.irfft(spectrum, n)[..., :max_lag + 1])
+    if n > block and max_lag < block:
+        return _round(_blocked(x, x, max_lag, block))
+    return _round(_lagged(x, x, max_lag))
+
+
+def correlate_chunks(chunks_a, chunks_b=None, max_lag=1024, format="packed", nbits=None):
+    """correlation of two long sequences that are given chunk by chunk
+        (overlap-add), e.g. LFSR.iter_chunks. every chunk is held until the
+        next one arrived, so only two chunks per sequence are in memory
+    Args:
+        `chunks_a` (iterable): chunks of the first sequence
+        `chunks_b` (iterable, optional): chunks of the second sequence, of the
+            same lengths as those of chunks_a. autocorrelation if not set
+        `max_lag` (int, optional): largest lag, at most the chunk length
+        `format` (str, optional): format of the chunks
+        `nbits` (int, optional): total number of bits. required if the packed
+            sequences end within a byte, the padding bits of the last chunk
+            are dropped
+    Returns:
+        `np.array[int]`: autocorrelation C(t) for t = 0..max_lag, or the
+            cross-correlation for t = -max_lag..max_lag at index max_lag + t
+    """
+    auto = chunks_b is None
+    if auto:
+        pairs = ((chunk, None) for chunk in chunks_a)
+    else:
+        pairs = zip(chunks_a, chunks_b)
+    positive = negative = 0
+    previous = None
+    remaining = nbits
+    for chunk_a, chunk_b in pairs:
+        if remaining is not None and remaining <= 0:
+            raise Exception("the chunks are longer than nbits")
+        x = to_signs(chunk_a, format)[..., :remaining]
+        y = x if auto else to_signs(chunk_b, format)[..., :remaining]
+        if x.shape[-1] != y.shape[-1]:
+            raise Exception("the chunks have to be of the same length")
+        if remaining is not None:
+            remaining -= x.shape[-1]
+        if previous is not None:
+            px, py = previous
+            if px.shape[-1] < max_lag:
+                raise Exception("the chunks have to be at least max_lag long")
+            # the previous chunk overlaps the first max_lag values of this one
+            ahead_y = np.concatenate((py, y[..., :max_lag]), axis=-1)
+            positive = positive + _lagged(px, ahead_y, max_lag)
+            if not auto:
+                ahead_x = np.concatenate((px, x[..., :max_lag]), axis=-1)
+                negative = negative + _lagged(py, ahead_x, max_lag)
+        previous = (x, y)
+    if previous is not None:
+        px, py = previous
+        positive = positive + _lagged(px, py, max_lag)
+        if not auto:
+            negative = negative + _lagged(py, px, max_lag)
+    positive = _round(positive)
+    if auto:
+        return positive
+    return np.concatenate((_round(negative)[..., :0:-1], positive), axis=-1)
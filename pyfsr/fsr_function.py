@@ -4,7 +4,14 @@
     Python Version: 3.6
 """
 
-from .tools import logical_and, logical_xor
+import numpy as np
+from . import boolean
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:
+    def _popcount(value):
+        return bin(value).count('1')
 
 
 class FSRFunction():
@@ -13,9 +20,11 @@ class FSRFunction():
         expression (list[int or str]): list of state indices and operators 
             of the function in reverse polish notation
             supported operators: "+" (xor), "*" (and)
+        table_taps (int, optional): functions with at most this many distinct
+            state indices are solved by a lookup in their precomputed truth table
     """
 
-    def __init__(self, expression):
+    def __init__(self, expression, table_taps=8):
         self.expression = []
         operands_count = 0
         operators_count = 0
@@ -33,6 +42,13 @@ class FSRFunction():
         if operands_count - operators_count != 1:
             raise Exception("expression invalid:", expression)
         self.__checked = False
+        self.__compiled = None
+        self.__compiled_packed = {}
+        self.__compiled_table = None
+        self.__solver = None
+        self.__table = None
+        self.__dag = None
+        self.table_taps = table_taps
 
     def __check(self, fsr_size):
         for token in self.expression:
@@ -41,6 +57,330 @@ class FSRFunction():
                     raise Exception("expression index out of bounds")
         self.__checked = True
 
+    def taps(self):
+        """returns the distinct state indices used by the expression
+        Returns:
+            `list[int]`: sorted state indices
+        """
+        return sorted(set(t for t in self.expression if isinstance(t, int)))
+
+    def __getstate__(self):
+        # generated functions can't be pickled, they are rebuilt on demand
+        state = self.__dict__.copy()
+        state['_FSRFunction__compiled'] = None
+        state['_FSRFunction__compiled_packed'] = {}
+        state['_FSRFunction__compiled_table'] = None
+        state['_FSRFunction__solver'] = None
+        # attached counters stay in the process they belong to
+        state.pop('solve', None)
+        state.pop('solve_batch', None)
+        state.pop('evaluated', None)
+        return state
+
+    def attach(self, instrument):
+        """reports every solve() call to instrument.solved, solve_batch()
+            counts one call per state and the word-wise engines of the registers
+            one call per clock (see evaluated()). the counting wrappers replace
+            the methods of this instance, so unattached functions have no overhead
+        Args:
+            `instrument` (pyfsr.instrument.Instrument): e.g. Metrics()
+        """
+        self.detach()
+        solve = self.solve
+        solve_batch = self.solve_batch
+
+        def counted_solve(fsr_state):
+            instrument.solved(1)
+            return solve(fsr_state)
+
+        def counted_solve_batch(states):
+            result = solve_batch(states)
+            instrument.solved(len(result))
+            return result
+
+        self.solve = counted_solve
+        self.solve_batch = counted_solve_batch
+        self.evaluated = instrument.solved
+
+    def detach(self):
+        """removes the counting wrappers of attach()
+        """
+        self.__dict__.pop('solve', None)
+        self.__dict__.pop('solve_batch', None)
+        self.__dict__.pop('evaluated', None)
+
+    def evaluated(self, calls):
+        """called by engines that evaluate the compiled function for many
+            clocks at once, `calls` is the number of clocks. does nothing
+            unless an instrument is attached
+        """
+
+    def __combine(self, op, children, graph):
+        """adds the n-ary node op(children) to the graph. nested nodes of the
+            same operator are flattened, duplicates cancel (xor) or merge (and)
+            and constants are folded
+        Returns:
+            `int`: id of the node that computes the result
+        """
+        nodes, ids = graph
+
+        def node(key):
+            if key not in ids:
+                ids[key] = len(nodes)
+                nodes.append(key)
+            return ids[key]
+
+        terms = []
+        for child in children:
+            if nodes[child][0] == op:
+                terms.extend(nodes[child][1])
+            else:
+                terms.append(child)
+        constant = 0 if op == '+' else 1
+        args = set()
+        for term in terms:
+            if nodes[term][0] == 'const':
+                if op == '+':
+                    constant ^= nodes[term][1]
+                else:
+                    constant &= nodes[term][1]
+            elif op == '+':
+                # x ^ x = 0
+                args ^= {term}
+            else:
+                # x & x = x
+                args.add(term)
+        if op == '*' and constant == 0:
+            return node(('const', 0))
+        if op == '+' and constant == 1:
+            args.add(node(('const', 1)))
+        if len(args) == 0:
+            return node(('const', constant))
+        if len(args) == 1:
+            return args.pop()
+        return node((op, tuple(sorted(args))))
+
+    def __graph(self):
+        """parses the expression into a dag of n-ary xor / and nodes where
+            every subexpression exists once. nodes are created after their
+            children, so the list is in evaluation order
+        Returns:
+            `(list[tuple], int)`: nodes ('var', index), ('const', value) or
+                (operator, child ids) and the id of the result
+        """
+        if self.__dag is None:
+            graph = ([], {})
+            nodes, ids = graph
+            stack = []
+            for token in self.expression:
+                if isinstance(token, int):
+                    key = ('var', token)
+                    if key not in ids:
+                        ids[key] = len(nodes)
+                        nodes.append(key)
+                    stack.append(ids[key])
+                else:
+                    if len(stack) < 2:
+                        raise Exception(
+                            "function expression invalid: not enough values on the stack to perform operation")
+                    val1 = stack.pop()
+                    val2 = stack.pop()
+                    stack.append(self.__combine(token, [val2, val1], graph))
+            if not len(stack) == 1:
+                raise Exception(
+                    "output function expression invalid: too many values are left on the stack")
+            self.__dag = (nodes, stack.pop())
+        return self.__dag
+
+    def __generate(self, operand, result, one='1', parity=False):
+        """generates the source of a function `solve(s)` from the optimized
+            expression graph
+        Args:
+            operand (function): returns the source of a state index operand
+            result (str): format string for the returned value
+            one (str, optional): source of the constant 1
+            parity (bool, optional): evaluate xors of 3 or more state indices
+                as the parity of s & mask (only for packed states of width 1)
+        """
+        nodes, root = self.__graph()
+        # only the nodes the result depends on, counting their uses
+        uses = {root: 1}
+        for i in range(root, -1, -1):
+            if i in uses and nodes[i][0] in ('+', '*'):
+                for child in nodes[i][1]:
+                    uses[child] = uses.get(child, 0) + 1
+
+        names = {}
+        lines = []
+        products = []
+        for i in sorted(uses):
+            op, args = nodes[i]
+            if op == 'var':
+                names[i] = operand(args)
+                if uses[i] > 1 and not names[i].startswith('s['):
+                    lines.append(f'    v{i} = {names[i]}')
+                    names[i] = f'v{i}'
+                continue
+            if op == 'const':
+                names[i] = one if args else '0'
+                continue
+            terms = list(args)
+            parts = []
+            if op == '*':
+                # reuse the largest product of a subset of the factors
+                for factors, name in sorted(products, key=lambda p: -len(p[0])):
+                    if factors < set(terms):
+                        parts.append(name)
+                        terms = [t for t in terms if t not in factors]
+                        break
+                products.append((set(args), f'v{i}'))
+            elif parity:
+                variables = [t for t in terms if nodes[t][0] == 'var']
+                if len(variables) >= 3:
+                    mask = sum(1 << nodes[t][1] for t in variables)
+                    parts.append(f'(C(s & {mask}) & 1)')
+                    terms = [t for t in terms if t not in variables]
+            parts += [names[t] for t in terms]
+            lines.append(f'    v{i} = ' + (' ^ ' if op == '+' else ' & ').join(parts))
+            names[i] = f'v{i}'
+        lines.append('    return ' + result.format(names[root]))
+
+        source = 'def solve(s):\n' + '\n'.join(lines)
+        namespace = {'C': _popcount}
+        exec(source, namespace)
+        return namespace['solve']
+
+    def is_constant(self):
+        """True if the expression cancels out to a constant, e.g. [0, 0, "+"]
+        """
+        nodes, root = self.__graph()
+        return nodes[root][0] == 'const'
+
+    def compile(self):
+        """turns the expression into a generated python function that takes
+            the fsr state and returns the result of the expression.
+            the function is cached on the instance
+        Returns:
+            `function`: compiled expression
+        """
+        if self.__compiled is None:
+            self.__compiled = self.__generate(lambda t: f's[{t}]', '{}')
+        return self.__compiled
+
+    def compile_packed(self, width=1):
+        """like compile(), but the generated function takes a packed state
+            (int where bit i is state[i]). with width k it solves the function
+            for the states of k consecutive shifts at once: bit k-1-j of the
+            result is the result after j shifts. that's only valid if no tap
+            is smaller than k-1. the function is cached on the instance
+        Args:
+            width (int, optional): number of consecutive shifts
+        Returns:
+            `function`: compiled expression
+        """
+        if width not in self.__compiled_packed:
+            if width < 1 or self.taps()[0] < width - 1:
+                raise Exception("taps too small for the width", width)
+            # tap t after j shifts is bit t-j of the unshifted state, so
+            # bit width-1-j of (s >> (t-width+1)) belongs to shift j
+            mask = (1 << width) - 1
+            self.__compiled_packed[width] = self.__generate(
+                lambda t: f'(s >> {t - width + 1})', '{} & ' + str(mask),
+                one=str(mask), parity=width == 1)
+        return self.__compiled_packed[width]
+
+    def truth_table(self):
+        """evaluates the function for every combination of its taps.
+            bit j of the table index is the value of the state index taps()[j]
+        Returns:
+            `np.array[uint8]`: truth table of length 2^len(taps())
+        """
+        if self.__table is None:
+            index = np.arange(1 << len(self.taps()), dtype=np.uint32)
+            columns = {t: ((index >> j) & 1).astype(np.uint8)
+                       for j, t in enumerate(self.taps())}
+            table = np.array(self.compile()(columns), dtype=np.uint8)
+            # constant functions return a scalar
+            self.__table = np.broadcast_to(table, index.shape).copy()
+        return self.__table
+
+    def walsh_spectrum(self):
+        """Walsh spectrum over the truth table, see pyfsr.boolean.walsh_spectrum
+        Returns:
+            `np.array[int64]`: W(u), bit j of u belongs to the state index taps()[j]
+        """
+        return boolean.walsh_spectrum(self.truth_table())
+
+    def anf(self):
+        """algebraic normal form of the function
+            e.g.: FSRFunction([0, 1, "*", 0, "+"]).anf() => [(0,), (0, 1)]
+        Returns:
+            `list[tuple[int]]`: monomials as tuples of state indices,
+                () is the constant 1
+        """
+        taps = self.taps()
+        coefficients = boolean.anf(self.truth_table())
+        monomials = [tuple(t for j, t in enumerate(taps) if (m >> j) & 1)
+                     for m in np.flatnonzero(coefficients).tolist()]
+        return sorted(monomials, key=lambda m: (len(m), m))
+
+    def degree(self):
+        """algebraic degree of the function
+        """
+        return boolean.degree(self.truth_table())
+
+    def nonlinearity(self):
+        """distance to the nearest affine function of the taps
+        """
+        return boolean.nonlinearity(self.truth_table())
+
+    def is_balanced(self):
+        """True if the function is 1 for half of the tap combinations
+        """
+        return boolean.is_balanced(self.truth_table())
+
+    def correlation_immunity(self):
+        """correlation immunity order over the taps
+        """
+        return boolean.correlation_immunity(self.truth_table())
+
+    def resiliency(self):
+        """resiliency order over the taps, -1 if the function isn't balanced
+        """
+        return boolean.resiliency(self.truth_table())
+
+    def analyze(self):
+        """degree, nonlinearity, balancedness, correlation immunity and
+            resiliency at once, see pyfsr.boolean.analyze
+        Returns:
+            `dict`: the properties
+        """
+        return boolean.analyze(self.truth_table())
+
+    def uses_table(self):
+        """True if solve() looks the result up in the truth table
+        """
+        return len(self.expression) > 1 and len(self.taps()) <= self.table_taps
+
+    def compile_table(self):
+        """generates a function that gathers the taps of the state into a
+            truth table index and returns the table entry.
+            the function is cached on the instance
+        Returns:
+            `function`: table lookup
+        """
+        if self.__compiled_table is None:
+            bits = []
+            for j, t in enumerate(self.taps()):
+                # numpy uint8 elements can't be shifted beyond 7 bits
+                operand = f's[{t}]' if j < 8 else f'int(s[{t}])'
+                bits.append(operand if j == 0 else f'({operand} << {j})')
+            source = f'def solve(s):\n    return T[{" | ".join(bits)}]'
+            namespace = {'T': tuple(self.truth_table().tolist())}
+            exec(source, namespace)
+            self.__compiled_table = namespace['solve']
+        return self.__compiled_table
+
     def __str__(self):
         out = []
         for e in self.expression:
@@ -63,26 +403,34 @@ class FSRFunction():
         if not self.__checked:
             self.__check(len(fsr_state))
 
-        stack = []
-        for token in self.expression:
-            if isinstance(token, int):
-                # the token is an index of the state --> push the operand on the stack
-                stack.append(fsr_state[token])
-            else:
-                # the token is an operator
-                if len(stack) < 2:
-                    raise Exception(
-                        "function expression invalid: not enough values on the stack to perform operation")
-                val1 = stack.pop()
-                val2 = stack.pop()
-                if token == '+':  # (xor)
-                    stack.append(logical_xor(val1, val2, True) * 1)
-                else:  # '*' (and) operator
-                    stack.append(logical_and(val1, val2, True) * 1)
-
-        if not len(stack) == 1:
-            # this should actually never be the case, since we make sure that
-            # the number of operators == number of operands - 1
-            raise Exception(
-                "output function expression invalid: too many values are left on the stack")
-        return stack.pop()
+        if self.__solver is None:
+            self.__solver = self.compile_table() if self.uses_table() else self.compile()
+        return self.__solver(fsr_state)
+
+    def solve_batch(self, states):
+        """solves the function for many states at once
+        Args:
+            states (np.array): 2-D array of shape (n_states, fsr_size)
+            ! Expects the states to consist of only bools or ints in range [0,1]
+        Returns:
+            np.array: result for every state (row)
+        """
+        states = np.asarray(states)
+        if states.ndim != 2:
+            raise Exception("states have to be a 2-D array")
+        self.__check(states.shape[1])
+        if self.uses_table():
+            # gather the taps of all states into table indices
+            index = np.zeros(len(states), dtype=np.intp)
+            for j, t in enumerate(self.taps()):
+                index |= states[:, t].astype(np.intp) << j
+            return self.truth_table()[index]
+        # the compiled function indexes the state, on the transposed matrix
+        # that selects whole columns which are then xored / anded at once
+        result = self.compile()(states.T)
+        if self.is_constant():
+            return np.full(len(states), result, dtype=states.dtype)
+        if np.shares_memory(result, states):
+            # the expression is a single state index
+            result = result.copy()
+        return result
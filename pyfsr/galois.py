@@ -0,0 +1,141 @@
+"""
+    File name: galois.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import functools
+import numpy as np
+from .packed import pack, unpack
+
+'''
+Galois (internal feedback) registers on packed states, where bit i of the
+int is state[i]. One cycle shifts the state up by one bit and xors the
+feedback mask into it if the last cell was set. Like a CRC engine, w cycles
+can be done at once with a table indexed by the w highest cells.
+'''
+
+
+def feedback_mask(poly):
+    """mask that is xored into the shifted state when the feedback bit is set.
+        duplicate taps cancel each other out, like in LFSR.shift()
+    """
+    mask = 1
+    for p in poly[1:]:
+        mask ^= 1 << p
+    return mask
+
+
+def step(state, size, mask):
+    """performs one cycle on a packed state
+    Returns:
+        `(int, int)`: new state and output bit
+    """
+    out = state >> (size - 1)
+    state = (state << 1) & ((1 << size) - 1)
+    if out:
+        state ^= mask
+    return state, out
+
+
+@functools.lru_cache(maxsize=16)
+def step_table(size, mask, width):
+    """precomputes `width` cycles for every value of the highest `width` cells
+    Args:
+        `size` (int): size of the register, >= width
+        `mask` (int): feedback mask, see feedback_mask
+        `width` (int): cycles per step, e.g. 8 or 16
+    Returns:
+        `(list[int], list[int])`: value that is xored into the shifted state and
+            the `width` output bits (output of the first cycle at the top bit)
+    """
+    xors = [0] * (1 << width)
+    outs = [0] * (1 << width)
+    # the cycles are linear, single bits are simulated and the rest is combined
+    for j in range(width):
+        state = 1 << (size - width + j)
+        out = 0
+        for _ in range(width):
+            state, bit = step(state, size, mask)
+            out = (out << 1) | bit
+        xors[1 << j] = state
+        outs[1 << j] = out
+    for v in range(3, 1 << width):
+        low = v & -v
+        if v != low:
+            xors[v] = xors[v ^ low] ^ xors[low]
+            outs[v] = outs[v ^ low] ^ outs[low]
+    return xors, outs
+
+
+def run(state, size, mask, n, width=8):
+    """performs n cycles on a packed state, width cycles per table lookup
+    Returns:
+        `(int, np.array[uint8])`: new state and the n output bits
+    """
+    width = min(width, size)
+    if width > 16:
+        raise Exception("at most 16 cycles per table lookup")
+    xors, outs = step_table(size, mask, width)
+    full = (1 << size) - 1
+    low = (1 << (size - width)) - 1
+    shift = size - width
+    steps = n // width
+    words = np.empty(steps, dtype=np.uint8 if width <= 8 else np.uint16)
+    for i in range(steps):
+        top = state >> shift
+        words[i] = outs[top]
+        state = ((state & low) << width) ^ xors[top]
+    bits = np.unpackbits(words.astype('>u%d' % words.itemsize).view(np.uint8))
+    bits = bits.reshape(steps, words.itemsize * 8)[:, words.itemsize * 8 - width:].reshape(-1)
+    rest = []
+    for _ in range(n - steps * width):
+        state, out = step(state, size, mask)
+        rest.append(out)
+    return state & full, np.concatenate((bits, np.array(rest, dtype=np.uint8)))
+
+
+def fibonacci_to_galois(poly, state):
+    """converts an external feedback register into an internal feedback register
+        with the same output sequence (default output function)
+    Args:
+        `poly` (list[int]): feedback polynom of the external feedback register
+        `state` (list[int]): state of the external feedback register
+    Returns:
+        `(list[int], np.array[uint8])`: poly and state of the internal feedback register
+    """
+    size = max(poly)
+    taps = set()
+    for p in poly:
+        taps ^= {p}
+    if size not in taps:
+        raise Exception("the poly has to contain its degree an odd number of times")
+    taps = sorted([size - p for p in taps if p != size], reverse=True)
+    # the next outputs of the external register are its reversed state,
+    # the internal state is solved from them cell by cell
+    outputs = list(state)[::-1]
+    galois = []
+    for i in range(size):
+        bit = outputs[size - 1 - i]
+        for p in taps:
+            if p > i:
+                bit ^= outputs[p - i - 1]
+        galois.append(bit)
+    return [size] + taps, np.array(galois, dtype=np.uint8)
+
+
+def galois_to_fibonacci(poly, state):
+    """converts an internal feedback register into an external feedback register
+        with the same output sequence (default output function)
+    Args:
+        `poly` (list[int]): feedback polynom of the internal feedback register
+        `state` (list[int]): state of the internal feedback register
+    Returns:
+        `(list[int], np.array[uint8])`: poly and state of the external feedback register
+    """
+    size = max(poly)
+    taps = set()
+    for p in poly[1:]:
+        taps ^= {p}
+    _, outputs = run(pack(state), size, feedback_mask(poly), size)
+    return [size] + sorted([size - p for p in taps], reverse=True), outputs[::-1].copy()
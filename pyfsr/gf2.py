@@ -0,0 +1,429 @@
+"""
+    File name: gf2.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import math
+import random
+import functools
+from . import mersenne
+
+'''
+Arithmetic with polynomials over GF(2). A polynomial is represented by an
+int where bit i is the coefficient of x^i, e.g. x^3 + x + 1 => 0b1011.
+'''
+
+
+def degree(a):
+    """degree of a polynomial. the zero polynomial has degree -1
+    """
+    return a.bit_length() - 1
+
+
+def mul(a, b):
+    """multiplies two polynomials, 4 bits of the smaller factor at a time
+    """
+    if a < b:
+        a, b = b, a
+    # multiples of a by all polynomials of degree < 4
+    table = [0] * 16
+    for i in range(1, 16):
+        low = i & -i
+        table[i] = table[i ^ low] ^ (a << (low.bit_length() - 1))
+    result = 0
+    shift = 0
+    while b:
+        result ^= table[b & 15] << shift
+        b >>= 4
+        shift += 4
+    return result
+
+
+def square(a):
+    """squares a polynomial. in GF(2) that only spreads the coefficients
+        e.g.: square(0b1011) => 0b1000101
+    """
+    if a == 0:
+        return 0
+    return int('0'.join(bin(a)[2:]), 2)
+
+
+@functools.lru_cache(maxsize=64)
+def _reduction_table(m):
+    """multiples q * m for every polynomial q of degree < 8, indexed by
+        the 8 coefficients above the degree of m
+    """
+    dm = degree(m)
+    table = [0] * 256
+    for v in range(256):
+        r = 0
+        for i in range(7, -1, -1):
+            if ((v ^ (r >> dm)) >> i) & 1:
+                r ^= m << i
+        table[v] = r
+    return table
+
+
+def mod(a, m):
+    """remainder of the polynomial division a / m, 8 bits at a time
+    """
+    if m == 0:
+        raise Exception("polynomial division by zero")
+    dm = degree(m)
+    da = degree(a)
+    if da - dm < 8:
+        while da >= dm:
+            a ^= m << (da - dm)
+            da = degree(a)
+        return a
+    table = _reduction_table(m)
+    while da >= dm:
+        shift = max(da - dm - 7, 0)
+        a ^= table[(a >> (dm + shift)) & 255] << shift
+        da = degree(a)
+    return a
+
+
+def mulmod(a, b, m):
+    """multiplies two polynomials modulo m
+    """
+    return mod(mul(a, b), m)
+
+
+def powmod(a, e, m):
+    """computes a^e modulo m by square and multiply
+    """
+    result = mod(1, m)
+    a = mod(a, m)
+    while e > 0:
+        if e & 1:
+            result = mulmod(result, a, m)
+        a = mod(square(a), m)
+        e >>= 1
+    return result
+
+
+def divide(a, m):
+    """quotient and remainder of the polynomial division a / m
+    """
+    if m == 0:
+        raise Exception("polynomial division by zero")
+    q = 0
+    dm = degree(m)
+    da = degree(a)
+    while da >= dm:
+        q ^= 1 << (da - dm)
+        a ^= m << (da - dm)
+        da = degree(a)
+    return q, a
+
+
+def gcd(a, b):
+    """greatest common divisor of two polynomials
+    """
+    while b:
+        a, b = b, mod(a, b)
+    return a
+
+
+def derivative(a):
+    """formal derivative of a polynomial. only odd powers survive in GF(2)
+    """
+    return (a >> 1) & int('01' * ((degree(a) + 2) // 2), 2) if a > 1 else 0
+
+
+def sqrt(a):
+    """square root of a polynomial that is a square (only even powers)
+    """
+    result = 0
+    i = 0
+    while a:
+        if a & 1:
+            result |= 1 << i
+        a >>= 2
+        i += 1
+    return result
+
+
+def _squarefree(f):
+    """square free factorization
+    Returns:
+        `list[(int, int)]`: square free polynomials and their multiplicities
+    """
+    result = []
+    c = gcd(f, derivative(f))
+    w = divide(f, c)[0]
+    i = 1
+    while w != 1:
+        y = gcd(w, c)
+        z = divide(w, y)[0]
+        if z != 1:
+            result.append((z, i))
+        i += 1
+        w = y
+        c = divide(c, y)[0]
+    if c != 1:
+        result += [(g, 2 * e) for g, e in _squarefree(sqrt(c))]
+    return result
+
+
+def _distinct_degree(f):
+    """splits a square free polynomial into products of irreducible
+        polynomials of the same degree
+    Returns:
+        `list[(int, int)]`: products and the degree of their factors
+    """
+    result = []
+    h = 0b10
+    d = 1
+    while degree(f) >= 2 * d:
+        h = mulmod(h, h, f)
+        g = gcd(f, h ^ 0b10)
+        if g != 1:
+            result.append((g, d))
+            f = divide(f, g)[0]
+            h = mod(h, f)
+        d += 1
+    if f != 1:
+        result.append((f, degree(f)))
+    return result
+
+
+def _equal_degree(f, d, rng):
+    """splits a product of irreducible polynomials of degree d (Cantor-Zassenhaus)
+    """
+    if degree(f) == d:
+        return [f]
+    while True:
+        a = rng.getrandbits(degree(f)) | 2
+        # the trace a + a^2 + a^4 + ... + a^(2^(d-1)) is 0 or 1 modulo
+        # every factor, so its gcd with f is a proper factor half the time
+        t = a
+        power = a
+        for _ in range(d - 1):
+            power = mulmod(power, power, f)
+            t ^= power
+        g = gcd(f, t)
+        if g != 1 and g != f:
+            return _equal_degree(g, d, rng) + _equal_degree(divide(f, g)[0], d, rng)
+
+
+def factor(f):
+    """factors a polynomial into irreducible polynomials
+    Returns:
+        `dict[int, int]`: irreducible factors and their multiplicities
+    """
+    if f == 0:
+        raise Exception("can't factor the zero polynomial")
+    rng = random.Random(f)
+    factors = {}
+    for g, e in _squarefree(f):
+        for h, d in _distinct_degree(g):
+            for p in _equal_degree(h, d, rng):
+                factors[p] = factors.get(p, 0) + e
+    return factors
+
+
+def _is_probable_prime(n):
+    """Miller-Rabin test, deterministic for n < 3.3 * 10^24
+    """
+    if n < 2:
+        return False
+    small = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+    for p in small:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in small:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_brent(n, limit=None):
+    """finds a non trivial factor of a composite n
+    Args:
+        `limit` (int, optional): maximum number of iterations
+    Returns:
+        `int`: the factor, None if none was found within the limit
+    """
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+    iterations = 0
+    while limit is None or iterations < limit:
+        y = rng.randrange(1, n)
+        c = rng.randrange(1, n)
+        m = 128
+        g = r = q = 1
+        while g == 1:
+            if limit is not None and iterations >= limit:
+                return None
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            iterations += 2 * r
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+    return None
+
+
+def factor_integer(n, limit=None):
+    """factors a positive integer
+    Args:
+        `limit` (int, optional): maximum number of pollard rho iterations per
+            factor, an exception is raised if a factor isn't found within it
+    Returns:
+        `dict[int, int]`: prime factors and their multiplicities
+    """
+    factors = {}
+    for p in [2, 3, 5, 7, 11, 13]:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if _is_probable_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = _pollard_brent(m, limit)
+            if d is None:
+                raise Exception("no factor found within the iteration limit:", m)
+            stack += [d, m // d]
+    return factors
+
+
+# pollard rho iterations for a factor of 2^k - 1 beyond the table, finds
+# factors up to about 2^36 within a few seconds
+RHO_LIMIT = 2**18
+
+# exponents d for which 2^d - 1 is prime
+MERSENNE_EXPONENTS = (2, 3, 5, 7, 13, 17, 19, 31, 61, 89, 107, 127, 521, 607,
+                      1279, 2203, 2281, 3217, 4253, 4423, 9689, 9941, 11213,
+                      19937, 21701, 23209, 44497)
+
+
+@functools.lru_cache(maxsize=None)
+def _mersenne_factors(d):
+    """prime factors of 2^d - 1, split along the cyclotomic factors 2^k - 1.
+        the primes of the factors up to mersenne.MAX_DEGREE come from the
+        table, larger ones are factored with a bounded pollard rho, which
+        raises an exception if it doesn't succeed
+    """
+    if d in MERSENNE_EXPONENTS:
+        return {(1 << d) - 1: 1}
+    factors = {}
+    remaining = (1 << d) - 1
+    for k in range(1, d + 1):
+        if d % k != 0:
+            continue
+        if k in mersenne.PRIMITIVE_FACTORS:
+            primes = mersenne.PRIMITIVE_FACTORS[k]
+        else:
+            # gcd with the part that wasn't factored yet gives the new factors
+            # of 2^k - 1, which keeps the numbers passed to pollard rho small.
+            # rho only finds small factors in reasonable time, it is bounded
+            # so that unknown factorizations fail instead of running forever
+            part = math.gcd(remaining, (1 << k) - 1)
+            try:
+                primes = factor_integer(part, RHO_LIMIT)
+            except Exception:
+                raise Exception(f"the prime factors of 2^{d} - 1 are unknown, pyfsr.mersenne "
+                                f"covers degrees up to {mersenne.MAX_DEGREE}") from None
+        for p in primes:
+            while remaining % p == 0:
+                remaining //= p
+                factors[p] = factors.get(p, 0) + 1
+    return factors
+
+
+def order_irreducible(p):
+    """multiplicative order of x modulo an irreducible polynomial p != x
+    """
+    d = degree(p)
+    order = (1 << d) - 1
+    for q in _mersenne_factors(d):
+        while order % q == 0 and powmod(0b10, order // q, p) == 1:
+            order //= q
+    return order
+
+
+def order(f):
+    """multiplicative order of x modulo f, i.e. the smallest n > 0 with
+        x^n = 1 mod f. f must not be divisible by x
+    """
+    if f & 1 == 0:
+        raise Exception("x is not invertible modulo the polynomial")
+    result = 1
+    for p, e in factor(f).items():
+        # the order modulo p^e is the order modulo p times 2^ceil(log2(e))
+        o = order_irreducible(p) << (e - 1).bit_length()
+        result = result * o // math.gcd(result, o)
+    return result
+
+
+def is_irreducible(f):
+    """Rabin's irreducibility test
+    """
+    n = degree(f)
+    if n < 1:
+        return False
+    if n == 1:
+        return True
+    if f & 1 == 0:
+        return False
+    # x^(2^n) = x mod f, and x^(2^(n/q)) - x is coprime to f for every
+    # prime q dividing n
+    powers = {}
+    h = 0b10
+    for i in range(1, n + 1):
+        h = mod(square(h), f)
+        powers[i] = h
+    if powers[n] != 0b10:
+        return False
+    for q in factor_integer(n):
+        if gcd(f, powers[n // q] ^ 0b10) != 1:
+            return False
+    return True
+
+
+def is_primitive(f):
+    """tests if f is a primitive polynomial, i.e. irreducible and x generates
+        the multiplicative group of GF(2^deg(f)). an lfsr with a primitive
+        characteristic polynomial has the maximum period 2^deg(f) - 1
+    """
+    if f == 0b10 or not is_irreducible(f):
+        return False
+    n = degree(f)
+    order = (1 << n) - 1
+    for q in _mersenne_factors(n):
+        if powmod(0b10, order // q, f) == 1:
+            return False
+    return True
@@ -0,0 +1,147 @@
+"""
+    File name: instrument.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import time
+
+'''
+Progress and metrics hooks. Registers report the clocks they performed in
+batches (every BATCH_CLOCKS cycles for the shift engines, once per call for
+the word-wise engines) and functions report their solve() calls (one per
+clock for the word-wise engines), but only if an instrument is attached, so
+there is no per bit cost by default.
+'''
+
+# number of cycles between two updates of the shift engines
+BATCH_CLOCKS = 4096
+
+
+class Instrument():
+    """Base class of all instruments, every hook is a no-op
+    """
+
+    def start(self, total=None, desc=''):
+        """called when a sequence of `total` clocks is started
+        """
+
+    def update(self, clocks):
+        """called with the number of clocks performed since the last update
+        """
+
+    def solved(self, calls):
+        """called with the number of FSRFunction solves (see FSRFunction.attach)
+        """
+
+    def close(self):
+        """called when the sequence is finished
+        """
+
+
+class Forward(Instrument):
+    """Forwards updates but not start / close to another instrument.
+        used when a sequence is generated in several parts
+    """
+
+    def __init__(self, instrument):
+        self.instrument = instrument
+
+    def update(self, clocks):
+        self.instrument.update(clocks)
+
+    def solved(self, calls):
+        self.instrument.solved(calls)
+
+
+class Metrics(Instrument):
+    """Counts clocks, solve calls (evaluations of the attached functions, one
+        per clock and function in every engine) and the time spent in sequences
+    Args:
+        `callback` (function(Metrics), optional): called on updates, at most
+            once per `interval` seconds, and when a sequence is finished
+        `interval` (float, optional): minimum seconds between two callbacks
+    """
+
+    def __init__(self, callback=None, interval=1.0):
+        self.callback = callback
+        self.interval = interval
+        self.clocks = 0
+        self.solve_calls = 0
+        self.elapsed = 0.0
+        self.__started = None
+        self.__last_callback = 0.0
+
+    def start(self, total=None, desc=''):
+        self.__started = time.perf_counter()
+        self.__last_callback = self.__started
+
+    def update(self, clocks):
+        self.clocks += clocks
+        if self.callback is not None:
+            now = time.perf_counter()
+            if now - self.__last_callback >= self.interval:
+                self.__last_callback = now
+                self.callback(self)
+
+    def solved(self, calls):
+        self.solve_calls += calls
+
+    def close(self):
+        if self.__started is not None:
+            self.elapsed += time.perf_counter() - self.__started
+            self.__started = None
+        if self.callback is not None:
+            self.callback(self)
+
+    @property
+    def bits_per_sec(self):
+        """clocks per second spent in finished and running sequences
+        """
+        elapsed = self.elapsed
+        if self.__started is not None:
+            elapsed += time.perf_counter() - self.__started
+        return self.clocks / elapsed if elapsed > 0 else 0.0
+
+
+class TqdmProgress(Instrument):
+    """Progress bar adapter, tqdm is only imported when a sequence starts
+    Args:
+        kwargs are passed on to tqdm
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.bar = None
+
+    def start(self, total=None, desc=''):
+        from tqdm import tqdm
+        kwargs = {'ascii': True, 'desc': desc}
+        kwargs.update(self.kwargs)
+        self.bar = tqdm(total=total, **kwargs)
+
+    def update(self, clocks):
+        if self.bar is not None:
+            self.bar.update(clocks)
+
+    def close(self):
+        if self.bar is not None:
+            self.bar.close()
+            self.bar = None
+
+
+# shared no-op instrument
+NULL = Instrument()
+
+
+def select(instrument, show_progress, attached):
+    """picks the instrument of a sequence call: the one passed to the call,
+        a progress bar if show_progress is set, the attached one or NULL
+    """
+    if instrument is not None:
+        return instrument
+    if show_progress:
+        return TqdmProgress()
+    if attached is not None:
+        return attached
+    return NULL
@@ -5,9 +5,17 @@
 """
 
 import numpy as np
-from tqdm import tqdm
 from .fsr_function import FSRFunction
-from .tools import roll, logical_xor
+from . import stream
+from . import aio
+from . import checkpoint as ckpt
+from . import random_access
+from .tools import roll, logical_xor, format_sequence, PACKED_FORMATS
+from .packed import linear_recurrence, pack, unpack, parity
+from . import gf2
+from . import galois
+from .parallel import parallel_sequence
+from . import instrument as instr
 
 
 class LFSR():
@@ -23,6 +31,11 @@ class LFSR():
             the outbit. defaults to FSRFuction([np.max(poly)-1])
     """
 
+    # instrument that is used by sequence() if none is passed, see attach()
+    instrument = None
+    # state index that is used by read(), see build_index()
+    index = None
+
     def __init__(self, poly, initstate, initcycles=-1, feedback="external", outfunc="default"):
         if isinstance(initstate, list):
             self.initstate = np.array(initstate)
@@ -49,7 +62,7 @@ class LFSR():
         self.poly = poly
 
         # set the current state to the initstate
-        self.state = self.initstate.astype(int)
+        self.state = self.initstate.astype(np.uint8)
 
         # initialize the output and feedback bits
         self.outbit = -1
@@ -75,9 +88,9 @@ class LFSR():
         # if initcycles are set, we want to shift the register
         # n times in order to hide the initstate from the out sequence
         if initcycles > 0:
-            self.sequence(initcycles, show_progress=False)
+            self.jump(initcycles)
             self.cycles = 0
-            self.initstate = self.state  # set the actual initstate
+            self.initstate = self.state.copy()  # set the actual initstate
 
     def __check(self):
         if len(self.poly) < 2:
@@ -122,21 +135,401 @@ class LFSR():
         self.cycles += 1
         return self.outbit
 
-    def sequence(self, n, show_progress=True):
+    def sequence(self, n, show_progress=False, engine="auto", format="int", table_bits=8,
+                 instrument=None):
         """generates a pseudo random sequence of length n
         Args:
             `n` (int): sequence length
+            `show_progress` (bool, optional): shows a tqdm progress bar
+            `engine` ('auto', 'packed' or 'shift', optional): 'packed' computes
+                the sequence word-wise from the linear recurrence and evaluates
+                the output function on whole state columns, 'shift' calls
+                shift() once per bit, 'table' performs table_bits cycles per
+                lookup in a precomputed table of the galois form of the register
+                (default output function only). 'auto' uses 'packed'
+            `format` (str, optional): 'int' (np.array[int]), 'uint8', 'bool',
+                'packed' / 'packed_msb' (np.packbits, msb first), 'packed_lsb',
+                'bytes' (msb first) or 'pyint' (python int, bit i is the i-th bit)
+            `table_bits` (int, optional): cycles per lookup of the 'table'
+                engine (at most 16), the table has 2^table_bits entries
+            `instrument` (pyfsr.instrument.Instrument, optional): receives the
+                clocks of this call. defaults to the attached instrument
+        Returns:
+           `np.array[int]`: binary sequence (or the requested format)
+        """
+        if engine not in ("auto", "packed", "shift", "table"):
+            raise Exception("unknown engine:", engine)
+        instrument = instr.select(instrument, show_progress, self.instrument)
+        instrument.start(n, f'Generating {n} bit sequence')
+        try:
+            if format in PACKED_FORMATS and n > stream.SEQUENCE_CHUNK_BITS:
+                # only hold the packed result and a single unpacked chunk
+                return stream.packed_sequence(self, n, format, engine=engine,
+                                              table_bits=table_bits,
+                                              instrument=instr.Forward(instrument))
+            if engine in ("auto", "packed"):
+                seq = self.__packed_sequence(n)
+                self.outfunc.evaluated(n)
+                instrument.update(n)
+            elif engine == "table":
+                seq = self.__table_sequence(n, table_bits)
+                self.outfunc.evaluated(n)
+                instrument.update(n)
+            else:
+                seq = np.empty(n, dtype=np.uint8)
+                # the instrument is updated in batches, not per bit
+                for start in range(0, n, instr.BATCH_CLOCKS):
+                    stop = min(start + instr.BATCH_CLOCKS, n)
+                    for i in range(start, stop):
+                        seq[i] = self.shift()
+                    instrument.update(stop - start)
+            return format_sequence(seq, format)
+        finally:
+            instrument.close()
+
+    def attach(self, instrument):
+        """attaches an instrument that is used by all following sequence calls
+        Args:
+            `instrument` (pyfsr.instrument.Instrument): e.g. Metrics() or TqdmProgress()
+        """
+        self.instrument = instrument
+
+    def detach(self):
+        """removes the attached instrument
+        """
+        self.__dict__.pop('instrument', None)
+
+    def __getstate__(self):
+        # instruments (progress bars, callbacks) stay in the process they belong to
+        state = self.__dict__.copy()
+        state.pop('instrument', None)
+        # indices can be large or memory-mapped, they aren't sent to workers
+        state.pop('index', None)
+        return state
+
+    def iter_chunks(self, chunk_bits, nbits=None, bitorder='big', instrument=None,
+                    checkpoint=None):
+        """generates the sequence chunk by chunk with constant memory,
+            see pyfsr.stream.iter_chunks
+        Args:
+            `chunk_bits` (int): bits per chunk, has to be a multiple of 8
+            `nbits` (int, optional): total number of bits. endless if not set
+            `bitorder` ('big' or 'little', optional): bit order within each byte
+            `instrument` (pyfsr.instrument.Instrument, optional): receives the clocks
+            `checkpoint` (pyfsr.checkpoint.AutoCheckpoint, optional): saves the
+                register periodically
+        Yields:
+            `np.array[uint8]`: packed chunk of the sequence
+        """
+        return stream.iter_chunks(self, chunk_bits, nbits, bitorder, instrument, checkpoint)
+
+    def aiter_chunks(self, chunk_bits, nbits=None, bitorder='big', queue_size=4, executor=None):
+        """asynchronous iter_chunks, the chunks are computed in an executor
+            and buffered in a bounded queue, see pyfsr.aio.aiter_chunks
+        Args:
+            `chunk_bits` (int): bits per chunk, has to be a multiple of 8
+            `nbits` (int, optional): total number of bits. endless if not set
+            `bitorder` ('big' or 'little', optional): bit order within each byte
+            `queue_size` (int, optional): maximum number of chunks waiting for the consumer
+            `executor` (concurrent.futures.Executor, optional): thread or process
+                pool. defaults to the thread pool of the event loop
+        Yields:
+            `np.array[uint8]`: packed chunk of the sequence
+        """
+        return aio.aiter_chunks(self, chunk_bits, nbits, bitorder, queue_size, executor)
+
+    def write_to(self, target, nbits, chunk_bits=2**23, bitorder='big', instrument=None,
+                 checkpoint=None):
+        """writes nbits of the sequence in packed form to a path, binary file
+            object or writable buffer (e.g. np.memmap), see pyfsr.stream.write_to
+        Args:
+            `target` (str, path, file object or buffer): output
+            `nbits` (int): number of bits
+            `chunk_bits` (int, optional): bits generated at once, multiple of 8
+            `bitorder` ('big' or 'little', optional): bit order within each byte
+            `instrument` (pyfsr.instrument.Instrument, optional): receives the clocks
+            `checkpoint` (pyfsr.checkpoint.AutoCheckpoint, optional): saves the
+                register periodically
+        Returns:
+            `int`: number of bytes written
+        """
+        return stream.write_to(self, target, nbits, chunk_bits, bitorder, instrument,
+                               checkpoint)
+
+    def to_bytes(self):
+        """compact binary snapshot of the configuration and the current state,
+            see pyfsr.checkpoint.from_bytes
+        Returns:
+            `bytes`: the snapshot
+        """
+        return ckpt.to_bytes(self)
+
+    def build_index(self, interval, nbits, path=None):
+        """records the state every interval clocks of the first nbits of the
+            sequence (from the initstate) for read(), see
+            pyfsr.random_access.StateIndex.build
+        Args:
+            `interval` (int): clocks between two states
+            `nbits` (int): length of the indexed part of the sequence
+            `path` (str or path, optional): memory-mapped sidecar file
+        Returns:
+            `StateIndex`: the index, it is also used by the following reads
+        """
+        self.index = random_access.StateIndex.build(self, interval, nbits, path)
+        return self.index
+
+    def read(self, offset, length, format="int"):
+        """reads bits [offset, offset + length) of the sequence from the
+            initstate without changing the register, from the nearest state of
+            the index if one was built or opened (see build_index)
+        Args:
+            `offset` (int): position of the first bit
+            `length` (int): number of bits
+            `format` (str, optional): see sequence()
+        Returns:
+            `np.array[int]`: the bits (or the requested format)
+        """
+        return random_access.read(self, offset, length, format, self.index)
+
+    def save(self, path):
+        """saves a snapshot to path (atomically), see pyfsr.checkpoint.load
+        Args:
+            `path` (str or path): output file
+        """
+        ckpt.save(self, path)
+
+    def parallel_sequence(self, n, workers=None):
+        """generates the same sequence as sequence(n) with a process pool,
+            see pyfsr.parallel.parallel_sequence
+        Args:
+            `n` (int): sequence length
+            `workers` (int, optional): number of processes. defaults to the cpu count
         Returns:
            `np.array[int]`: binary sequence
         """
-        seq = np.ones(n)
-        if show_progress:
-            for i in tqdm(range(n), ascii=True, desc=f'Generating {n} bit sequence'):
-                seq[i] = self.shift()
+        return parallel_sequence(self, n, workers)
+
+    def __delays(self):
+        """delays of the linear recurrence that the base sequence satisfies.
+            duplicate taps cancel each other out
+        """
+        delays = set()
+        if self.__internal_feedback:
+            taps = [len(self.state)] + \
+                [len(self.state) - p for p in self.poly[1:]]
         else:
-            for i in range(n):
-                seq[i] = self.shift()
-        return seq.astype(int)
+            taps = self.poly
+        for d in taps:
+            delays ^= {d}
+        return delays
+
+    def __base_sequence(self, n):
+        """computes the first n bits of the base sequence. for external feedback
+            that's the sequence of bits entering the register (preceded by the
+            reversed state), for internal feedback the sequence of the last cell
+        """
+        size = len(self.state)
+        if self.__internal_feedback:
+            seed = []
+            state = self.state.tolist()
+            for _ in range(size):
+                fb = state[-1]
+                seed.append(fb)
+                state = [fb] + state[:-1]
+                for p in self.poly[1:]:
+                    state[p] ^= fb
+        else:
+            seed = self.state[::-1].tolist()
+        return linear_recurrence(self.__delays(), seed, n)
+
+    def __state_column(self, base, i, start, count):
+        """returns the bit at state index i for the cycles [start, start+count)
+            computed from the base sequence
+        """
+        size = len(self.state)
+        offset = start + size - 1 - i
+        column = base[offset:offset + count].copy()
+        if self.__internal_feedback:
+            for p in self.poly[1:]:
+                if p > i:
+                    offset = start + p - i - 1
+                    column ^= base[offset:offset + count]
+        return column
+
+    def __table_sequence(self, n, width):
+        size = len(self.state)
+        if self.outfunc.expression != [size - 1]:
+            raise Exception(
+                "the table engine requires the default output function")
+        if n <= 0:
+            return np.zeros(0, dtype=np.uint8)
+        if self.__internal_feedback:
+            poly, state = self.poly, self.state
+        else:
+            poly, state = galois.fibonacci_to_galois(self.poly, self.state)
+        state, seq = galois.run(pack(state), size, galois.feedback_mask(poly), n, width)
+        if self.__internal_feedback:
+            self.state = unpack(state, size)
+            self.feedback_bit = seq[-1]
+        else:
+            self.state = galois.galois_to_fibonacci(poly, unpack(state, size))[1]
+            self.feedback_bit = self.state[0]
+        self.outbit = seq[-1]
+        self.cycles += n
+        return seq
+
+    def to_galois(self):
+        """creates the internal feedback register that generates the same
+            sequence from now on (default output function only)
+        Returns:
+            `LFSR`: internal feedback register
+        """
+        if self.outfunc.expression != [len(self.state) - 1]:
+            raise Exception("the conversion requires the default output function")
+        if self.__internal_feedback:
+            return LFSR(poly=list(self.poly), initstate=self.state.tolist(),
+                        feedback="internal")
+        poly, state = galois.fibonacci_to_galois(self.poly, self.state)
+        return LFSR(poly=poly, initstate=state.tolist(), feedback="internal")
+
+    def to_fibonacci(self):
+        """creates the external feedback register that generates the same
+            sequence from now on (default output function only)
+        Returns:
+            `LFSR`: external feedback register
+        """
+        if self.outfunc.expression != [len(self.state) - 1]:
+            raise Exception("the conversion requires the default output function")
+        if not self.__internal_feedback:
+            return LFSR(poly=list(self.poly), initstate=self.state.tolist())
+        poly, state = galois.galois_to_fibonacci(self.poly, self.state)
+        return LFSR(poly=poly, initstate=state.tolist())
+
+    def __packed_sequence(self, n):
+        size = len(self.state)
+        taps = self.outfunc.taps()
+        if taps[-1] > size - 1:
+            raise Exception("expression index out of bounds")
+        if n <= 0:
+            return np.zeros(0, dtype=np.uint8)
+        base = self.__base_sequence(n + size)
+        # evaluate the output function on the columns of all n states at once
+        columns = {i: self.__state_column(base, i, 0, n) for i in taps}
+        seq = self.outfunc.compile()(columns)
+        if self.outfunc.is_constant():
+            # a constant result doesn't depend on the columns
+            seq = np.full(n, seq, dtype=np.uint8)
+        self.state = np.array([self.__state_column(base, i, n, 1)[0]
+                               for i in range(size)], dtype=np.uint8)
+        if self.__internal_feedback:
+            self.feedback_bit = base[n - 1]
+        else:
+            self.feedback_bit = self.state[0]
+        self.outbit = seq[-1]
+        self.cycles += n
+        return seq
+
+    def __step_packed(self, state):
+        """performs one cycle on a packed (int) state without touching the register
+        """
+        size = len(self.state)
+        if self.__internal_feedback:
+            fb = state >> (size - 1)
+            state = (state << 1) & ((1 << size) - 1)
+            if fb:
+                mask = 1
+                for p in self.poly[1:]:
+                    mask ^= 1 << p
+                state ^= mask
+            return state
+        mask = 0
+        for p in self.poly:
+            mask ^= 1 << (p - 1)
+        return ((state << 1) & ((1 << size) - 1)) | parity(state & mask)
+
+    def __charpoly(self):
+        """characteristic polynomial of the register as gf2 int
+        """
+        size = len(self.state)
+        charpoly = 1 << size
+        for d in self.__delays():
+            charpoly ^= 1 << (size - d)
+        return charpoly
+
+    def is_primitive(self):
+        """tests if the feedback polynomial is primitive, in which case every
+            non zero state has the maximum period 2^L - 1
+        Returns:
+            `bool`
+        """
+        return gf2.is_primitive(self.__charpoly())
+
+    def period(self):
+        """computes the period of the state sequence starting at the current
+            state: the multiplicative order of x modulo the minimal polynomial
+            of the state, which divides the characteristic polynomial.
+            for a primitive polynomial and a non zero state that's 2^L-1
+        Returns:
+            `int`: period
+        """
+        size = len(self.state)
+        states = [pack(self.state)]
+        for _ in range(size - 1):
+            states.append(self.__step_packed(states[-1]))
+
+        def annihilates(poly):
+            # poly(M) * state == 0, with deg(poly) < size
+            result = 0
+            i = 0
+            while poly:
+                if poly & 1:
+                    result ^= states[i]
+                poly >>= 1
+                i += 1
+            return result == 0
+
+        # remove every factor of the characteristic polynomial that is
+        # not needed to annihilate the state
+        charpoly = self.__charpoly()
+        minpoly = charpoly
+        for p, e in gf2.factor(charpoly).items():
+            for _ in range(e):
+                reduced = gf2.divide(minpoly, p)[0]
+                if not annihilates(reduced):
+                    break
+                minpoly = reduced
+        # a factor x only adds a pre period, the cycle is given by the rest
+        while minpoly & 1 == 0:
+            minpoly >>= 1
+        return gf2.order(minpoly)
+
+    def jump(self, n):
+        """advances the register by n cycles in O(L^2 log n) by computing
+            x^n modulo the characteristic polynomial of the register.
+            state, cycles, outbit and feedback_bit equal n calls of shift()
+        Args:
+            `n` (int): number of cycles to skip
+        """
+        if n <= 0:
+            return
+        size = len(self.state)
+        charpoly = self.__charpoly()
+
+        # the state after n-1 cycles is a linear combination of the states
+        # after 0..size-1 cycles with the coefficients of x^(n-1) mod charpoly
+        coefficients = gf2.powmod(0b10, n - 1, charpoly)
+        state = pack(self.state)
+        target = 0
+        while coefficients:
+            if coefficients & 1:
+                target ^= state
+            coefficients >>= 1
+            state = self.__step_packed(state)
+        self.state = unpack(target, size)
+
+        # the last cycle is a regular shift to set outbit and feedback_bit
+        self.cycles += n - 1
+        self.shift()
 
     def reset(self):
         """resets the state
@@ -0,0 +1,277 @@
+"""
+    File name: mersenne.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+'''
+Prime factors of 2^d - 1 for d <= MAX_DEGREE, so that primitivity tests and
+orders in pyfsr.gf2 don't have to factor large numbers. 2^d - 1 is the
+product of the cyclotomic values Phi_k(2) over all divisors k of d, the table
+holds the distinct primes of Phi_k(2) for every k. e.g. 2^12 - 1 =
+3^2 * 5 * 7 * 13 is made of the entries 2 (3), 3 (7), 4 (5), 6 (3) and
+12 (13).
+
+The factorizations were computed with trial division, Pollard rho and ECM
+and every factor is checked to be prime.
+'''
+
+MAX_DEGREE = 256
+
+PRIMITIVE_FACTORS = {
+    2: (3,),
+    3: (7,),
+    4: (5,),
+    5: (31,),
+    6: (3,),
+    7: (127,),
+    8: (17,),
+    9: (73,),
+    10: (11,),
+    11: (23, 89),
+    12: (13,),
+    13: (8191,),
+    14: (43,),
+    15: (151,),
+    16: (257,),
+    17: (131071,),
+    18: (3, 19),
+    19: (524287,),
+    20: (5, 41),
+    21: (7, 337),
+    22: (683,),
+    23: (47, 178481),
+    24: (241,),
+    25: (601, 1801),
+    26: (2731,),
+    27: (262657,),
+    28: (29, 113),
+    29: (233, 1103, 2089),
+    30: (331,),
+    31: (2147483647,),
+    32: (65537,),
+    33: (599479,),
+    34: (43691,),
+    35: (71, 122921),
+    36: (37, 109),
+    37: (223, 616318177),
+    38: (174763,),
+    39: (79, 121369),
+    40: (61681,),
+    41: (13367, 164511353),
+    42: (5419,),
+    43: (431, 9719, 2099863),
+    44: (397, 2113),
+    45: (631, 23311),
+    46: (2796203,),
+    47: (2351, 4513, 13264529),
+    48: (97, 673),
+    49: (4432676798593,),
+    50: (251, 4051),
+    51: (103, 2143, 11119),
+    52: (53, 157, 1613),
+    53: (6361, 69431, 20394401),
+    54: (3, 87211),
+    55: (881, 3191, 201961),
+    56: (15790321,),
+    57: (32377, 1212847),
+    58: (59, 3033169),
+    59: (179951, 3203431780337),
+    60: (61, 1321),
+    61: (2305843009213693951,),
+    62: (715827883,),
+    63: (92737, 649657),
+    64: (641, 6700417),
+    65: (145295143558111,),
+    66: (67, 20857),
+    67: (193707721, 761838257287),
+    68: (137, 953, 26317),
+    69: (10052678938039,),
+    70: (281, 86171),
+    71: (228479, 48544121, 212885833),
+    72: (433, 38737),
+    73: (439, 2298041, 9361973132609),
+    74: (1777, 25781083),
+    75: (100801, 10567201),
+    76: (229, 457, 525313),
+    77: (581283643249112959,),
+    78: (22366891,),
+    79: (2687, 202029703, 1113491139767),
+    80: (4278255361,),
+    81: (2593, 71119, 97685839),
+    82: (83, 8831418697),
+    83: (167, 57912614113275649087721),
+    84: (1429, 14449),
+    85: (9520972806333758431,),
+    86: (2932031007403,),
+    87: (4177, 9857737155463),
+    88: (353, 2931542417),
+    89: (618970019642690137449562111,),
+    90: (18837001,),
+    91: (911, 112901153, 23140471537),
+    92: (277, 1013, 1657, 30269),
+    93: (658812288653553079,),
+    94: (283, 165768537521),
+    95: (191, 420778751, 30327152671),
+    96: (193, 22253377),
+    97: (11447, 13842607235828485645766393),
+    98: (4363953127297,),
+    99: (199, 153649, 33057806959),
+    100: (5, 101, 8101, 268501),
+    101: (7432339208719, 341117531003194129),
+    102: (307, 2857, 6529),
+    103: (2550183799, 3976656429941438590393),
+    104: (858001, 308761441),
+    105: (29191, 106681, 152041),
+    106: (107, 28059810762433),
+    107: (162259276829213363391578010288127,),
+    108: (246241, 279073),
+    109: (745988807, 870035986098720987332873),
+    110: (11, 2971, 48912491),
+    111: (321679, 26295457, 319020217),
+    112: (5153, 54410972897),
+    113: (3391, 23279, 65993, 1868569, 1066818132868207),
+    114: (571, 160465489),
+    115: (14951, 4036961, 2646507710984041),
+    116: (107367629, 536903681),
+    117: (937, 6553, 86113, 7830118297),
+    118: (2833, 37171, 1824726041),
+    119: (239, 20231, 62983048367, 131105292137),
+    120: (4562284561,),
+    121: (727, 1786393878363164227858270210279),
+    122: (768614336404564651,),
+    123: (3887047, 177722253954175633),
+    124: (5581, 8681, 49477, 384773),
+    125: (269089806001, 4710883168879506001),
+    126: (77158673929,),
+    127: (170141183460469231731687303715884105727,),
+    128: (274177, 67280421310721),
+    129: (11053036065049294753459639,),
+    130: (131, 409891, 7623851),
+    131: (263, 10350794431055162386718619237468234569),
+    132: (312709, 4327489),
+    133: (163537220852725398851434325720959,),
+    134: (7327657, 6713103182899),
+    135: (271, 348031, 49971617830801),
+    136: (17, 354689, 2879347902817),
+    137: (32032215596496435569, 5439042183600204290159),
+    138: (139, 168749965921),
+    139: (5625767248687, 123876132205208335762278423601),
+    140: (7416361, 47392381),
+    141: (4375578271, 646675035253258729),
+    142: (56409643, 13952598148481),
+    143: (724153, 158822951431, 5782172113400990737),
+    144: (577, 487824887233),
+    145: (2679895157783862814690027494144991,),
+    146: (1753, 1795918038741070627),
+    147: (7, 2741672362528725535068727),
+    148: (149, 593, 184481113, 231769777),
+    149: (86656268566282183151, 8235109336690846723986161),
+    150: (1133836730401,),
+    151: (18121, 55871, 165799, 2332951, 7289088383388253664437433),
+    152: (1217, 148961, 24517014940753),
+    153: (919, 75582488424179347083438319),
+    154: (617, 78233, 35532364099),
+    155: (31, 311, 11471, 73471, 4649919401, 18158209813151),
+    156: (13, 313, 1249, 3121, 21841),
+    157: (852133201, 60726444167, 1654058017289, 2134387368610417),
+    158: (201487636602438195784363,),
+    159: (6679, 13960201, 540701761, 229890275929),
+    160: (414721, 44479210368001),
+    161: (1289, 3188767, 45076044553, 14808607715315782481),
+    162: (3, 163, 135433, 272010961),
+    163: (150287, 704161, 110211473, 27669118297, 36230454570129675721),
+    164: (10169, 181549, 12112549, 43249589),
+    165: (2048568835297380486760231,),
+    166: (499, 1163, 2657, 155377, 13455809771),
+    167: (2349023, 79638304766856507377778616296087448490695649),
+    168: (3361, 88959882481),
+    169: (4057, 6740339310641, 3340762283952395329506327023033),
+    170: (26831423036065352611,),
+    171: (93507247, 3042645634792541312037847),
+    172: (173, 101653, 500177, 1759217765581),
+    173: (730753, 1505447, 70084436712553223, 155285743288572277679887),
+    174: (96076791871613611,),
+    175: (39551, 60816001, 535347624791488552837151),
+    176: (229153, 119782433, 43872038849),
+    177: (184081, 27989941729, 9213624084535989031),
+    178: (179, 62020897, 18584774046020617),
+    179: (359, 1433, 1489459109360039866456940197095433721664951999121),
+    180: (181, 54001, 29247661),
+    181: (43441, 1164193, 7648337, 7923871097285295625344647665764672671),
+    182: (224771, 1210483, 25829691707),
+    183: (367, 55633, 37201708625305146303973352041),
+    184: (291280009243618888211558641,),
+    185: (1587855697992791, 7248808599285760001152755641),
+    186: (529510939, 2903110321),
+    187: (707983, 1032670816743843860998850056278950666491537),
+    188: (3761, 7484047069, 140737471578113),
+    189: (1560007, 207617485544258392970753527),
+    190: (2281, 3011347479614249131),
+    191: (383, 7068569257, 39940132241, 332584516519201, 87274497124602996457),
+    192: (18446744069414584321,),
+    193: (13821503, 61654440233248340616559, 14732265321145317331353282383),
+    194: (971, 1553, 31817, 1100876018364883721),
+    195: (134304196845099262572814573351,),
+    196: (197, 19707683773, 4981857697937),
+    197: (7487, 26828803997912886929710867041891989490486893845712448833),
+    198: (5347, 242099935645987),
+    199: (164504919713, 4884164093883941177660049098586324302977543600799),
+    200: (401, 340801, 2787601, 3173389601),
+    201: (1609, 22111, 87449423397425857942678833145441),
+    202: (845100400152152934331135470251,),
+    203: (136417, 121793911, 11348055580883272011090856053175361113),
+    204: (409, 3061, 13669, 1326700741),
+    205: (2940521, 70171342151, 3655725065508797181674078959681),
+    206: (415141630193, 8142767081771726171),
+    207: (79903, 634569679, 2232578641663, 42166482463639),
+    208: (78919881726271091143763623681,),
+    209: (94803416684681, 1512348937147247, 5346950541323960232319657),
+    210: (211, 664441, 1564921),
+    211: (15193, 60272956433838849161, 3593875704495823757388199894268773153439),
+    212: (15358129, 586477649, 1801439824104653),
+    213: (66457, 2849881972114740679, 4205268574191396793),
+    214: (643, 84115747449047881488635567801),
+    215: (1721, 731516431, 514851898711, 297927289744047764444862191),
+    216: (33975937, 138991501037953),
+    217: (5209, 62497, 6268703933840364033151, 378428804431424484082633),
+    218: (104124649, 2077756847362348863128179),
+    219: (3943, 671165898617413417, 4815314615204347717321),
+    220: (415878438361, 3630105520141),
+    221: (1327, 2365454398418399772605086209214363458552839866247069233),
+    222: (3331, 17539, 107775231312019),
+    223: (18287, 196687, 1466449, 2916841, 1469495262398780123809, 596242599987116128415063),
+    224: (449, 2689, 183076097, 358429848460993),
+    225: (115201, 617401, 1348206751, 13861369826299351),
+    226: (227, 48817, 636190001, 491003369344660409),
+    227: (26986333437777017, 7992177738205979626491506950867720953545660121688631),
+    228: (131101, 160969, 275415303169),
+    229: (1504073, 20492753, 59833457464970183, 467795120187583723534280000348743236593),
+    230: (691, 1884103651, 345767385170491),
+    231: (463, 4982397651178256151338302204762057),
+    232: (59393, 82280195167144119832390568177),
+    233: (1399, 135607, 622577, 116868129879077600270344856324766260085066532853492178431),
+    234: (5302306226370307681801,),
+    235: (2391314881, 72296287361, 73202300395158005845473537146974751),
+    236: (1181, 3541, 157649, 174877, 5521693, 104399276341),
+    237: (1423, 49297, 23728823512345609279, 31357373417090093431),
+    238: (823679683, 143162553165560959297),
+    239: (479, 1913, 5737, 176383, 134000609, 7110008717824458123105014279253754096863768062879),
+    240: (394783681, 46908728641),
+    241: (22000409, 160619474372352289412737508720216839225805656328990879953332340439),
+    242: (117371, 11054184582797800455736061107),
+    243: (487, 16753783618801, 192971705688577, 3712990163251158343),
+    244: (733, 1709, 3456749, 368140581013, 667055378149),
+    245: (1471, 252359902034571016856214298851708529738525821631),
+    246: (739, 165313, 13194317913029593),
+    247: (15809, 6459570124697, 402004106269663, 1282816117617265060453496956212169),
+    248: (290657, 3770202641, 1141629180401976895873),
+    249: (1621324657, 8241594690167137359552274418432855740327),
+    250: (229668251, 5519485418336288303251),
+    251: (503, 54217, 178230287214063289511, 61676882198695257501367, 12070396178249893039969681),
+    252: (40388473189, 118750098349),
+    253: (23, 4103188409, 199957736328435366769577, 44667711762797798403039426178361),
+    254: (56713727820156410577229101238628035243,),
+    255: (106591, 949111, 5702451577639775545838643151),
+    256: (59649589127497217, 5704689200685129054721),
+}
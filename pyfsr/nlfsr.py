@@ -5,8 +5,14 @@
 """
 
 import numpy as np
-from tqdm import tqdm
 from .fsr_function import FSRFunction
+from . import stream
+from . import aio
+from . import checkpoint as ckpt
+from . import random_access
+from .packed import pack, unpack
+from .tools import format_sequence, PACKED_FORMATS
+from . import instrument as instr
 
 
 def roll(arr):
@@ -27,6 +33,11 @@ class NLFSR():
         `initcycles` (int, optional): number of cycles to run after initialization. 
     """
 
+    # instrument that is used by sequence() if none is passed, see attach()
+    instrument = None
+    # state index that is used by read(), see build_index()
+    index = None
+
     def __init__(self, initstate, infunc, outfunc="default", size=-1, initcycles=-1):
         if isinstance(initstate, list):
             self.initstate = np.array(initstate)
@@ -45,7 +56,7 @@ class NLFSR():
         else:
             raise Exception("UNKNOWN INITSTATE VALUE:", initstate)
 
-        self.state = self.initstate.astype(int)
+        self.state = self.initstate.astype(np.uint8)
 
         if not isinstance(infunc, FSRFunction):
             raise Exception("infunc has to be an instance of FSRFunction")
@@ -71,7 +82,7 @@ class NLFSR():
         if initcycles > 0:
             self.sequence(initcycles, show_progress=False)
             self.cycles = 0
-            self.initstate = self.state  # set the actual initstate
+            self.initstate = self.state.copy()  # set the actual initstate
 
     def shift(self):
         """performs one cycle
@@ -85,21 +96,252 @@ class NLFSR():
         self.cycles += 1
         return self.outbit
 
-    def sequence(self, n, show_progress=True):
+    def sequence(self, n, show_progress=False, format="int", engine="auto", bits_per_step=None,
+                 instrument=None):
         """generates a pseudo random sequence of length n
         Args:
             `n` (int): sequence length
+            `show_progress` (bool, optional): shows a tqdm progress bar
+            `engine` ('auto', 'parallel' or 'shift', optional): 'parallel'
+                computes bits_per_step cycles at once on a packed state, 'shift'
+                calls shift() once per bit. 'auto' uses 'parallel'
+            `bits_per_step` (int, optional): cycles per step of the parallel
+                engine. defaults to (and is limited by) parallelism()
+            `format` (str, optional): 'int' (np.array[int]), 'uint8', 'bool',
+                'packed' / 'packed_msb' (np.packbits, msb first), 'packed_lsb',
+                'bytes' (msb first) or 'pyint' (python int, bit i is the i-th bit)
+            `instrument` (pyfsr.instrument.Instrument, optional): receives the
+                clocks of this call. defaults to the attached instrument
         Returns:
-            `np.array[int]`: binary sequence
+            `np.array[int]`: binary sequence (or the requested format)
         """
-        seq = np.ones(n)
-        if show_progress:
-            for i in tqdm(range(n), ascii=True, desc=f'Generating {n} bit sequence'):
-                seq[i] = self.shift()
-        else:
-            for i in range(n):
-                seq[i] = self.shift()
-        return seq.astype(int)
+        if engine not in ("auto", "parallel", "shift"):
+            raise Exception("unknown engine:", engine)
+        instrument = instr.select(instrument, show_progress, self.instrument)
+        instrument.start(n, f'Generating {n} bit sequence')
+        try:
+            if format in PACKED_FORMATS and n > stream.SEQUENCE_CHUNK_BITS:
+                # only hold the packed result and a single unpacked chunk
+                return stream.packed_sequence(self, n, format, engine=engine,
+                                              bits_per_step=bits_per_step,
+                                              instrument=instr.Forward(instrument))
+            if engine in ("auto", "parallel"):
+                seq = self.__parallel_sequence(n, bits_per_step)
+                self.infunc.evaluated(n)
+                self.outfunc.evaluated(n)
+                instrument.update(n)
+            else:
+                seq = np.empty(n, dtype=np.uint8)
+                # the instrument is updated in batches, not per bit
+                for start in range(0, n, instr.BATCH_CLOCKS):
+                    stop = min(start + instr.BATCH_CLOCKS, n)
+                    for i in range(start, stop):
+                        seq[i] = self.shift()
+                    instrument.update(stop - start)
+            return format_sequence(seq, format)
+        finally:
+            instrument.close()
+
+    def attach(self, instrument):
+        """attaches an instrument that is used by all following sequence calls
+        Args:
+            `instrument` (pyfsr.instrument.Instrument): e.g. Metrics() or TqdmProgress()
+        """
+        self.instrument = instrument
+
+    def detach(self):
+        """removes the attached instrument
+        """
+        self.__dict__.pop('instrument', None)
+
+    def __getstate__(self):
+        # instruments (progress bars, callbacks) stay in the process they belong to
+        state = self.__dict__.copy()
+        state.pop('instrument', None)
+        # indices can be large or memory-mapped, they aren't sent to workers
+        state.pop('index', None)
+        return state
+
+    def parallelism(self):
+        """largest number of cycles that can be computed at once: k cycles
+            only read the original state if no tap of the infunc or outfunc
+            falls within the first k-1 cells
+        Returns:
+            `int`: number of cycles, at most 64
+        """
+        taps = self.infunc.taps() + self.outfunc.taps()
+        return max(1, min(min(taps) + 1, len(self.state), 64))
+
+    def __parallel_sequence(self, n, bits_per_step=None):
+        size = len(self.state)
+        for func in [self.infunc, self.outfunc]:
+            if func.taps()[-1] > size - 1:
+                raise Exception("expression index out of bounds")
+        k = self.parallelism()
+        if bits_per_step is not None:
+            if bits_per_step > k or bits_per_step < 1:
+                raise Exception("bits_per_step has to be in range [1, %d]" % k)
+            k = bits_per_step
+        if n <= 0:
+            return np.zeros(0, dtype=np.uint8)
+
+        mask = (1 << size) - 1
+        state = pack(self.state)
+        words = np.empty((n + k - 1) // k, dtype=np.uint64)
+        infunc = self.infunc.compile_packed(k)
+        outfunc = self.outfunc.compile_packed(k)
+        steps = n // k
+        for i in range(steps):
+            words[i] = outfunc(state)
+            fb = infunc(state)
+            state = ((state << k) & mask) | fb
+        rest = n - steps * k
+        if rest:
+            # the last step only computes the remaining cycles
+            fb = self.infunc.compile_packed(rest)(state)
+            words[-1] = self.outfunc.compile_packed(rest)(state) << (k - rest)
+            state = ((state << rest) & mask) | fb
+
+        # bit k-1-j of a word is the output of cycle j
+        bits = np.unpackbits(words.astype('>u8').view(np.uint8)).reshape(-1, 64)
+        seq = bits[:, 64 - k:].reshape(-1)[:n]
+        self.state = unpack(state, size)
+        self.outbit = seq[-1]
+        self.feedback_bit = fb & 1
+        self.cycles += n
+        return seq
+
+    def iter_chunks(self, chunk_bits, nbits=None, bitorder='big', instrument=None,
+                    checkpoint=None):
+        """generates the sequence chunk by chunk with constant memory,
+            see pyfsr.stream.iter_chunks
+        Args:
+            `chunk_bits` (int): bits per chunk, has to be a multiple of 8
+            `nbits` (int, optional): total number of bits. endless if not set
+            `bitorder` ('big' or 'little', optional): bit order within each byte
+            `instrument` (pyfsr.instrument.Instrument, optional): receives the clocks
+            `checkpoint` (pyfsr.checkpoint.AutoCheckpoint, optional): saves the
+                register periodically
+        Yields:
+            `np.array[uint8]`: packed chunk of the sequence
+        """
+        return stream.iter_chunks(self, chunk_bits, nbits, bitorder, instrument, checkpoint)
+
+    def aiter_chunks(self, chunk_bits, nbits=None, bitorder='big', queue_size=4, executor=None):
+        """asynchronous iter_chunks, the chunks are computed in an executor
+            and buffered in a bounded queue, see pyfsr.aio.aiter_chunks
+        Args:
+            `chunk_bits` (int): bits per chunk, has to be a multiple of 8
+            `nbits` (int, optional): total number of bits. endless if not set
+            `bitorder` ('big' or 'little', optional): bit order within each byte
+            `queue_size` (int, optional): maximum number of chunks waiting for the consumer
+            `executor` (concurrent.futures.Executor, optional): thread or process
+                pool. defaults to the thread pool of the event loop
+        Yields:
+            `np.array[uint8]`: packed chunk of the sequence
+        """
+        return aio.aiter_chunks(self, chunk_bits, nbits, bitorder, queue_size, executor)
+
+    def write_to(self, target, nbits, chunk_bits=2**23, bitorder='big', instrument=None,
+                 checkpoint=None):
+        """writes nbits of the sequence in packed form to a path, binary file
+            object or writable buffer (e.g. np.memmap), see pyfsr.stream.write_to
+        Args:
+            `target` (str, path, file object or buffer): output
+            `nbits` (int): number of bits
+            `chunk_bits` (int, optional): bits generated at once, multiple of 8
+            `bitorder` ('big' or 'little', optional): bit order within each byte
+            `instrument` (pyfsr.instrument.Instrument, optional): receives the clocks
+            `checkpoint` (pyfsr.checkpoint.AutoCheckpoint, optional): saves the
+                register periodically
+        Returns:
+            `int`: number of bytes written
+        """
+        return stream.write_to(self, target, nbits, chunk_bits, bitorder, instrument,
+                               checkpoint)
+
+    def to_bytes(self):
+        """compact binary snapshot of the configuration and the current state,
+            see pyfsr.checkpoint.from_bytes
+        Returns:
+            `bytes`: the snapshot
+        """
+        return ckpt.to_bytes(self)
+
+    def build_index(self, interval, nbits, path=None):
+        """records the state every interval clocks of the first nbits of the
+            sequence (from the initstate) for read(), see
+            pyfsr.random_access.StateIndex.build
+        Args:
+            `interval` (int): clocks between two states
+            `nbits` (int): length of the indexed part of the sequence
+            `path` (str or path, optional): memory-mapped sidecar file
+        Returns:
+            `StateIndex`: the index, it is also used by the following reads
+        """
+        self.index = random_access.StateIndex.build(self, interval, nbits, path)
+        return self.index
+
+    def read(self, offset, length, format="int"):
+        """reads bits [offset, offset + length) of the sequence from the
+            initstate without changing the register, from the nearest state of
+            the index if one was built or opened (see build_index)
+        Args:
+            `offset` (int): position of the first bit
+            `length` (int): number of bits
+            `format` (str, optional): see sequence()
+        Returns:
+            `np.array[int]`: the bits (or the requested format)
+        """
+        return random_access.read(self, offset, length, format, self.index)
+
+    def save(self, path):
+        """saves a snapshot to path (atomically), see pyfsr.checkpoint.load
+        Args:
+            `path` (str or path): output file
+        """
+        ckpt.save(self, path)
+
+    def period(self):
+        """finds the cycle of the state sequence starting at the current state
+            with Brent's cycle detection on packed states. since a nlfsr isn't
+            necessarily bijective, the state might first run through a tail
+            before it enters the cycle
+        Returns:
+            `(int, int)`: tail length and cycle length
+        """
+        size = len(self.state)
+        for func in [self.infunc, self.outfunc]:
+            if func.taps()[-1] > size - 1:
+                raise Exception("expression index out of bounds")
+        infunc = self.infunc.compile_packed()
+        mask = (1 << size) - 1
+
+        def step(state):
+            return ((state << 1) & mask) | infunc(state)
+
+        start = pack(self.state)
+        # find the cycle length
+        power = cycle = 1
+        tortoise = start
+        hare = step(start)
+        while tortoise != hare:
+            if power == cycle:
+                tortoise = hare
+                power *= 2
+                cycle = 0
+            hare = step(hare)
+            cycle += 1
+        # find the tail length
+        tortoise = hare = start
+        for _ in range(cycle):
+            hare = step(hare)
+        tail = 0
+        while tortoise != hare:
+            tortoise = step(tortoise)
+            hare = step(hare)
+            tail += 1
+        return tail, cycle
 
     def reset(self):
         """resets the state
@@ -0,0 +1,112 @@
+"""
+    File name: packed.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import numpy as np
+
+'''
+Bit-packed helpers. A register state (or any bit sequence) is held as a
+python int where bit i of the int is element i of the state, so a whole
+register can be masked, shifted and xored with a single int operation.
+'''
+
+
+def pack(bits):
+    """packs a sequence of bits into an int
+        e.g.: pack([1,1,0,1]) => 0b1011
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    if len(bits) == 0:
+        return 0
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def unpack(value, n):
+    """unpacks the lowest n bits of an int into a np.array[uint8]
+        e.g.: unpack(0b1011, 4) => [1,1,0,1]
+    """
+    nbytes = (n + 7) // 8
+    value &= (1 << (8 * nbytes)) - 1
+    raw = np.frombuffer(value.to_bytes(nbytes, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little')[:n]
+
+
+if hasattr(int, 'bit_count'):
+    def parity(value):
+        """returns the xor of all bits of a (non negative) int
+        """
+        return value.bit_count() & 1
+else:
+    def parity(value):
+        """returns the xor of all bits of a (non negative) int
+        """
+        return bin(value).count('1') & 1
+
+
+def linear_recurrence(delays, seed, n, block_size=1024):
+    """extends a bit sequence that satisfies the linear recurrence
+        w[j] = xor(w[j-d] for d in delays)
+    Args:
+        `delays` (iterable[int]): recurrence delays, each in range [1, len(seed)]
+        `seed` (list[int]): the first len(seed) bits of the sequence
+        `n` (int): number of bits to return (seed included)
+        `block_size` (int, optional): minimum number of bits computed per step
+    Returns:
+        `np.array[uint8]`: the first n bits of the sequence
+    """
+    order = len(seed)
+    seed = np.asarray(seed, dtype=np.uint8)
+    if n <= order:
+        return seed[:n].copy()
+    delays = sorted(set(delays))
+    if len(delays) == 0:
+        # no feedback at all, everything after the seed is zero
+        return np.concatenate((seed, np.zeros(n - order, dtype=np.uint8)))
+
+    # the recurrence polynomial squared k times has the taps d * 2^k, which
+    # allows computing min(delays) * 2^k bits with a single shift per tap.
+    # The sequence is bootstrapped level by level until the blocks are
+    # at least block_size bits wide.
+    dmin = delays[0]
+    level = 0
+    while dmin << level < block_size:
+        level += 1
+    history = order << level
+
+    seq = pack(seed)
+    length = order
+    k = 0
+    while length < min(n, history):
+        while k < level and order << (k + 1) <= length:
+            k += 1
+        width = min(dmin << k, n - length)
+        block = 0
+        for d in delays:
+            block ^= seq >> (length - (d << k))
+        seq |= (block & ((1 << width) - 1)) << length
+        length += width
+    if length >= n:
+        return unpack(seq, n)
+
+    # steady state: slide a window over the last `history` bits
+    width = ((dmin << level) // 8) * 8
+    window = seq >> (length - history)
+    shifts = [history - (d << level) for d in delays]
+    mask = (1 << width) - 1
+    top = history - width
+    nbytes = width // 8
+    chunks = []
+    remaining = n - length
+    while remaining > 0:
+        block = 0
+        for s in shifts:
+            block ^= window >> s
+        block &= mask
+        window = (window >> width) | (block << top)
+        chunks.append(block.to_bytes(nbytes, 'little'))
+        remaining -= width
+    tail = np.unpackbits(np.frombuffer(b''.join(chunks), dtype=np.uint8),
+                         bitorder='little')
+    return np.concatenate((unpack(seq, length), tail[:n - length]))
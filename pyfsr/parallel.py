@@ -0,0 +1,72 @@
+"""
+    File name: parallel.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def _lfsr_chunk(lfsr, offset, length):
+    lfsr.jump(offset)
+    return lfsr.sequence(length, show_progress=False)
+
+
+def _register_sequence(register, n):
+    seq = register.sequence(n, show_progress=False)
+    return seq, register
+
+
+def parallel_sequence(lfsr, n, workers=None):
+    """generates the same sequence as lfsr.sequence(n) by splitting it into
+        one chunk per worker. every worker jumps a copy of the register to
+        the start of its chunk, the chunks are concatenated afterwards
+    Args:
+        `lfsr` (LFSR): the register, it is advanced by n cycles
+        `n` (int): sequence length
+        `workers` (int, optional): number of processes. defaults to the cpu count
+    Returns:
+        `np.array[int]`: binary sequence
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n))
+    if workers == 1:
+        return lfsr.sequence(n, show_progress=False)
+
+    bounds = np.linspace(0, n, workers + 1).astype(int)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_lfsr_chunk, lfsr, int(start), int(stop - start))
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        chunks = [f.result() for f in futures]
+    lfsr.jump(n)
+    return np.concatenate(chunks)
+
+
+def parallel_sequences(registers, n, workers=None):
+    """generates a sequence of length n for each of the registers in parallel.
+        works for LFSRs and NLFSRs, since the registers are independent no
+        jump is required
+    Args:
+        `registers` (list[LFSR or NLFSR]): the registers, each is advanced by n cycles
+        `n` (int): sequence length
+        `workers` (int, optional): number of processes. defaults to the cpu count
+    Returns:
+        `np.array[int]`: 2-D array, row i is the sequence of registers[i]
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(registers)))
+    if workers == 1:
+        return np.array([r.sequence(n, show_progress=False) for r in registers]).reshape(len(registers), n)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_register_sequence, registers, [n] * len(registers)))
+    for register, (_, advanced) in zip(registers, results):
+        # take over the run state of the advanced copy, the functions and
+        # instruments of the caller stay in place
+        for key in ('state', 'cycles', 'outbit', 'feedback_bit'):
+            setattr(register, key, getattr(advanced, key))
+    return np.array([seq for seq, _ in results]).reshape(len(registers), n)
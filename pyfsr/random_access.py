@@ -0,0 +1,191 @@
+"""
+    File name: random_access.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import copy
+import os
+import struct
+import zlib
+import numpy as np
+from . import checkpoint
+from . import stream
+from .packed import pack, unpack
+
+'''
+Random access into the sequence of a register. A StateIndex holds the packed
+state after every `interval` clocks from the initstate, so bits deep inside
+the sequence are read by restoring the nearest state before them and
+generating at most interval - 1 bits that are thrown away. The index lives in
+memory or in a memory-mapped sidecar file:
+
+    magic "PYFSRIDX", version (u8), size (u32), interval (u64), count (u64),
+    crc32 of the register configuration (u32), then count packed states of
+    (size + 7) // 8 bytes (bit i is element i)
+
+Offsets are counted from the initstate, i.e. offset 0 is the first bit after
+construction (or reset()).
+'''
+
+MAGIC = b'PYFSRIDX'
+VERSION = 1
+HEADER = struct.Struct('<8sBIQQI')
+
+
+def _base(fsr):
+    """copy of the register in its initstate
+    """
+    base = copy.copy(fsr)
+    base.state = np.asarray(fsr.initstate).astype(np.uint8)
+    base.cycles = 0
+    base.outbit = -1
+    base.feedback_bit = -1
+    return base
+
+
+def _fingerprint(fsr):
+    """crc32 of the configuration and initstate of a register
+    """
+    # without the trailing crc, the crc32 of data + crc32(data) is constant
+    return zlib.crc32(checkpoint.to_bytes(_base(fsr))[:-4])
+
+
+def _advance(fsr, n):
+    if n <= 0:
+        return
+    if hasattr(fsr, 'jump'):
+        fsr.jump(n)
+    else:
+        stream.skip(fsr, n)
+
+
+class StateIndex():
+    """Packed register states every `interval` clocks, see build() and open()
+    Args:
+        `states` (np.array[uint8] or np.memmap): one packed state per row
+        `size` (int): register size
+        `interval` (int): clocks between two states
+        `fingerprint` (int): crc32 of the register configuration
+    """
+
+    def __init__(self, states, size, interval, fingerprint):
+        self.states = states
+        self.size = size
+        self.interval = interval
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, fsr, interval, nbits, path=None):
+        """generation pass over the first nbits of the sequence of a register
+            (starting at its initstate, the register itself isn't changed)
+        Args:
+            `fsr` (LFSR or NLFSR): the register
+            `interval` (int): clocks between two states, memory is
+                nbits / interval * size / 8 bytes
+            `nbits` (int): length of the indexed part of the sequence
+            `path` (str or path, optional): sidecar file, memory-mapped.
+                the index is held in memory if not set
+        Returns:
+            `StateIndex`: the index
+        """
+        if interval < 1:
+            raise Exception("interval has to be >= 1")
+        size = len(fsr.state)
+        nbytes = (size + 7) // 8
+        count = nbits // interval + 1
+        fingerprint = _fingerprint(fsr)
+        if path is None:
+            states = np.empty((count, nbytes), dtype=np.uint8)
+        else:
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, size, interval, count, fingerprint))
+                f.truncate(HEADER.size + count * nbytes)
+            states = np.memmap(path, dtype=np.uint8, mode='r+', offset=HEADER.size,
+                               shape=(count, nbytes))
+        runner = _base(fsr)
+        for i in range(count):
+            if i > 0:
+                _advance(runner, interval)
+            states[i] = np.frombuffer(pack(runner.state).to_bytes(nbytes, 'little'), dtype=np.uint8)
+        if path is not None:
+            states.flush()
+        return cls(states, size, interval, fingerprint)
+
+    @classmethod
+    def open(cls, path):
+        """opens a sidecar file written by build(), read only and memory-mapped
+        Args:
+            `path` (str or path): the sidecar file
+        Returns:
+            `StateIndex`: the index
+        """
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise Exception("not a pyfsr state index")
+        magic, version, size, interval, count, fingerprint = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise Exception("not a pyfsr state index")
+        if version != VERSION:
+            raise Exception("unsupported state index version:", version)
+        nbytes = (size + 7) // 8
+        if os.path.getsize(path) < HEADER.size + count * nbytes:
+            raise Exception("state index truncated")
+        states = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size,
+                           shape=(count, nbytes))
+        return cls(states, size, interval, fingerprint)
+
+    def __len__(self):
+        return len(self.states)
+
+    def state(self, i):
+        """state after i * interval clocks
+        Returns:
+            `np.array[uint8]`: the state
+        """
+        return unpack(int.from_bytes(self.states[i].tobytes(), 'little'), self.size)
+
+    def read(self, fsr, offset, length, format="int"):
+        """bits [offset, offset + length) of the sequence of a register,
+            the register itself isn't changed
+        Args:
+            `fsr` (LFSR or NLFSR): the register the index was built for
+            `offset` (int): position of the first bit, counted from the initstate
+            `length` (int): number of bits
+            `format` (str, optional): see LFSR.sequence
+        Returns:
+            `np.array[int]`: the bits (or the requested format)
+        """
+        if offset < 0 or length < 0:
+            raise Exception("offset and length have to be >= 0")
+        if len(fsr.state) != self.size or _fingerprint(fsr) != self.fingerprint:
+            raise Exception("the state index belongs to a different register")
+        i = min(offset // self.interval, len(self.states) - 1)
+        runner = _base(fsr)
+        runner.state = self.state(i)
+        runner.cycles = i * self.interval
+        _advance(runner, offset - runner.cycles)
+        return runner.sequence(length, show_progress=False, format=format)
+
+
+def read(fsr, offset, length, format="int", index=None):
+    """bits [offset, offset + length) of the sequence of a register from the
+        nearest state of the index. without an index lfsrs jump to the offset
+        and nlfsrs generate the sequence from the initstate
+    Args:
+        `fsr` (LFSR or NLFSR): the register, it isn't changed
+        `offset` (int): position of the first bit, counted from the initstate
+        `length` (int): number of bits
+        `format` (str, optional): see LFSR.sequence
+        `index` (StateIndex, optional): index of the register
+    Returns:
+        `np.array[int]`: the bits (or the requested format)
+    """
+    if index is not None:
+        return index.read(fsr, offset, length, format)
+    if offset < 0 or length < 0:
+        raise Exception("offset and length have to be >= 0")
+    runner = _base(fsr)
+    _advance(runner, offset)
+    return runner.sequence(length, show_progress=False, format=format)
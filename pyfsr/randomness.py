@@ -0,0 +1,387 @@
+"""
+    File name: randomness.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import math
+import numpy as np
+from .tools import parse_sequence
+from .complexity import linear_complexity
+
+'''
+Statistical tests of NIST SP 800-22 (frequency, block frequency, runs,
+longest run of ones, serial, approximate entropy, cumulative sums, DFT
+spectral and linear complexity) on numpy arrays.
+
+The tests are streaming: a TestBattery is updated chunk by chunk and only
+keeps counters, the unfinished blocks and the first and last few bits, so
+sequences larger than the memory can be tested with LFSR.iter_chunks:
+
+    battery = TestBattery()
+    for chunk in lfsr.iter_chunks(2**23, 2**30):
+        battery.update(chunk, format="packed")
+    print(battery.results())
+
+The spectral test is evaluated on blocks of `dft_block` bits whose peak
+counts are summed up, for shorter sequences that is the original test.
+'''
+
+# longest run of ones: block size, smallest class, number of classes and the
+# class probabilities by the minimum sequence length
+LONGEST_RUN = [
+    (750000, 10000, 10, [0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727]),
+    (6272, 128, 4, [0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124]),
+    (128, 8, 1, [0.2148, 0.3672, 0.2305, 0.1875]),
+]
+
+# linear complexity: class probabilities of the deviations T
+COMPLEXITY_PROBABILITIES = [0.010417, 0.03125, 0.125, 0.5, 0.25, 0.0625, 0.020833]
+
+TESTS = ("frequency", "block_frequency", "runs", "longest_run", "serial",
+         "approximate_entropy", "cumulative_sums", "dft", "linear_complexity")
+
+
+def igamc(a, x):
+    """regularized upper incomplete gamma function Q(a, x)
+    """
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        # series of the lower function P(a, x)
+        term = total = 1.0 / a
+        k = a
+        while abs(term) > abs(total) * 1e-15:
+            k += 1
+            term *= x / k
+            total += term
+        return max(0.0, 1.0 - total * math.exp(-x + a * math.log(x) - math.lgamma(a)))
+    # continued fraction (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    i = 1
+    while True:
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+        i += 1
+    return math.exp(-x + a * math.log(x) - math.lgamma(a)) * h
+
+
+def _normal_cdf(x):
+    return 0.5 * math.erfc(-x / math.sqrt(2))
+
+
+def _chi_squared(counts, probabilities, blocks, classes):
+    expected = blocks * np.asarray(probabilities)
+    chi2 = float(np.sum((counts - expected) ** 2 / expected))
+    return igamc(classes / 2, chi2 / 2)
+
+
+def _longest_runs(blocks):
+    """longest run of ones in every row of a 2-D bit array
+    """
+    count, size = blocks.shape
+    padded = np.zeros((count, size + 2), dtype=np.int8)
+    padded[:, 1:-1] = blocks
+    edges = np.diff(padded.reshape(-1))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    longest = np.zeros(count, dtype=np.int64)
+    np.maximum.at(longest, starts // (size + 2), ends - starts)
+    return longest
+
+
+def _pattern_values(bits, m):
+    """value of every window of m bits (first bit most significant)
+    """
+    count = len(bits) - m + 1
+    values = np.zeros(max(count, 0), dtype=np.int64)
+    for j in range(m):
+        values = (values << 1) | bits[j:j + count]
+    return values
+
+
+class TestBattery():
+    """Streaming NIST SP 800-22 test battery
+    Args:
+        `block_frequency_m` (int, optional): block size of the block frequency test
+        `serial_m` (int, optional): pattern length of the serial test
+        `entropy_m` (int, optional): pattern length of the approximate entropy test
+        `complexity_m` (int, optional): block size of the linear complexity test
+        `dft_block` (int, optional): bits per block of the spectral test
+        `tests` (list[str], optional): tests that are run. defaults to all (TESTS)
+    """
+
+    def __init__(self, block_frequency_m=128, serial_m=16, entropy_m=10,
+                 complexity_m=500, dft_block=2**20, tests=TESTS):
+        for test in tests:
+            if test not in TESTS:
+                raise Exception("unknown test:", test)
+        self.tests = list(tests)
+        self.block_frequency_m = block_frequency_m
+        self.serial_m = serial_m
+        self.entropy_m = entropy_m
+        self.complexity_m = complexity_m
+        self.dft_block = dft_block
+
+        self.n = 0
+        self.ones = 0
+        self.transitions = 0
+        self.__last = None
+        # partial sums of the cumulative sums test
+        self.__walk = 0
+        self.__walk_min = 0
+        self.__walk_max = 0
+        # bits that didn't fill a block yet, by test
+        self.__rest = {}
+        self.__block_ones = []
+        self.__longest = {size: np.zeros(len(probabilities), dtype=np.int64)
+                          for _, size, _, probabilities in LONGEST_RUN}
+        self.__complexities = []
+        self.__spectrum = [0, 0.0, 0.0]
+        # overlapping patterns, counted cyclically: the first bits are
+        # appended to the end of the sequence
+        self.__pattern_m = 0
+        if "serial" in self.tests:
+            self.__pattern_m = serial_m
+        if "approximate_entropy" in self.tests:
+            self.__pattern_m = max(self.__pattern_m, entropy_m + 1)
+        self.__patterns = np.zeros(1 << self.__pattern_m, dtype=np.int64)
+        self.__head = np.zeros(0, dtype=np.uint8)
+        self.__tail = np.zeros(0, dtype=np.uint8)
+
+    def __blocks(self, key, bits, size):
+        """full blocks of `size` bits, the rest is kept for the next chunk
+        """
+        bits = np.concatenate((self.__rest.get(key, np.zeros(0, dtype=np.uint8)), bits))
+        full = len(bits) // size
+        self.__rest[key] = bits[full * size:]
+        return bits[:full * size].reshape(full, size)
+
+    def update(self, chunk, format="int", nbits=None):
+        """adds the next part of the sequence
+        Args:
+            `chunk`: bits or a packed chunk, see LFSR.sequence
+            `format` (str, optional): format of the chunk
+            `nbits` (int, optional): number of bits of a packed chunk
+        """
+        bits = parse_sequence(chunk, format, nbits)
+        if len(bits) == 0:
+            return
+        if np.any(bits > 1):
+            raise Exception("the sequence has to consist of 0 and 1")
+        self.n += len(bits)
+        self.ones += int(np.count_nonzero(bits))
+
+        if self.__last is not None:
+            self.transitions += int(self.__last != bits[0])
+        self.transitions += int(np.count_nonzero(bits[1:] != bits[:-1]))
+        self.__last = bits[-1]
+
+        walk = np.cumsum(2 * bits.astype(np.int64) - 1) + self.__walk
+        self.__walk = int(walk[-1])
+        self.__walk_min = min(self.__walk_min, int(walk.min()))
+        self.__walk_max = max(self.__walk_max, int(walk.max()))
+
+        if "block_frequency" in self.tests:
+            blocks = self.__blocks("block_frequency", bits, self.block_frequency_m)
+            self.__block_ones.append(blocks.sum(axis=1))
+
+        if "longest_run" in self.tests:
+            for _, size, smallest, probabilities in LONGEST_RUN:
+                longest = _longest_runs(self.__blocks(("longest_run", size), bits, size))
+                classes = np.clip(longest - smallest, 0, len(probabilities) - 1)
+                self.__longest[size] += np.bincount(classes, minlength=len(probabilities))
+
+        if "linear_complexity" in self.tests:
+            for block in self.__blocks("linear_complexity", bits, self.complexity_m):
+                self.__complexities.append(linear_complexity(block))
+
+        if "dft" in self.tests:
+            for block in self.__blocks("dft", bits, self.dft_block):
+                self.__spectral(block)
+
+        if self.__pattern_m > 0:
+            m = self.__pattern_m
+            if len(self.__head) < m - 1:
+                self.__head = np.concatenate((self.__head, bits[:m - 1 - len(self.__head)]))
+            extended = np.concatenate((self.__tail, bits))
+            self.__patterns += np.bincount(_pattern_values(extended, m), minlength=1 << m)
+            self.__tail = extended[-(m - 1):] if m > 1 else extended[:0]
+
+    def __spectral(self, bits):
+        """adds the peak counts of a block to the spectral test
+        """
+        n = len(bits)
+        magnitudes = np.abs(np.fft.rfft(2.0 * bits - 1))[:n // 2]
+        threshold = math.sqrt(math.log(1 / 0.05) * n)
+        self.__spectrum[0] += int(np.count_nonzero(magnitudes < threshold))
+        self.__spectrum[1] += 0.95 * n / 2
+        self.__spectrum[2] += n * 0.95 * 0.05 / 4
+
+    def __pattern_counts(self, m):
+        """cyclic counts of the m bit patterns
+        """
+        if m <= 0:
+            return np.zeros(1, dtype=np.int64)
+        counts = self.__patterns.copy()
+        # the windows that wrap around from the end to the start
+        extended = np.concatenate((self.__tail, self.__head))
+        counts += np.bincount(_pattern_values(extended, self.__pattern_m),
+                              minlength=len(counts))
+        # every window of m bits is the prefix of exactly one longer window
+        return counts.reshape(1 << m, -1).sum(axis=1)
+
+    def results(self):
+        """p-values of the tests for the sequence so far, None if the sequence
+            is too short for a test. the serial test has two p-values and the
+            cumulative sums test one forward and one backward
+        Returns:
+            `dict[str, float or list[float]]`: p-values by test name
+        """
+        return {test: getattr(self, '_TestBattery__' + test)() for test in self.tests}
+
+    def __frequency(self):
+        if self.n == 0:
+            return None
+        return math.erfc(abs(2 * self.ones - self.n) / math.sqrt(self.n) / math.sqrt(2))
+
+    def __block_frequency(self):
+        ones = np.concatenate(self.__block_ones) if len(self.__block_ones) > 0 else []
+        if len(ones) == 0:
+            return None
+        m = self.block_frequency_m
+        chi2 = 4 * m * float(np.sum((np.asarray(ones) / m - 0.5) ** 2))
+        return igamc(len(ones) / 2, chi2 / 2)
+
+    def __runs(self):
+        if self.n == 0:
+            return None
+        pi = self.ones / self.n
+        if abs(pi - 0.5) >= 2 / math.sqrt(self.n):
+            return 0.0
+        runs = self.transitions + 1
+        return math.erfc(abs(runs - 2 * self.n * pi * (1 - pi)) /
+                         (2 * math.sqrt(2 * self.n) * pi * (1 - pi)))
+
+    def __longest_run(self):
+        for minimum, size, _, probabilities in LONGEST_RUN:
+            if self.n >= minimum:
+                counts = self.__longest[size]
+                return _chi_squared(counts, probabilities, counts.sum(), len(probabilities) - 1)
+        return None
+
+    def __psi2(self, m):
+        if m <= 0:
+            return 0.0
+        counts = self.__pattern_counts(m)
+        return (1 << m) / self.n * float(np.sum(counts.astype(float) ** 2)) - self.n
+
+    def __serial(self):
+        m = self.serial_m
+        if self.n < self.__pattern_m or m < 2:
+            return None
+        psi = [self.__psi2(m), self.__psi2(m - 1), self.__psi2(m - 2)]
+        delta1 = psi[0] - psi[1]
+        delta2 = psi[0] - 2 * psi[1] + psi[2]
+        return [igamc(2 ** (m - 2), delta1 / 2), igamc(2 ** (m - 3), delta2 / 2)]
+
+    def __phi(self, m):
+        if m <= 0:
+            return 0.0
+        counts = self.__pattern_counts(m)
+        counts = counts[counts > 0] / self.n
+        return float(np.sum(counts * np.log(counts)))
+
+    def __approximate_entropy(self):
+        m = self.entropy_m
+        if self.n < self.__pattern_m:
+            return None
+        entropy = self.__phi(m) - self.__phi(m + 1)
+        chi2 = 2 * self.n * (math.log(2) - entropy)
+        return igamc(2 ** (m - 1), chi2 / 2)
+
+    def __cusum_p_value(self, z):
+        n = self.n
+        if z == 0:
+            return 1.0
+        total = 1.0
+        for k in range(int((-n / z + 1) / 4), int((n / z - 1) / 4) + 1):
+            total -= _normal_cdf((4 * k + 1) * z / math.sqrt(n)) - \
+                _normal_cdf((4 * k - 1) * z / math.sqrt(n))
+        for k in range(int((-n / z - 3) / 4), int((n / z - 1) / 4) + 1):
+            total += _normal_cdf((4 * k + 3) * z / math.sqrt(n)) - \
+                _normal_cdf((4 * k + 1) * z / math.sqrt(n))
+        return total
+
+    def __cumulative_sums(self):
+        if self.n == 0:
+            return None
+        forward = max(abs(self.__walk_min), abs(self.__walk_max))
+        backward = max(self.__walk - self.__walk_min, self.__walk_max - self.__walk)
+        return [self.__cusum_p_value(forward), self.__cusum_p_value(backward)]
+
+    def __dft(self):
+        rest = self.__rest.get("dft", [])
+        peaks, expected, variance = self.__spectrum
+        if len(rest) > 1:
+            # the unfinished block is added to a copy of the counters
+            saved = list(self.__spectrum)
+            self.__spectral(rest)
+            peaks, expected, variance = self.__spectrum
+            self.__spectrum = saved
+        if variance == 0:
+            return None
+        return math.erfc(abs((peaks - expected) / math.sqrt(variance)) / math.sqrt(2))
+
+    def __linear_complexity(self):
+        if len(self.__complexities) == 0:
+            return None
+        m = self.complexity_m
+        mu = m / 2 + (9 + (-1) ** (m + 1)) / 36 - (m / 3 + 2 / 9) / 2 ** m
+        t = (-1) ** m * (np.array(self.__complexities) - mu) + 2 / 9
+        classes = np.digitize(t, [-2.5, -1.5, -0.5, 0.5, 1.5, 2.5], right=True)
+        counts = np.bincount(classes, minlength=7)
+        return _chi_squared(counts, COMPLEXITY_PROBABILITIES, len(t), 6)
+
+
+def run_tests(seq, format="int", nbits=None, **kwargs):
+    """runs the test battery on a whole sequence
+    Args:
+        `seq`: the sequence, e.g. the result of LFSR.sequence
+        `format` (str, optional): format of the sequence
+        `nbits` (int, optional): number of bits of a packed sequence
+        kwargs are passed on to TestBattery
+    Returns:
+        `dict[str, float or list[float]]`: p-values by test name
+    """
+    battery = TestBattery(**kwargs)
+    battery.update(seq, format, nbits)
+    return battery.results()
+
+
+def run_tests_stream(chunks, format="packed", **kwargs):
+    """runs the test battery chunk by chunk, e.g. on LFSR.iter_chunks
+    Args:
+        `chunks` (iterable): parts of the sequence
+        `format` (str, optional): format of the chunks
+        kwargs are passed on to TestBattery
+    Returns:
+        `dict[str, float or list[float]]`: p-values by test name
+    """
+    battery = TestBattery(**kwargs)
+    for chunk in chunks:
+        battery.update(chunk, format)
+    return battery.results()
@@ -0,0 +1,140 @@
+"""
+    File name: stream.py
+    Author: Lukas Müller
+    Python Version: 3.6
+"""
+
+import os
+import numpy as np
+from . import instrument as instr
+
+# number of bits that are generated at once for packed sequence formats
+SEQUENCE_CHUNK_BITS = 2**23
+PACKED_BY_BITORDER = {'big': 'packed_msb', 'little': 'packed_lsb'}
+
+
+def iter_chunks(fsr, chunk_bits, nbits=None, bitorder='big', instrument=None, checkpoint=None):
+    """generates the sequence of a register chunk by chunk
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+        `chunk_bits` (int): bits per chunk, has to be a multiple of 8
+        `nbits` (int, optional): total number of bits. endless if not set,
+            the last chunk is shorter if nbits isn't a multiple of chunk_bits
+        `bitorder` ('big' or 'little', optional): bit order within each byte
+        `instrument` (pyfsr.instrument.Instrument, optional): started once for
+            all chunks. defaults to the instrument attached to the register
+        `checkpoint` (pyfsr.checkpoint.AutoCheckpoint, optional): saves the
+            register after consumed chunks and at the end
+    Yields:
+        `np.array[uint8]`: packed chunk of the sequence
+    """
+    if chunk_bits < 8 or chunk_bits % 8 != 0:
+        raise Exception("chunk_bits has to be a positive multiple of 8")
+    instrument = instr.select(instrument, False, fsr.instrument)
+    instrument.start(nbits, 'Generating chunks')
+    forward = instr.Forward(instrument)
+    remaining = nbits
+    if checkpoint is not None:
+        checkpoint.start(fsr)
+    try:
+        while remaining is None or remaining > 0:
+            length = chunk_bits if remaining is None else min(chunk_bits, remaining)
+            yield fsr.sequence(length, show_progress=False,
+                               format=PACKED_BY_BITORDER[bitorder], instrument=forward)
+            if remaining is not None:
+                remaining -= length
+            # the consumer asked for the next chunk, so this one is done
+            if checkpoint is not None:
+                checkpoint.update(fsr, force=remaining == 0)
+    finally:
+        instrument.close()
+
+
+def write_to(fsr, target, nbits, chunk_bits=2**23, bitorder='big', instrument=None,
+             checkpoint=None):
+    """writes nbits of the sequence of a register in packed form with
+        constant memory usage
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+        `target` (str, path, binary file object or writable buffer like np.memmap):
+            where the (nbits + 7) // 8 bytes are written to
+        `nbits` (int): number of bits
+        `chunk_bits` (int, optional): bits generated at once, multiple of 8
+        `bitorder` ('big' or 'little', optional): bit order within each byte
+        `instrument` (pyfsr.instrument.Instrument, optional): see iter_chunks
+        `checkpoint` (pyfsr.checkpoint.AutoCheckpoint, optional): see
+            iter_chunks, the target is flushed before every checkpoint. to
+            resume, load the register and write the remaining bits to the
+            target opened for appending
+    Returns:
+        `int`: number of bytes written
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'wb') as f:
+            return write_to(fsr, f, nbits, chunk_bits, bitorder, instrument, checkpoint)
+
+    written = 0
+    chunks = iter_chunks(fsr, chunk_bits, nbits, bitorder, instrument, checkpoint)
+    flush = checkpoint is not None and hasattr(target, 'flush')
+    if hasattr(target, 'write'):
+        for chunk in chunks:
+            target.write(chunk.tobytes())
+            written += len(chunk)
+            if flush:
+                target.flush()
+        return written
+
+    buffer = memoryview(target).cast('B')
+    if len(buffer) < (nbits + 7) // 8:
+        raise Exception("target buffer too small for the sequence")
+    for chunk in chunks:
+        buffer[written:written + len(chunk)] = chunk.tobytes()
+        written += len(chunk)
+        if flush:
+            target.flush()
+    return written
+
+
+def packed_sequence(fsr, n, format, chunk_bits=SEQUENCE_CHUNK_BITS, **kwargs):
+    """generates a sequence in one of the packed formats chunk by chunk, so
+        only the packed result and one unpacked chunk are held in memory
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+        `n` (int): sequence length
+        `format` (str): 'packed' / 'packed_msb', 'packed_lsb', 'bytes' or 'pyint'
+        `chunk_bits` (int, optional): bits generated at once, multiple of 8
+        kwargs are passed on to fsr.sequence
+    Returns:
+        the packed sequence
+    """
+    bitorder = 'little' if format in ("packed_lsb", "pyint") else 'big'
+    packed = np.empty((n + 7) // 8, dtype=np.uint8)
+    written = 0
+    remaining = n
+    while remaining > 0:
+        length = min(chunk_bits, remaining)
+        chunk = fsr.sequence(length, show_progress=False,
+                             format=PACKED_BY_BITORDER[bitorder], **kwargs)
+        packed[written:written + len(chunk)] = chunk
+        written += len(chunk)
+        remaining -= length
+    if format == "bytes":
+        return packed.tobytes()
+    if format == "pyint":
+        return int.from_bytes(packed.tobytes(), 'little')
+    return packed
+
+
+def skip(fsr, n, chunk_bits=SEQUENCE_CHUNK_BITS):
+    """advances a register by n cycles without keeping the sequence, it is
+        generated chunk by chunk and thrown away
+    Args:
+        `fsr` (LFSR or NLFSR): the register
+        `n` (int): number of cycles
+        `chunk_bits` (int, optional): bits generated at once, multiple of 8
+    """
+    remaining = n
+    while remaining > 0:
+        length = min(chunk_bits, remaining)
+        fsr.sequence(length, show_progress=False, format="packed")
+        remaining -= length
@@ -4,6 +4,11 @@
     Python Version: 3.6
 """
 
+import numpy as np
+
+# sequence formats that hold 8 bits per byte
+PACKED_FORMATS = ("packed", "packed_msb", "packed_lsb", "bytes", "pyint")
+
 
 def roll(l):
     """rolls a list to the right
@@ -42,3 +47,54 @@ def logical_and(a, b, unsafe=False):
             raise Exception(
                 "The parameters for logical_and have to be boolean or integer in range [0,1]. got a: " + str(a) + ", b: " + str(b))
     return a & b
+
+
+def format_sequence(bits, format):
+    """converts a binary sequence to one of the sequence formats
+    Args:
+        `bits` (np.array[uint8]): binary sequence
+        `format` (str): 'int', 'uint8', 'bool', 'packed' / 'packed_msb',
+            'packed_lsb', 'bytes' or 'pyint'
+    Returns:
+        the converted sequence
+    """
+    if format == "int":
+        return bits.astype(int)
+    if format == "uint8":
+        return bits.astype(np.uint8, copy=False)
+    if format == "bool":
+        return bits.astype(bool)
+    if format == "packed" or format == "packed_msb":
+        return np.packbits(bits)
+    if format == "packed_lsb":
+        return np.packbits(bits, bitorder='little')
+    if format == "bytes":
+        return np.packbits(bits).tobytes()
+    if format == "pyint":
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+    raise Exception("unknown sequence format:", format)
+
+
+def parse_sequence(seq, format="int", nbits=None):
+    """converts a sequence in one of the sequence formats back to bits,
+        the inverse of format_sequence
+    Args:
+        `seq`: the sequence
+        `format` (str, optional): format of the sequence, see format_sequence
+        `nbits` (int, optional): number of bits of a packed sequence. defaults
+            to all bits of the packed bytes, required for 'pyint'
+    Returns:
+        `np.array[uint8]`: binary sequence
+    """
+    if format in ("int", "uint8", "bool"):
+        return np.asarray(seq).astype(np.uint8, copy=False).reshape(-1)
+    if format in ("packed", "packed_msb", "bytes"):
+        return np.unpackbits(np.frombuffer(seq, dtype=np.uint8), count=nbits)
+    if format == "packed_lsb":
+        return np.unpackbits(np.frombuffer(seq, dtype=np.uint8), count=nbits, bitorder='little')
+    if format == "pyint":
+        if nbits is None:
+            raise Exception("nbits is required for the pyint format")
+        raw = np.frombuffer(seq.to_bytes((nbits + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, count=nbits, bitorder='little')
+    raise Exception("unknown sequence format:", format)
@@ -19,6 +19,7 @@ setup(
     packages=['pyfsr'],
     keywords=['fsr', 'lfsr', 'nfsr', 'nlfsr'],
     install_requires=install_requires,
+    extras_require={'progress': ['tqdm>=4.31.1']},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
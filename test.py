@@ -1,5 +1,17 @@
+import asyncio
+import io
+import os
+import pickle
+import runpy
+import tempfile
 import unittest
-from pyfsr import FSRFunction, LFSR, NLFSR
+import contextlib
+import numpy as np
+from pyfsr import FSRFunction, LFSR, NLFSR, FSRBank, ClockControlled, CompositeGenerator, FSM, \
+    parallel_sequences, catalog, randomness, correlation, complexity, checkpoint, stream, gf2
+from pyfsr.instrument import Metrics
+from pyfsr.random_access import StateIndex
+from concurrent.futures import ProcessPoolExecutor
 
 
 class TestFSRFunction(unittest.TestCase):
@@ -29,6 +41,91 @@ class TestFSRFunction(unittest.TestCase):
         self.assertEqual(func.solve([1,1,0]), 1)
         self.assertEqual(func.solve([0,1,0]), 0)
 
+    def test_compile(self):
+        func = FSRFunction([0,1,2, "*", "+", 3, "+"])
+        compiled = func.compile()
+        self.assertIs(func.compile(), compiled)
+        for i in range(16):
+            state = [(i >> j) & 1 for j in range(4)]
+            expected = state[0] ^ (state[1] & state[2]) ^ state[3]
+            self.assertEqual(func.solve(state), expected)
+        func = pickle.loads(pickle.dumps(func))
+        self.assertEqual(func.solve([1, 1, 1, 1]), 1)
+        with self.assertRaises(Exception):
+            FSRFunction([0, "+", 1]).solve([0, 0])
+
+    def test_solve_batch(self):
+        func = FSRFunction([0,1,2, "*", "+"])
+        states = np.random.randint(0, 2, (500, 3)).astype(np.uint8)
+        expected = [func.solve(s.tolist()) for s in states]
+        self.assertListEqual(func.solve_batch(states).tolist(), expected)
+        self.assertListEqual(
+            FSRFunction([1]).solve_batch(states).tolist(), states[:, 1].tolist())
+        with self.assertRaises(Exception):
+            FSRFunction([3]).solve_batch(states)
+
+    def test_truth_table(self):
+        func = FSRFunction([4, 1, "*", 6, "+"])
+        self.assertListEqual(func.taps(), [1, 4, 6])
+        # index bit 0 -> state[1], bit 1 -> state[4], bit 2 -> state[6]
+        self.assertListEqual(func.truth_table().tolist(), [0, 0, 0, 1, 1, 1, 1, 0])
+        self.assertTrue(func.uses_table())
+        plain = FSRFunction([4, 1, "*", 6, "+"], table_taps=0)
+        self.assertFalse(plain.uses_table())
+        states = np.random.randint(0, 2, (300, 7)).astype(np.uint8)
+        for state in states:
+            self.assertEqual(func.solve(state), plain.solve(state))
+        self.assertListEqual(func.solve_batch(states).tolist(),
+                             plain.solve_batch(states).tolist())
+        with self.assertRaises(Exception):
+            func.solve([0, 1, 0])
+
+    def test_optimizer(self):
+        def naive(expression, state):
+            stack = []
+            for token in expression:
+                if isinstance(token, int):
+                    stack.append(int(state[token]))
+                else:
+                    b, a = stack.pop(), stack.pop()
+                    stack.append(a ^ b if token == "+" else a & b)
+            return stack[0]
+
+        # shared monomials, a long xor chain and x ^ x terms
+        expression = [3, 5, 7, 9, 11, "+", "+", "+", "+", 3, 5, "*", "+", 3, 5, 9, "*", "*", "+",
+                      9, 5, 3, "*", "*", "+", 11, "+", 2, 2, "+", "*", 3, 5, "*", "+"]
+        func = FSRFunction(expression, table_taps=0)
+        states = np.random.randint(0, 2, (200, 12)).astype(np.uint8)
+        expected = [naive(expression, state) for state in states]
+        self.assertListEqual([func.solve(state) for state in states], expected)
+        self.assertListEqual(func.solve_batch(states).tolist(), expected)
+        packed = func.compile_packed()
+        self.assertListEqual([packed(int("".join(map(str, state[::-1])), 2)) for state in states],
+                             expected)
+        self.assertTrue(FSRFunction([0, 1, "+", 0, "+", 1, "+"]).is_constant())
+        self.assertListEqual(FSRFunction([0, 0, "+"]).solve_batch(states[:3]).tolist(), [0, 0, 0])
+        self.assertListEqual(FSRFunction([0, 1, "*", 1, 0, "*", "+", 2, "+"]).truth_table().tolist(),
+                             [0, 0, 0, 0, 1, 1, 1, 1])
+
+    def test_analysis(self):
+        func = FSRFunction([4, 1, "*", 6, "+", 1, "+"])
+        self.assertListEqual(func.anf(), [(1,), (6,), (1, 4)])
+        self.assertEqual(func.degree(), 2)
+        self.assertListEqual(func.walsh_spectrum().tolist(), [0, 0, 0, 0, 4, 4, -4, 4])
+        self.assertEqual(func.nonlinearity(), 2)
+        self.assertTrue(func.is_balanced())
+        self.assertEqual(func.correlation_immunity(), 0)
+        majority = FSRFunction([0, 1, "*", 0, 2, "*", "+", 1, 2, "*", "+"])
+        self.assertDictEqual(majority.analyze(), {"inputs": 3, "degree": 2, "nonlinearity": 2,
+                                                  "balanced": True, "correlation_immunity": 0,
+                                                  "resiliency": 0})
+        linear = FSRFunction([0, 1, "+", 2, "+", 3, "+"])
+        self.assertEqual(linear.resiliency(), 3)
+        self.assertEqual(FSRFunction([0, 1, "*"]).resiliency(), -1)
+        # bent function of 6 inputs
+        bent = FSRFunction([0, 1, "*", 2, 3, "*", "+", 4, 5, "*", "+"])
+        self.assertEqual(bent.nonlinearity(), 28)
+
     def test_raise_exception(self):
         func = FSRFunction([0,1,"+"])
         with self.assertRaises(Exception):
@@ -54,6 +151,137 @@ class TestLFSR(unittest.TestCase):
         self.assertEqual(l.shift(), 1)
         self.assertListEqual(l.state.tolist(), [0,1,1])
 
+    def test_packed_engine(self):
+        for feedback in ["external", "internal"]:
+            for outfunc in [FSRFunction([10]), FSRFunction([3]),
+                            FSRFunction([0, 4, "*", 10, "+"])]:
+                a = LFSR(poly=[11, 6, 3, 2], initstate="random",
+                         feedback=feedback, outfunc=outfunc)
+                b = LFSR(poly=[11, 6, 3, 2], initstate=a.state.tolist(),
+                         feedback=feedback, outfunc=outfunc)
+                seq = a.sequence(5000, show_progress=False, engine="shift")
+                self.assertListEqual(
+                    b.sequence(5000, engine="packed").tolist(), seq.tolist())
+                self.assertListEqual(b.state.tolist(), a.state.tolist())
+                self.assertEqual(b.cycles, a.cycles)
+                self.assertEqual(b.outbit, a.outbit)
+                self.assertEqual(b.feedback_bit, a.feedback_bit)
+        # an output function that cancels out to a constant
+        l = LFSR(poly=[5, 3], initstate="ones", outfunc=FSRFunction([1, 1, "+"]))
+        self.assertListEqual(l.sequence(10, show_progress=False).tolist(), [0] * 10)
+        self.assertEqual(l.outbit, 0)
+
+    def test_table_engine(self):
+        for feedback in ["external", "internal"]:
+            for table_bits in [8, 16]:
+                a = LFSR(poly=[23, 18, 5, 1], initstate="random", feedback=feedback)
+                b = LFSR(poly=[23, 18, 5, 1], initstate=a.state.tolist(), feedback=feedback)
+                seq = a.sequence(1001, show_progress=False, engine="shift")
+                self.assertListEqual(
+                    b.sequence(1001, engine="table", table_bits=table_bits).tolist(),
+                    seq.tolist())
+                self.assertListEqual(b.state.tolist(), a.state.tolist())
+                self.assertEqual(b.outbit, a.outbit)
+                self.assertEqual(b.feedback_bit, a.feedback_bit)
+        with self.assertRaises(Exception):
+            LFSR(poly=[5, 3], initstate="ones", outfunc=FSRFunction([0])).sequence(
+                10, engine="table")
+
+    def test_galois_fibonacci_conversion(self):
+        l = LFSR(poly=[19, 18, 17, 14], initstate="random")
+        g = l.to_galois()
+        self.assertEqual(str(g), "lfsr_(19-5-2-1)_int")
+        f = g.to_fibonacci()
+        self.assertListEqual(f.poly, l.poly)
+        self.assertListEqual(f.state.tolist(), l.state.tolist())
+        self.assertListEqual(g.sequence(500).tolist(), l.sequence(500).tolist())
+
+    def test_jump(self):
+        for feedback in ["external", "internal"]:
+            a = LFSR(poly=[17, 14, 5, 3], initstate="random", feedback=feedback)
+            b = LFSR(poly=[17, 14, 5, 3], initstate=a.state.tolist(),
+                     feedback=feedback)
+            for _ in range(1234):
+                a.shift()
+            b.jump(1234)
+            self.assertListEqual(b.state.tolist(), a.state.tolist())
+            self.assertEqual(b.cycles, a.cycles)
+            self.assertEqual(b.outbit, a.outbit)
+            self.assertEqual(b.feedback_bit, a.feedback_bit)
+            # x^17 + x^14 + 1 is primitive, a huge jump by a multiple of the
+            # period ends up in the same state
+            c = LFSR(poly=[17, 14], initstate=a.state.tolist(), feedback=feedback)
+            c.jump((2**17 - 1) * 2**40)
+            self.assertListEqual(c.state.tolist(), a.state.tolist())
+
+    def test_parallel_sequence(self):
+        a = LFSR(poly=[23, 18], initstate="random", feedback="internal")
+        b = LFSR(poly=[23, 18], initstate=a.state.tolist(), feedback="internal")
+        seq = a.sequence(100001, show_progress=False)
+        self.assertListEqual(b.parallel_sequence(100001, workers=3).tolist(),
+                             seq.tolist())
+        self.assertListEqual(b.state.tolist(), a.state.tolist())
+        self.assertEqual(b.cycles, a.cycles)
+
+    def test_streaming(self):
+        a = LFSR(poly=[19, 18, 17, 14], initstate="random")
+        b = LFSR(poly=[19, 18, 17, 14], initstate=a.state.tolist())
+        c = LFSR(poly=[19, 18, 17, 14], initstate=a.state.tolist())
+        expected = np.packbits(a.sequence(10004, show_progress=False))
+        chunks = list(b.iter_chunks(1024, 10004))
+        self.assertEqual(len(chunks), 10)
+        self.assertListEqual(np.concatenate(chunks).tolist(), expected.tolist())
+        f = io.BytesIO()
+        self.assertEqual(c.write_to(f, 10004, chunk_bits=800), len(expected))
+        self.assertEqual(f.getvalue(), expected.tobytes())
+        buffer = np.zeros(len(expected), dtype=np.uint8)
+        c.reset()
+        c.write_to(buffer, 10004, chunk_bits=800)
+        self.assertListEqual(buffer.tolist(), expected.tolist())
+        with self.assertRaises(Exception):
+            next(c.iter_chunks(12))
+
+    def test_sequence_formats(self):
+        l = LFSR(poly=[5, 3], initstate=[0, 1, 0, 1, 1])
+        self.assertEqual(l.state.dtype, np.uint8)
+        bits = l.sequence(20, format="uint8")
+        self.assertEqual(bits.dtype, np.uint8)
+        for fmt, expected in [("int", bits.astype(int)),
+                              ("bool", bits.astype(bool)),
+                              ("packed", np.packbits(bits)),
+                              ("packed_lsb", np.packbits(bits, bitorder='little')),
+                              ("bytes", np.packbits(bits).tobytes()),
+                              ("pyint", sum(int(b) << i for i, b in enumerate(bits)))]:
+            l.reset()
+            result = l.sequence(20, format=fmt)
+            if isinstance(expected, np.ndarray):
+                self.assertEqual(result.dtype, expected.dtype)
+                self.assertListEqual(result.tolist(), expected.tolist())
+            else:
+                self.assertEqual(result, expected)
+        with self.assertRaises(Exception):
+            l.sequence(20, format="float")
+
+    def test_period(self):
+        self.assertEqual(LFSR(poly=[17, 14], initstate="ones").period(), 2**17 - 1)
+        self.assertEqual(LFSR(poly=[17, 14], initstate=[0] * 17).period(), 1)
+        for feedback in ["external", "internal"]:
+            l = LFSR(poly=[9, 5, 4, 1], initstate="random", feedback=feedback)
+            period = l.period()
+            initstate = l.state.copy()
+            for i in range(period):
+                l.shift()
+                if i < period - 1:
+                    self.assertFalse(np.array_equal(l.state, initstate))
+            self.assertListEqual(l.state.tolist(), initstate.tolist())
+
+    def test_is_primitive(self):
+        self.assertTrue(LFSR(poly=[17, 14], initstate="ones").is_primitive())
+        self.assertTrue(LFSR(poly=[17, 3], initstate="ones", feedback="internal").is_primitive())
+        # x^4 + x^3 + x^2 + x + 1 is irreducible, but x has order 5
+        self.assertFalse(LFSR(poly=[4, 3, 2, 1], initstate="ones").is_primitive())
+        self.assertFalse(LFSR(poly=[8, 4], initstate="ones").is_primitive())
+
     def test_raise_exception(self):
         with self.assertRaises(Exception):
             LFSR(poly=[3,2], initstate=[0])
@@ -74,6 +302,49 @@ class TestNLFSR(unittest.TestCase):
         self.assertEqual(nl.shift(), 0)
         self.assertListEqual(nl.state.tolist(), [1,1,1])
 
+    def test_parallel_engine(self):
+        infunc = FSRFunction([16, 19, "*", 27, "+", 30, "+"])
+        outfunc = FSRFunction([20, 31, "*", 17, "+"])
+        self.assertEqual(NLFSR(initstate="ones", infunc=infunc, size=32).parallelism(), 17)
+        for bits_per_step in [None, 1, 5, 17]:
+            a = NLFSR(initstate="random", infunc=infunc, outfunc=outfunc, size=32)
+            b = NLFSR(initstate=a.state.tolist(), infunc=infunc, outfunc=outfunc)
+            seq = a.sequence(1003, show_progress=False, engine="shift")
+            self.assertListEqual(
+                b.sequence(1003, bits_per_step=bits_per_step).tolist(), seq.tolist())
+            self.assertListEqual(b.state.tolist(), a.state.tolist())
+            self.assertEqual(b.cycles, a.cycles)
+            self.assertEqual(b.outbit, a.outbit)
+            self.assertEqual(b.feedback_bit, a.feedback_bit)
+        with self.assertRaises(Exception):
+            b.sequence(10, bits_per_step=18)
+
+    def test_period(self):
+        # x0 * x1 has the fixed point 0 which is reached after 3 cycles
+        nl = NLFSR(initstate=[1, 0, 1], infunc=FSRFunction([0, 1, "*"]))
+        self.assertEqual(nl.period(), (3, 1))
+        nl = NLFSR(initstate=[1, 0, 0], infunc=FSRFunction([0, 2, "+", 1, 2, "*", "+"]))
+        tail, cycle = nl.period()
+        for _ in range(tail):
+            nl.shift()
+        state = nl.state.copy()
+        for _ in range(cycle):
+            nl.shift()
+        self.assertListEqual(nl.state.tolist(), state.tolist())
+        self.assertEqual(FSRFunction([0, 2, "*", 1, "+"]).compile_packed()(0b101), 1)
+
+    def test_parallel_sequences(self):
+        infunc = FSRFunction([0,1,2, "*", "+"])
+        registers = [NLFSR(initstate="random", infunc=infunc, size=7) for _ in range(4)]
+        copies = [NLFSR(initstate=r.state.tolist(), infunc=infunc) for r in registers]
+        seqs = parallel_sequences(registers, 300, workers=2)
+        for seq, r, c in zip(seqs, registers, copies):
+            self.assertListEqual(seq.tolist(), c.sequence(300, show_progress=False).tolist())
+            self.assertListEqual(r.state.tolist(), c.state.tolist())
+            self.assertEqual(r.cycles, 300)
+            # the caller's functions aren't replaced by the unpickled copies
+            self.assertIs(r.infunc, infunc)
+
     def test_raise_exception(self):
         infunc = FSRFunction([0,1,2, "*", "+"])
         with self.assertRaises(Exception):
@@ -82,9 +353,465 @@ class TestNLFSR(unittest.TestCase):
         with self.assertRaises(Exception):
             nl.shift()
         nl = NLFSR(initstate="random", infunc=infunc, outfunc=FSRFunction([5]), size=1)
+        with self.assertRaises(Exception):
+            nl.sequence(1, format="packed")
+        nl = NLFSR(initstate="random", infunc=infunc, outfunc=FSRFunction([5]), size=1)
         with self.assertRaises(Exception):
             nl.shift()
 
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.cache = tempfile.TemporaryDirectory()
+        os.environ['PYFSR_CACHE_DIR'] = self.cache.name
+        catalog._catalog = None
+
+    def tearDown(self):
+        del os.environ['PYFSR_CACHE_DIR']
+        catalog._catalog = None
+        self.cache.cleanup()
+
+    def test_catalog(self):
+        self.assertListEqual(catalog.primitive_trinomials(7), [1, 3, 4, 6])
+        self.assertListEqual(catalog.primitive_trinomials(8), [])
+        self.assertListEqual(catalog.primitive_pentanomials(8, 2), [[4, 3, 2], [5, 3, 1]])
+        self.assertListEqual(catalog.maximum_length_poly(8), [8, 4, 3, 2])
+        self.assertTrue(os.path.exists(catalog.cache_path()))
+        # loaded from the cache file
+        catalog._catalog = None
+        self.assertListEqual(catalog.primitive_trinomials(7), [1, 3, 4, 6])
+        l = LFSR(poly=catalog.maximum_length_poly(12), initstate="ones")
+        self.assertEqual(l.period(), 2**12 - 1)
+
+    def test_mersenne_factors(self):
+        for d in range(2, 257):
+            product = 1
+            for p, e in gf2._mersenne_factors(d).items():
+                self.assertTrue(gf2._is_probable_prime(p))
+                product *= p**e
+            self.assertEqual(product, 2**d - 1)
+        self.assertTrue(gf2.is_primitive((1 << 256) | (1 << 10) | (1 << 5) | (1 << 2) | 1))
+        # beyond the table: known if 2^d - 1 is prime, otherwise an exception
+        self.assertTrue(gf2.is_primitive((1 << 521) | (1 << 32) | 1))
+        with self.assertRaises(Exception):
+            LFSR(poly=[257, 12], initstate="ones").is_primitive()
+
+
+class TestFSRBank(unittest.TestCase):
+    def test_matches_registers(self):
+        outfunc = FSRFunction([12, 2, "*", 5, "+"])
+        templates = [
+            LFSR(poly=[13, 7, 4, 3], initstate="random", outfunc=outfunc),
+            LFSR(poly=[13, 7, 4, 3], initstate="random", outfunc=outfunc,
+                 feedback="internal"),
+            NLFSR(initstate="random", infunc=FSRFunction([0, 1, 2, "*", "+", 9, "+"]),
+                  outfunc=outfunc, size=13),
+        ]
+        for template in templates:
+            initstates = np.random.randint(0, 2, (70, 13))
+            bank = FSRBank(template, initstates, buffer_cycles=7)
+            seqs = bank.sequence(100)
+            self.assertEqual(seqs.shape, (70, 100))
+            for initstate, seq, state in zip(initstates, seqs, bank.state):
+                template.state = initstate.copy()
+                self.assertListEqual(
+                    template.sequence(100, show_progress=False).tolist(), seq.tolist())
+                self.assertListEqual(template.state.tolist(), state.tolist())
+        template = LFSR(poly=[5, 3], initstate="ones", outfunc=FSRFunction([1, 1, "+"]))
+        bank = FSRBank(template, np.ones((3, 5), dtype=np.uint8))
+        self.assertListEqual(bank.shift().tolist(), [0, 0, 0])
+
+
+class TestClockControlled(unittest.TestCase):
+    def test_majority(self):
+        registers = [LFSR(poly=[19, 18, 17, 14], initstate="random"),
+                     LFSR(poly=[23, 22, 21, 8], initstate="random"),
+                     NLFSR(initstate="random", infunc=FSRFunction([0, 1, 2, "*", "+", 12, "+"]), size=22)]
+        copies = [pickle.loads(pickle.dumps(r)) for r in registers]
+        seq = ClockControlled(registers, "majority", clock_taps=[8, 10, 10]).sequence(300)
+        expected = []
+        for _ in range(300):
+            bits = [copies[0].state[8], copies[1].state[10], copies[2].state[10]]
+            vote = int(sum(bits) >= 2)
+            for r, b in zip(copies, bits):
+                if b == vote:
+                    r.shift()
+            expected.append(sum(max(int(r.outbit), 0) for r in copies) % 2)
+        self.assertListEqual(seq.tolist(), expected)
+        for r, c in zip(registers, copies):
+            self.assertListEqual(r.state.tolist(), c.state.tolist())
+
+    def test_shrinking(self):
+        a = LFSR(poly=[19, 18, 17, 14], initstate="random")
+        s = LFSR(poly=[22, 21], initstate="random", feedback="internal")
+        a_copy, s_copy = pickle.loads(pickle.dumps(a)), pickle.loads(pickle.dumps(s))
+        generator = ClockControlled([a, s], "shrinking")
+        seq = np.concatenate([generator.sequence(10), generator.sequence(500)])
+        expected = []
+        while len(expected) < 510:
+            bit = a_copy.shift()
+            if s_copy.shift():
+                expected.append(bit)
+        self.assertListEqual(seq.tolist(), expected)
+        self.assertListEqual(a.state.tolist(), a_copy.state.tolist())
+        self.assertListEqual(s.state.tolist(), s_copy.state.tolist())
+        # selecting sequences that run out of 1s
+        zero = NLFSR([0, 1, 1, 0, 1], FSRFunction([0, 1, "+", 2, 4, "*", "+"]))
+        with self.assertRaises(Exception):
+            ClockControlled([a, zero], "shrinking").sequence(5)
+        with self.assertRaises(Exception):
+            ClockControlled([LFSR(poly=[5, 3], initstate=[0] * 5)], "self_shrinking").sequence(5)
+        even = NLFSR([1, 0, 1, 0], FSRFunction([3]))
+        with self.assertRaises(Exception):
+            ClockControlled([even], "self_shrinking").sequence(5)
+
+    def test_raise_exception(self):
+        l = LFSR(poly=[5, 3], initstate="ones")
+        with self.assertRaises(Exception):
+            ClockControlled([l, l], "majority", clock_taps=[1, 1])
+        with self.assertRaises(Exception):
+            ClockControlled([l, l, l], "majority", clock_taps=[1, 1, 5])
+        with self.assertRaises(Exception):
+            ClockControlled([l, l], "stop_and_go", clock_taps=[1, 1])
+        with self.assertRaises(Exception):
+            ClockControlled([l], "blinking")
+
+
+class TestCompositeGenerator(unittest.TestCase):
+    def run_example(self, name):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples', name)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            runpy.run_path(path, run_name='__main__')
+        return out.getvalue()
+
+    def test_known_answers(self):
+        self.assertTrue(self.run_example('e0.py').startswith(
+            '0010011101111110111101111000111111011100001101110101110011011110'))
+        self.assertTrue(self.run_example('grain.py').startswith(
+            '0101001010111000000010110011000111011110010111110001110001010010'))
+
+    def test_matches_registers(self):
+        def transition(state, value):
+            return (state * 3 + value) % 5, (state ^ value) & 1
+
+        registers = [LFSR(poly=[19, 18, 17, 14], initstate="random"),
+                     NLFSR(initstate="random", infunc=FSRFunction([3, 5, "*", 12, "+", 0, "+"]), size=17)]
+        copies = [pickle.loads(pickle.dumps(r)) for r in registers]
+        taps = [(0, 1), (1, 4), (0, 18), (1, 16)]
+        output = FSRFunction([0, 1, "*", 2, "+"])
+        feedback = FSRFunction([2, 3, "*"])
+        generator = CompositeGenerator(registers, taps, output, feedback={1: feedback},
+                                       fsm=FSM(transition, [1, 3]), init_cycles=20,
+                                       init_feedback=[0])
+        state = 0
+        expected = []
+        for t in range(20 + 300):
+            values = [int(copies[i].state[index]) for i, index in taps]
+            state, out = transition(state, values[1] | (values[3] << 1))
+            z = output.solve(values) ^ out
+            fb0 = np.bitwise_xor.reduce(copies[0].state[[18, 17, 16, 13]]) ^ (z if t < 20 else 0)
+            fb1 = copies[1].infunc.solve(copies[1].state) ^ feedback.solve(values)
+            for r, fb in zip(copies, [fb0, fb1]):
+                r.state = np.roll(r.state, 1)
+                r.state[0] = fb
+            if t >= 20:
+                expected.append(z)
+        seq = np.concatenate([generator.sequence(100), generator.sequence(200)])
+        self.assertListEqual(seq.tolist(), expected)
+        for r, c in zip(registers, copies):
+            self.assertListEqual(r.state.tolist(), c.state.tolist())
+
+
+class TestRandomness(unittest.TestCase):
+    # examples of NIST SP 800-22
+    EPSILON = "11001001000011111101101010100010001000010110100011000010001101" \
+              "00110001001100011001100010100010111000"
+
+    def bits(self, string):
+        return np.array([int(c) for c in string])
+
+    def test_nist_examples(self):
+        results = randomness.run_tests(self.bits(self.EPSILON), block_frequency_m=10,
+                                       entropy_m=2, tests=["frequency", "block_frequency", "runs",
+                                                           "approximate_entropy", "cumulative_sums"])
+        self.assertAlmostEqual(results["frequency"], 0.109599, places=6)
+        self.assertAlmostEqual(results["block_frequency"], 0.706438, places=6)
+        self.assertAlmostEqual(results["runs"], 0.500798, places=6)
+        self.assertAlmostEqual(results["approximate_entropy"], 0.235301, places=6)
+        self.assertAlmostEqual(results["cumulative_sums"][0], 0.219194, places=6)
+        self.assertAlmostEqual(results["cumulative_sums"][1], 0.114866, places=6)
+        serial = randomness.run_tests(self.bits("0011011101"), serial_m=3, tests=["serial"])
+        self.assertAlmostEqual(serial["serial"][0], 0.808792, places=6)
+        self.assertAlmostEqual(serial["serial"][1], 0.670320, places=6)
+        longest = randomness.run_tests(self.bits(
+            "11001100000101010110110001001100111000000000001001001101010100010001"
+            "001111010110100000001101011111001100111001101101100010110010"), tests=["longest_run"])
+        self.assertAlmostEqual(longest["longest_run"], 0.180598, places=6)
+
+    def test_streaming(self):
+        seq = LFSR(poly=[89, 38], initstate="random").sequence(100000, format="uint8")
+        results = randomness.run_tests(seq, dft_block=2**14)
+        chunks = [np.packbits(seq[i:i + 8000]) for i in range(0, len(seq), 8000)]
+        self.assertEqual(randomness.run_tests_stream(chunks, dft_block=2**14), results)
+        # every block of an lfsr has the linear complexity of the register
+        self.assertEqual(results["linear_complexity"], 0.0)
+        self.assertIsNone(randomness.run_tests(seq[:100])["longest_run"])
+
+
+class TestCorrelation(unittest.TestCase):
+    def naive(self, a, b):
+        x = 1 - 2 * np.asarray(a)
+        y = 1 - 2 * np.asarray(b)
+        return np.correlate(y, x, 'full')
+
+    def test_m_sequence(self):
+        seq = LFSR(poly=[5, 3], initstate="ones").sequence(31)
+        expected = np.full(31, -1)
+        expected[0] = 31
+        np.testing.assert_array_equal(correlation.autocorrelation(seq, cyclic=True), expected)
+
+    def test_naive(self):
+        rng = np.random.RandomState(3)
+        a = rng.randint(0, 2, 1000)
+        b = rng.randint(0, 2, 1000)
+        full = self.naive(a, b)
+        np.testing.assert_array_equal(correlation.cross_correlation(a, b), full)
+        np.testing.assert_array_equal(correlation.cross_correlation(a, b, 40, block=128),
+                                      full[999 - 40:1000 + 40])
+        np.testing.assert_array_equal(correlation.autocorrelation(a, 40, block=128),
+                                      self.naive(a, a)[999:1040])
+        batch = correlation.cross_correlation(np.stack((a, b)), b, 10)
+        np.testing.assert_array_equal(batch[1], self.naive(b, b)[989:1010])
+
+    def test_chunks(self):
+        rng = np.random.RandomState(4)
+        a = rng.randint(0, 2, 1000)
+        b = rng.randint(0, 2, 1000)
+        chunks_a = [a[i:i + 96] for i in range(0, 1000, 96)]
+        chunks_b = [b[i:i + 96] for i in range(0, 1000, 96)]
+        np.testing.assert_array_equal(correlation.correlate_chunks(chunks_a, chunks_b, 90, format="int"),
+                                      self.naive(a, b)[999 - 90:1000 + 90])
+        l = LFSR(poly=[20, 17], initstate=[1] * 20)
+        seq = LFSR(poly=[20, 17], initstate=[1] * 20).sequence(10000)
+        np.testing.assert_array_equal(correlation.correlate_chunks(l.iter_chunks(1024, 10000), max_lag=64),
+                                      correlation.autocorrelation(seq, 64))
+        # the last chunk ends within a byte
+        seq = LFSR(poly=[20, 17], initstate=[1] * 20).sequence(10003)
+        chunks = LFSR(poly=[20, 17], initstate=[1] * 20).iter_chunks(1024, 10003)
+        np.testing.assert_array_equal(correlation.correlate_chunks(chunks, max_lag=64, nbits=10003),
+                                      correlation.autocorrelation(seq, 64))
+
+
+class TestComplexity(unittest.TestCase):
+    def test_shortest_lfsr(self):
+        seq = LFSR(poly=[89, 38], initstate="random").sequence(300)
+        register = complexity.shortest_lfsr(seq)
+        self.assertListEqual(register.poly, [89, 38])
+        np.testing.assert_array_equal(register.sequence(300), seq)
+
+    def test_profile(self):
+        profile = complexity.complexity_profile([1, 0, 0, 1, 1, 0, 1])
+        self.assertListEqual(profile.tolist(), [1, 1, 1, 3, 3, 3, 4])
+        self.assertEqual(complexity.linear_complexity([0, 0, 0, 0]), 0)
+        self.assertEqual(complexity.linear_complexity([0] * 100 + [1, 1]), 101)
+        with self.assertRaises(Exception):
+            complexity.shortest_lfsr([1, 1, 1, 1])
+
+    def test_stream(self):
+        nlfsr = NLFSR(initstate=[1, 0, 0, 1, 1, 0, 1, 0],
+                      infunc=FSRFunction([0, 3, "+", 2, 5, "*", "+"]))
+        seq = nlfsr.sequence(5000, format="uint8")
+        chunks = [np.packbits(seq[i:i + 800]) for i in range(0, 5000, 800)]
+        engine = complexity.linear_complexity_stream(chunks)
+        self.assertEqual(engine.n, 5000)
+        self.assertEqual(engine.linear_complexity, complexity.linear_complexity(seq))
+        np.testing.assert_array_equal(engine.profile(), complexity.complexity_profile(seq))
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_roundtrip(self):
+        registers = [
+            LFSR(poly=[89, 38], initstate="random"),
+            LFSR(poly=[20, 17], initstate="random", feedback="internal",
+                 outfunc=FSRFunction([3, 5, "*", 19, "+"])),
+            NLFSR(initstate=[1, 0, 0, 1, 1, 0, 1, 0], infunc=FSRFunction([0, 3, "+", 2, 5, "*", "+"]),
+                  outfunc=FSRFunction([1, 6, "+"])),
+        ]
+        for register in registers:
+            register.sequence(1234)
+            restored = checkpoint.from_bytes(register.to_bytes())
+            self.assertEqual(restored.cycles, 1234)
+            self.assertEqual(restored.outbit, register.outbit)
+            np.testing.assert_array_equal(restored.sequence(3000), register.sequence(3000))
+        data = bytearray(registers[0].to_bytes())
+        data[12] ^= 1
+        with self.assertRaises(Exception):
+            checkpoint.from_bytes(data)
+
+    def test_resume(self):
+        register = LFSR(poly=[89, 38], initstate="random")
+        expected = LFSR(poly=[89, 38], initstate=register.state.tolist()).sequence(50000, format="bytes")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "register.ckpt")
+            auto = checkpoint.AutoCheckpoint(path, every_bits=8192, interval=None)
+            out = io.BytesIO()
+            chunks = register.iter_chunks(4096, 50000, checkpoint=auto)
+            for i, chunk in enumerate(chunks):
+                out.write(chunk.tobytes())
+                if i == 6:
+                    # the worker dies before the checkpoint of this chunk
+                    break
+            chunks.close()
+            resumed = checkpoint.load(path)
+            self.assertEqual(resumed.cycles, 6 * 4096)
+            out.truncate(resumed.cycles // 8)
+            out.seek(0, io.SEEK_END)
+            resumed.write_to(out, 50000 - resumed.cycles, checkpoint=auto)
+            self.assertEqual(out.getvalue(), expected)
+            self.assertEqual(checkpoint.load(path).cycles, 50000)
+
+
+class TestRandomAccess(unittest.TestCase):
+    def test_read(self):
+        infunc = FSRFunction([0, 3, "+", 2, 5, "*", "+", 31, "+"])
+        outfunc = FSRFunction([1, 6, "+"])
+        nlfsr = NLFSR(initstate=[1, 0, 0, 1, 1, 0, 1, 0] * 4, infunc=infunc, outfunc=outfunc)
+        expected = NLFSR(initstate=nlfsr.initstate.tolist(), infunc=infunc,
+                         outfunc=outfunc).sequence(60000)
+        nlfsr.sequence(77)
+        np.testing.assert_array_equal(nlfsr.read(12345, 100), expected[12345:12445])
+        index = nlfsr.build_index(1000, 50000)
+        self.assertEqual(len(index), 51)
+        for offset, length in [(0, 10), (999, 5), (43210, 2000), (55000, 1000)]:
+            np.testing.assert_array_equal(nlfsr.read(offset, length), expected[offset:offset + length])
+        self.assertEqual(nlfsr.cycles, 77)
+        other = NLFSR(initstate=[1, 0, 0, 1, 1, 0, 1, 1] * 4, infunc=infunc, outfunc=outfunc)
+        with self.assertRaises(Exception):
+            index.read(other, 0, 10)
+
+    def test_skip(self):
+        infunc = FSRFunction([0, 3, "+", 2, 5, "*", "+", 31, "+"])
+        a = NLFSR(initstate="random", infunc=infunc, size=32)
+        b = NLFSR(initstate=a.state.tolist(), infunc=infunc)
+        a.sequence(1000, show_progress=False)
+        stream.skip(b, 1000, chunk_bits=64)
+        self.assertListEqual(b.state.tolist(), a.state.tolist())
+        self.assertEqual(b.cycles, 1000)
+
+    def test_initcycles(self):
+        infunc = FSRFunction([0, 3, "+", 2, 5, "*", "+", 31, "+"])
+        nlfsr = NLFSR(initstate="random", infunc=infunc, size=32, initcycles=100)
+        initstate = nlfsr.initstate.copy()
+        expected = NLFSR(initstate=initstate.tolist(), infunc=infunc).sequence(3000)
+        for _ in range(10):
+            nlfsr.shift()
+        self.assertListEqual(nlfsr.initstate.tolist(), initstate.tolist())
+        nlfsr.build_index(256, 3000)
+        np.testing.assert_array_equal(nlfsr.read(2000, 50), expected[2000:2050])
+
+    def test_sidecar(self):
+        lfsr = LFSR(poly=[89, 38], initstate="random")
+        expected = LFSR(poly=[89, 38], initstate=lfsr.initstate.tolist()).sequence(20000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lfsr.idx")
+            lfsr.build_index(1 << 10, 20000, path=path)
+            lfsr.index = StateIndex.open(path)
+            np.testing.assert_array_equal(lfsr.read(17000, 500), expected[17000:17500])
+            del lfsr.index
+
+
+class TestAsync(unittest.TestCase):
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    async def collect(self, register, **kwargs):
+        chunks = []
+        async for chunk in register.aiter_chunks(**kwargs):
+            chunks.append(chunk.tobytes())
+        return b"".join(chunks)
+
+    def test_concurrent(self):
+        infunc = FSRFunction([0, 3, "+", 2, 5, "*", "+", 31, "+"])
+        registers = [LFSR(poly=[89, 38], initstate="random") for _ in range(4)]
+        registers.append(NLFSR(initstate=[1, 0, 0, 1, 1, 0, 1, 0] * 4, infunc=infunc))
+        expected = [b"".join(chunk.tobytes() for chunk in pickle.loads(pickle.dumps(r)).iter_chunks(4096, 50000))
+                    for r in registers]
+
+        async def main():
+            return await asyncio.gather(*[self.collect(r, chunk_bits=4096, nbits=50000) for r in registers])
+
+        self.assertListEqual(self.run_async(main()), expected)
+        for register in registers:
+            self.assertEqual(register.cycles, 50000)
+
+    def test_backpressure(self):
+        lfsr = LFSR(poly=[89, 38], initstate="random")
+
+        async def main():
+            chunks = lfsr.aiter_chunks(1024, queue_size=2)
+            await chunks.__anext__()
+            # wait until the producer filled the queue
+            while lfsr.cycles < 3 * 1024:
+                await asyncio.sleep(0.001)
+            await chunks.aclose()
+            return lfsr.cycles
+
+        cycles = self.run_async(main())
+        # the producer is at most queue_size + 1 chunks ahead of the consumed chunk
+        self.assertLessEqual(cycles - 1024, (2 + 1) * 1024)
+        # no job advances the register after the generator was closed
+        self.assertEqual(lfsr.cycles, cycles)
+
+    def test_process(self):
+        nlfsr = NLFSR(initstate=[1, 0, 0, 1, 1, 0, 1, 0] * 4,
+                      infunc=FSRFunction([0, 3, "+", 2, 5, "*", "+", 31, "+"]))
+        reference = pickle.loads(pickle.dumps(nlfsr))
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            result = self.run_async(self.collect(nlfsr, chunk_bits=8192, nbits=30000, executor=pool))
+        self.assertEqual(result, reference.sequence(30000, format="bytes"))
+        self.assertEqual(nlfsr.cycles, 30000)
+        np.testing.assert_array_equal(nlfsr.state, reference.state)
+
+
+class TestInstrument(unittest.TestCase):
+    def test_metrics(self):
+        metrics = Metrics()
+        nl = NLFSR(initstate="random", infunc=FSRFunction([0, 1, 2, "*", "+", 9, "+"]), size=13)
+        nl.attach(metrics)
+        nl.infunc.attach(metrics)
+        nl.sequence(5000, engine="shift")
+        self.assertEqual(metrics.clocks, 5000)
+        self.assertEqual(metrics.solve_calls, 5000)
+        nl.sequence(100)
+        self.assertEqual(metrics.clocks, 5100)
+        # the parallel engine counts one evaluation per clock
+        self.assertEqual(metrics.solve_calls, 5100)
+        self.assertGreater(metrics.bits_per_sec, 0)
+        # instruments are not pickled
+        copy = pickle.loads(pickle.dumps(nl))
+        self.assertIsNone(copy.instrument)
+        self.assertEqual(copy.infunc.solve(copy.state), nl.infunc.solve(nl.state))
+        self.assertEqual(metrics.solve_calls, 5101)
+        nl.detach()
+        nl.infunc.detach()
+        nl.sequence(100, engine="shift")
+        self.assertEqual(metrics.clocks, 5100)
+
+    def test_chunks(self):
+        metrics = Metrics()
+        l = LFSR(poly=[19, 18, 17, 14], initstate="random")
+        l.write_to(io.BytesIO(), 10004, chunk_bits=800, instrument=metrics)
+        self.assertEqual(metrics.clocks, 10004)
+        calls = []
+        l.attach(Metrics(callback=calls.append, interval=0))
+        l.sequence(100)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[-1].clocks, 100)
+
 
 if __name__ == '__main__':
     unittest.main()